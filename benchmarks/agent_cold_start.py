@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark PostgresMemoryAgent construction against an up-to-date database.
+
+Constructs the agent repeatedly with each schema migration mode and reports
+the construction time and how many connections it took from the pool:
+
+- always: run PostgresSaver.setup() and PostgresStore.setup(), as every agent
+  construction used to
+- auto: read the migration versions in one query and skip setup() when current
+- skip: do not touch the schema; migrations ran at deploy time
+
+The model and embeddings are fakes, so only PostgreSQL (PG_* environment
+variables) is needed. The first construction migrates a new database and is
+not timed.
+
+Usage:
+    python benchmarks/agent_cold_start.py --iterations 20
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.agents.memory_agent.postgres_memory_agent import PostgresMemoryAgent
+from src.models.fake_chat_model import FakeChatModel
+
+
+def construct(mode: str, embedding_dims: int):
+    """Construct and close one agent; return (seconds, pool connection requests)."""
+    start = time.perf_counter()
+    agent = PostgresMemoryAgent(
+        embedding_model=DeterministicFakeEmbedding(size=embedding_dims),
+        embedding_dims=embedding_dims,
+        llm=FakeChatModel(),
+        schema_migrations=mode,
+    )
+    seconds = time.perf_counter() - start
+    requests = agent.pool_stats()["sync"]["requests"]
+    agent.pool.close()
+    return seconds, requests
+
+
+def main():
+    """Run the cold-start benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--embedding-dims", type=int, default=1536,
+                        help="Must match the dimensions the store tables were created with")
+    args = parser.parse_args()
+
+    # Make sure the schema is current before timing anything
+    construct("auto", args.embedding_dims)
+
+    print(f"{'mode':<8} {'mean ms':>9} {'p50 ms':>9} {'max ms':>9} {'pool requests':>14}")
+    for mode in ("always", "auto", "skip"):
+        results = [construct(mode, args.embedding_dims) for _ in range(args.iterations)]
+        seconds = [result[0] for result in results]
+        print(
+            f"{mode:<8} {statistics.mean(seconds) * 1000:9.1f} {statistics.median(seconds) * 1000:9.1f} "
+            f"{max(seconds) * 1000:9.1f} {statistics.mean(result[1] for result in results):14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Load test PostgresMemoryAgent: p95 latency vs number of concurrent conversations.
+
+Each concurrency level starts that many conversations, each on its own thread
+ID, and sends --turns messages per conversation. In "async" mode all of them
+run on one event loop through ainvoke; in "threads" mode each conversation
+gets an OS thread calling the blocking invoke, which is what an asyncio server
+had to do before ainvoke existed.
+
+The model is a FakeChatModel with a fixed --latency standing in for Bedrock,
+and memories are embedded with a deterministic fake embedding, so the test
+needs only PostgreSQL (PG_* environment variables). Pass --bedrock to call the
+real model instead.
+
+Usage:
+    python benchmarks/async_agent_load_test.py --concurrency 1,10,50,100,200 --latency 1.0
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.agents.memory_agent.pool import format_pool_stats
+from src.agents.memory_agent.postgres_memory_agent import PostgresMemoryAgent
+from src.models.fake_chat_model import FakeChatModel
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Return the pct-th percentile of values using nearest-rank."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def message(turn: int):
+    """The user message sent on a given turn."""
+    return [{"role": "user", "content": f"Turn {turn}: remind me what I said I prefer for reports."}]
+
+
+async def run_async(agent: PostgresMemoryAgent, concurrency: int, turns: int) -> List[float]:
+    """Run concurrent conversations on one event loop and return per-request latencies."""
+    latencies: List[float] = []
+
+    async def conversation():
+        thread_id = f"load-{uuid.uuid4()}"
+        for turn in range(turns):
+            start = time.perf_counter()
+            await agent.ainvoke(message(turn), thread_id=thread_id)
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(conversation() for _ in range(concurrency)))
+    return latencies
+
+
+def run_threads(agent: PostgresMemoryAgent, concurrency: int, turns: int) -> List[float]:
+    """Run concurrent conversations with one OS thread each and return per-request latencies."""
+    latencies: List[float] = []
+
+    def conversation():
+        thread_id = f"load-{uuid.uuid4()}"
+        for turn in range(turns):
+            start = time.perf_counter()
+            agent.invoke(message(turn), thread_id=thread_id)
+            latencies.append(time.perf_counter() - start)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(conversation) for _ in range(concurrency)]:
+            future.result()
+    return latencies
+
+
+def report(mode: str, concurrency: int, latencies: List[float], seconds: float):
+    """Print one result row."""
+    print(
+        f"{mode:<8} {concurrency:>11d} {len(latencies):>9d} {len(latencies) / seconds:>9.1f} "
+        f"{statistics.median(latencies) * 1000:>9.0f} {percentile(latencies, 95) * 1000:>9.0f} "
+        f"{max(latencies) * 1000:>9.0f}"
+    )
+
+
+async def main_async(args):
+    """Create the agent and run every concurrency level."""
+    llm = None if args.bedrock else FakeChatModel(
+        responses=["Noted. You prefer reports as short bullet summaries."],
+        latency=args.latency,
+    )
+    agent = PostgresMemoryAgent(
+        embedding_model=DeterministicFakeEmbedding(size=args.embedding_dims),
+        embedding_dims=args.embedding_dims,
+        prompt_caching=False,
+        llm=llm,
+    )
+    levels = [int(level) for level in args.concurrency.split(",")]
+    modes = ["async", "threads"] if args.mode == "both" else [args.mode]
+
+    print(f"{'mode':<8} {'concurrency':>11} {'requests':>9} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    try:
+        # Open the async pool before timing anything
+        await agent.ainvoke(message(0), thread_id=f"load-warmup-{uuid.uuid4()}")
+        for concurrency in levels:
+            for mode in modes:
+                start = time.perf_counter()
+                if mode == "async":
+                    latencies = await run_async(agent, concurrency, args.turns)
+                else:
+                    latencies = await asyncio.to_thread(run_threads, agent, concurrency, args.turns)
+                report(mode, concurrency, latencies, time.perf_counter() - start)
+
+        stats = agent.pool_stats()
+        print(f"\nasync pool: {format_pool_stats(stats['async'])}")
+        print(f"sync pool: {format_pool_stats(stats['sync'])}")
+    finally:
+        await agent.aclose()
+        agent.pool.close()
+
+
+def main():
+    """Run the load test."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,10,50,100,200",
+                        help="Comma-separated numbers of concurrent conversations")
+    parser.add_argument("--turns", type=int, default=3, help="Messages sent per conversation")
+    parser.add_argument("--latency", type=float, default=1.0, help="Seconds the fake model takes per call")
+    parser.add_argument("--mode", choices=["async", "threads", "both"], default="both")
+    parser.add_argument("--embedding-dims", type=int, default=1536,
+                        help="Must match the dimensions the store tables were created with")
+    parser.add_argument("--bedrock", action="store_true", help="Call the Bedrock model from MODEL_ID instead")
+    args = parser.parse_args()
+
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
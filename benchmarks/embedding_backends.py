@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark the embedding backends on CPU.
+
+For each model this script checks that the ONNX outputs match the PyTorch
+sentence-transformers outputs, then reports encoding throughput in sentences
+per second for PyTorch fp32, ONNX fp32 and ONNX int8.
+
+Usage:
+    python benchmarks/embedding_backends.py --models all-MiniLM-L6-v2 all-mpnet-base-v2 --sentences 2000
+"""
+
+import argparse
+import os
+import random
+import sys
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.models.model_registry import get_model
+from src.models.onnx_backend import benchmark, check_parity, get_onnx_backend
+
+WORDS = (
+    "user prefers dark mode database query memory agent conversation summary "
+    "table index latency customer order invoice report schedule meeting team "
+    "python model embedding vector search result analysis weekly monthly"
+).split()
+
+
+def make_sentences(count: int, seed: int = 0):
+    """Generate sentences of varied length so padding waste is realistic."""
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 64))) for _ in range(count)]
+
+
+class TorchBackend:
+    """Adapter giving the PyTorch model the same encode() shape as the ONNX backend."""
+
+    def __init__(self, model_name: str):
+        self.model = get_model(model_name, device="cpu")
+
+    def encode(self, texts):
+        return self.model.encode(texts, batch_size=32)
+
+
+def main():
+    """Run the parity check and throughput benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", nargs="+", default=["all-MiniLM-L6-v2", "all-mpnet-base-v2"])
+    parser.add_argument("--sentences", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=None, help="ONNX intra-op threads")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    sentences = make_sentences(args.sentences)
+
+    for model_name in args.models:
+        print(f"\n=== {model_name} ===")
+        for quantize in (False, True):
+            parity = check_parity(model_name, sentences[:64], quantize=quantize)
+            label = "int8" if quantize else "fp32"
+            print(
+                f"Parity onnx-{label}: min cosine {parity['min_cosine']:.4f}, "
+                f"max abs diff {parity['max_abs_diff']:.4f} ({'PASS' if parity['passed'] else 'FAIL'})"
+            )
+
+        backends = {
+            "torch-fp32": TorchBackend(model_name),
+            "onnx-fp32": get_onnx_backend(model_name, quantize=False, num_threads=args.threads),
+            "onnx-int8": get_onnx_backend(model_name, quantize=True, num_threads=args.threads),
+        }
+        for label, backend in backends.items():
+            throughput = benchmark(sentences, backend, repeats=args.repeats)
+            print(f"{label:<12} {throughput:10.1f} sentences/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Benchmark building the memory extraction prompt.
+
+Compares the original prompt builder, which re-derived and pretty-printed the
+schema and every existing memory on each call, with the compiled per-schema
+templates in src/utils/memory_extraction.py. Reports the mean build time and
+the estimated prompt token count for each memory type.
+
+Usage:
+    python benchmarks/extraction_prompt_benchmark.py --iterations 2000 --existing 5
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional, Type
+
+from pydantic import BaseModel, Field
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.memory_context import estimate_tokens
+from src.utils.memory_extraction import _build_extraction_prompt, _format_conversation, _schema_fields
+
+
+# Same fields as the schemas in examples/memory_types_demo.py
+class SemanticMemory(BaseModel):
+    """Semantic memory stores facts, knowledge, and concepts."""
+    content: str = Field(..., description="The factual information or knowledge")
+    category: str = Field(..., description="Category of the information (e.g., preference, fact, knowledge)")
+    importance: int = Field(default=1, description="Importance level from 1-5, with 5 being most important")
+    source: str = Field(default="conversation", description="Where this information came from")
+
+
+class EpisodicMemory(BaseModel):
+    """Episodic memory stores specific past experiences and events."""
+    observation: str = Field(..., description="The situation and relevant context")
+    thoughts: str = Field(..., description="Key considerations and reasoning process")
+    action: str = Field(..., description="What was done in response")
+    result: str = Field(..., description="What happened and why it worked")
+
+
+class ProceduralMemory(BaseModel):
+    """Procedural memory contains knowledge about how to perform tasks."""
+    task: str = Field(..., description="The task or situation this procedure applies to")
+    procedure: str = Field(..., description="Step-by-step instructions on how to perform the task")
+    context: str = Field(..., description="When and why to use this procedure")
+    effectiveness: int = Field(default=3, description="How effective this procedure is (1-5)")
+
+
+def legacy_extraction_prompt(
+    messages: List[Dict[str, str]],
+    schema_class: Type[BaseModel],
+    instructions: str,
+    existing_memories: Optional[List[Dict[str, Any]]] = None,
+) -> str:
+    """The extraction prompt as it was built before the compiled templates."""
+    schema_fields = _schema_fields(schema_class)
+    conversation_text = _format_conversation(messages)
+    existing_memories_text = ""
+    if existing_memories and len(existing_memories) > 0:
+        existing_memories_text = "EXISTING MEMORIES:\n"
+        for i, memory in enumerate(existing_memories):
+            existing_memories_text += f"{i+1}. {json.dumps(memory, indent=2)}\n"
+
+    return f"""
+You are a memory extraction system. Your task is to extract structured memories from the conversation below.
+
+INSTRUCTIONS:
+{instructions}
+
+MEMORY SCHEMA:
+The memory should be structured as follows:
+{json.dumps(schema_fields, indent=2)}
+
+IMPORTANT: You must create actual memory objects with real values, not just return the schema fields.
+Each memory object must include all required fields with appropriate values based on the conversation.
+
+Example of a CORRECT memory object:
+```
+{{
+  "task": "Explaining gradient descent",
+  "procedure": "Use a hiking analogy where the hiker is trying to find the lowest point in a valley",
+  "context": "When teaching machine learning concepts to non-technical people",
+  "effectiveness": 5
+}}
+```
+
+Example of an INCORRECT memory object (just returning schema fields):
+```
+{{
+  "name": "task",
+  "type": "string",
+  "description": "The task or situation this procedure applies to",
+  "required": true
+}}
+```
+
+{existing_memories_text}
+
+CONVERSATION:
+{conversation_text}
+
+Based on this conversation, extract memories that match the schema. Return ONLY a JSON array of memory objects.
+Each memory object should follow the schema exactly. Do not include any explanations or text outside the JSON array.
+If no memories can be extracted, return an empty array [].
+
+EXTRACTED MEMORIES (JSON ARRAY):
+"""
+
+
+def make_existing(schema_class: Type[BaseModel], count: int) -> List[Dict[str, Any]]:
+    """Build plausible existing memories by filling every field of the schema."""
+    memories = []
+    for i in range(count):
+        memory = {}
+        for name, info in schema_class.model_json_schema()["properties"].items():
+            memory[name] = i % 5 + 1 if info.get("type") == "integer" else f"{info.get('description', name)} #{i}"
+        memories.append(memory)
+    return memories
+
+
+def time_builder(builder, iterations: int, *args) -> float:
+    """Return the mean seconds per call of a prompt builder."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        builder(*args)
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    """Run the prompt build benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--existing", type=int, default=5, help="Existing memories per type in the prompt")
+    args = parser.parse_args()
+
+    messages = [
+        {"role": "user", "content": "I'm struggling to explain gradient descent to my team."},
+        {"role": "assistant", "content": "Think of a hiker walking downhill in fog, one step at a time."},
+        {"role": "user", "content": "That hiking analogy was perfect! My team really understood it."},
+    ]
+    instructions = "Extract important information from the conversation based on the memory type."
+
+    print(f"{'schema':<18} {'before us':>10} {'after us':>10} {'before tok':>11} {'after tok':>10}")
+    for schema_class in (SemanticMemory, EpisodicMemory, ProceduralMemory):
+        schema_instructions = f"{instructions}\nExtract memories of type: {schema_class.__name__}"
+        call_args = (messages, schema_class, schema_instructions, make_existing(schema_class, args.existing))
+
+        before = time_builder(legacy_extraction_prompt, args.iterations, *call_args)
+        after = time_builder(_build_extraction_prompt, args.iterations, *call_args)
+        before_tokens = estimate_tokens(legacy_extraction_prompt(*call_args))
+        after_tokens = estimate_tokens(_build_extraction_prompt(*call_args))
+        print(
+            f"{schema_class.__name__:<18} {before * 1e6:10.1f} {after * 1e6:10.1f} "
+            f"{before_tokens:11d} {after_tokens:10d}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-user memory search latency as the number of users grows.
+
+Seeds PostgresStore with --memories-per-user memories for each of up to
+--users users, stored the way the agents store them, under
+("memories", user_id). At each user count it times searches scoped to one
+user's namespace, which is what the agents now run, and searches over the
+whole ("memories",) prefix, which is what every search cost when all users
+shared one namespace.
+
+Scoped searches also report their recall against the same search run with
+index scans disabled. An HNSW scan that applies the namespace filter after
+the nearest-neighbour search can return fewer results than requested for a
+small tenant, or none at all. The store's pool is configured like the agents'
+with configure_vector_search, which enables hnsw.iterative_scan on pgvector
+0.8+; set PG_STORE_HNSW_ITERATIVE_SCAN=off to measure without it.
+
+The tables are created in their own schema (--schema, default
+memory_bench) with small fake embeddings, so the benchmark does not touch the
+agents' data. Only PostgreSQL (PG_* environment variables) with pgvector is
+needed.
+
+Usage:
+    python benchmarks/tenant_search_benchmark.py --users 100,1000,10000 --memories-per-user 20
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from typing import List, Tuple
+
+import psycopg
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langgraph.store.base import PutOp
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.agents.memory_agent.pool import create_pool
+from src.agents.memory_agent.postgres_store import configure_vector_search, create_postgres_store
+from src.utils.env_utils import get_env_var, load_env_vars
+from src.utils.memory_namespaces import user_namespace
+
+MEMORY_NAMESPACE = ("memories",)
+
+TOPICS = ["reports", "meetings", "travel", "food", "music", "projects", "deadlines", "tools", "family", "sports"]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Return the pct-th percentile of values using nearest-rank."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def seed(store, first_user: int, last_user: int, memories_per_user: int, batch_size: int = 500):
+    """Write the memories of users [first_user, last_user) in batches."""
+    ops = []
+    for user in range(first_user, last_user):
+        namespace = user_namespace(MEMORY_NAMESPACE, f"user-{user}")
+        for i in range(memories_per_user):
+            topic = TOPICS[(user + i) % len(TOPICS)]
+            ops.append(PutOp(namespace, f"m-{i}", {"content": f"User {user} preference {i} about {topic}"}))
+            if len(ops) >= batch_size:
+                store.batch(ops)
+                ops = []
+    if ops:
+        store.batch(ops)
+
+
+def time_searches(store, exact_store, users: int, queries: int, scoped: bool) -> Tuple[List[float], List[float]]:
+    """
+    Time searches for random users; scoped searches only see that user's memories.
+
+    Returns the latencies and, for scoped searches, the recall of each search
+    against the same search run with index scans disabled (an exact scan).
+    """
+    latencies = []
+    recalls = []
+    for _ in range(queries):
+        user = random.randrange(users)
+        namespace = user_namespace(MEMORY_NAMESPACE, f"user-{user}") if scoped else MEMORY_NAMESPACE
+        query = f"what does user {user} prefer about {random.choice(TOPICS)}"
+        start = time.perf_counter()
+        results = store.search(namespace, query=query, limit=10)
+        latencies.append(time.perf_counter() - start)
+        if scoped:
+            exact = {item.key for item in exact_store.search(namespace, query=query, limit=10)}
+            found = {item.key for item in results}
+            recalls.append(len(found & exact) / len(exact) if exact else 1.0)
+    return latencies, recalls
+
+
+def main():
+    """Run the tenant search benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", default="100,1000,10000", help="Comma-separated user counts to measure at")
+    parser.add_argument("--memories-per-user", type=int, default=20)
+    parser.add_argument("--queries", type=int, default=200, help="Searches timed per user count and mode")
+    parser.add_argument("--dims", type=int, default=64, help="Dimensions of the fake embeddings")
+    parser.add_argument("--schema", default="memory_bench", help="Schema the benchmark tables are created in")
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark schema afterwards")
+    args = parser.parse_args()
+
+    load_env_vars()
+    conninfo = (
+        f"postgresql://{get_env_var('PG_USER')}:{get_env_var('PG_PASSWORD')}@{get_env_var('PG_HOST')}:"
+        f"{get_env_var('PG_PORT', '5432')}/{get_env_var('PG_DB')}"
+    )
+    with psycopg.connect(conninfo, autocommit=True) as conn:
+        conn.execute(f'DROP SCHEMA IF EXISTS "{args.schema}" CASCADE')
+        conn.execute(f'CREATE SCHEMA "{args.schema}"')
+    # Keep public on the path for the pgvector types
+    bench_conninfo = f"{conninfo}?options=-csearch_path%3D{args.schema},public"
+    # The same tables without index scans, for the exact results recall is measured against
+    exact_conninfo = f"{bench_conninfo}%20-cenable_indexscan%3Doff%20-cenable_bitmapscan%3Doff"
+
+    levels = [int(level) for level in args.users.split(",")]
+    try:
+        with create_pool(bench_conninfo, name="tenant-benchmark", configure=configure_vector_search) as pool, \
+                create_pool(exact_conninfo, name="tenant-benchmark-exact") as exact_pool:
+            embedding_model = DeterministicFakeEmbedding(size=args.dims)
+            store = create_postgres_store(pool, embedding_model=embedding_model, embedding_dims=args.dims)
+            exact_store = create_postgres_store(
+                exact_pool, embedding_model=embedding_model, embedding_dims=args.dims, setup=False
+            )
+
+            print(f"{'users':>7} {'memories':>9} {'seed s':>7} {'user p50 ms':>12} {'user p95 ms':>12} "
+                  f"{'recall':>7} {'min recall':>11} {'all p50 ms':>11} {'all p95 ms':>11}")
+            seeded = 0
+            for users in levels:
+                start = time.perf_counter()
+                seed(store, seeded, users, args.memories_per_user)
+                seed_seconds = time.perf_counter() - start
+                seeded = users
+                with pool.connection() as conn:
+                    conn.execute("ANALYZE store")
+                    conn.execute("ANALYZE store_vectors")
+
+                scoped, recalls = time_searches(store, exact_store, users, args.queries, scoped=True)
+                unscoped, _ = time_searches(store, exact_store, users, args.queries, scoped=False)
+                print(
+                    f"{users:>7d} {users * args.memories_per_user:>9d} {seed_seconds:>7.1f} "
+                    f"{statistics.median(scoped) * 1000:>12.2f} {percentile(scoped, 95) * 1000:>12.2f} "
+                    f"{statistics.mean(recalls):>7.3f} {min(recalls):>11.2f} "
+                    f"{statistics.median(unscoped) * 1000:>11.2f} {percentile(unscoped, 95) * 1000:>11.2f}"
+                )
+    finally:
+        if not args.keep:
+            with psycopg.connect(conninfo, autocommit=True) as conn:
+                conn.execute(f'DROP SCHEMA IF EXISTS "{args.schema}" CASCADE')
+
+
+if __name__ == "__main__":
+    main()
@@ -22,15 +22,22 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from src.utils.env_utils import load_env_vars, get_env_var
 from langchain_aws import ChatBedrockConverse
 from langchain_community.chat_models import BedrockChat
-from langgraph.store.memory import InMemoryStore
 from langgraph.checkpoint.postgres import PostgresSaver
 from langgraph.prebuilt import create_react_agent
 from langgraph.utils.config import get_store
-from langmem import (
-    create_search_memory_tool
-)
-from src.utils.memory_extraction import extract_multiple_memory_types
-from psycopg_pool import ConnectionPool
+from src.utils.memory_extraction import extract_multiple_memory_types, to_extraction_messages
+from src.utils.memory_retrieval import create_user_search_memory_tool, search_memory_namespaces
+from src.utils.memory_worker import ExtractionResult, MemoryExtractionWorker
+from src.utils.memory_writes import MemoryWrite, put_memories
+from src.utils.memory_watermarks import ExtractionWatermarks
+from src.utils.memory_dedup import MemoryDeduplicator
+from src.utils.memory_context import MemoryContextBuilder
+from src.utils.memory_lifecycle import AccessTracker, MemoryCompactor, RetentionPolicy
+from src.utils.memory_namespaces import config_user_id, run_config, user_namespace
+from src.utils.prompt_cache import PromptCacheUsage, build_cached_prompt, latest_user_text, supports_prompt_caching
+from src.agents.memory_agent.migrations import ensure_schema, migration_mode
+from src.agents.memory_agent.pool import PoolMetrics, PoolSettings, create_pool, format_pool_stats
+from src.agents.memory_agent.postgres_store import configure_vector_search, create_postgres_store
 
 # Define memory schemas
 class SemanticMemory(BaseModel):
@@ -65,6 +72,25 @@ class ProceduralMemory(BaseModel):
     context: str = Field(..., description="When and why to use this procedure")
     effectiveness: int = Field(default=3, description="How effective this procedure is (1-5)")
 
+# Episodes go stale, facts and procedures are kept until the cap is reached.
+# Each policy applies to every user's partition of the namespace separately.
+RETENTION_POLICIES = {
+    ("semantic_memories",): RetentionPolicy(max_items=5000),
+    ("episodic_memories",): RetentionPolicy(ttl_seconds=90 * 24 * 3600, max_items=2000),
+    ("procedural_memories",): RetentionPolicy(max_items=1000),
+}
+
+# Memory type -> (label, store namespace); each user's memories live under (*namespace, user_id)
+MEMORY_NAMESPACES = {
+    "SemanticMemory": ("semantic", ("semantic_memories",)),
+    "EpisodicMemory": ("episodic", ("episodic_memories",)),
+    "ProceduralMemory": ("procedural", ("procedural_memories",)),
+}
+
+def _format_query(messages: List[Dict[str, str]], max_chars: int = 2000) -> str:
+    """Build a search query from the newest messages, capped at max_chars."""
+    return "\n".join(msg["content"] for msg in messages)[-max_chars:]
+
 class MemoryAgent:
     """
     An agent with multiple types of memory capabilities using AWS Bedrock and LangMem.
@@ -88,6 +114,11 @@ class MemoryAgent:
         pg_user: Optional[str] = None,
         pg_password: Optional[str] = None,
         pg_port: Optional[str] = None,
+        extraction_overlap: int = 2,
+        existing_memory_limit: int = 5,
+        dedup_threshold: float = 0.9,
+        memory_token_budget: int = 1500,
+        pool_settings: Optional[PoolSettings] = None,
     ):
         """
         Initialize the MemoryAgent with multiple memory types.
@@ -102,6 +133,12 @@ class MemoryAgent:
             pg_user: PostgreSQL username. If None, will use PG_USER from environment.
             pg_password: PostgreSQL password. If None, will use PG_PASSWORD from environment.
             pg_port: PostgreSQL port. If None, will use PG_PORT from environment.
+            extraction_overlap: Already-extracted messages resent for context on incremental extraction.
+            existing_memory_limit: Existing memories per type shown to the extractor.
+            dedup_threshold: Similarity above which a new memory updates a stored one.
+            memory_token_budget: Maximum estimated tokens of memories, across all types, in the system prompt.
+            pool_settings: Sizing and timeouts of the connection pool. If None, will use the
+                PG_POOL_* variables from environment.
         """
         # Load environment variables
         load_env_vars()
@@ -135,26 +172,27 @@ class MemoryAgent:
         try:
             print("Creating PostgreSQL connection...")
             # Store the pool as an instance variable to keep it alive
-            # Set autocommit=True to allow CREATE INDEX CONCURRENTLY
-            self.pool = ConnectionPool(postgres_connection_string, kwargs={"autocommit": True})
+            self.pool = create_pool(
+                postgres_connection_string, pool_settings, name="memory-types-demo", configure=configure_vector_search
+            )
+            self.pool_metrics = PoolMetrics(self.pool)
             # Create the checkpointer using the pool
             self.checkpointer = PostgresSaver(self.pool)
-            # Setup the checkpointer to create the necessary tables
-            print("Setting up PostgreSQL tables...")
-            self.checkpointer.setup()
+            # Initialize PostgreSQL memory store with embedding capabilities
+            self.store = create_postgres_store(
+                self.pool,
+                embedding_model=embedding_model,
+                embedding_dims=embedding_dims,
+                setup=False,
+            )
+            # Create or migrate the tables only if their version is behind
+            if ensure_schema(self.pool, self.checkpointer, self.store, mode=migration_mode()):
+                print("PostgreSQL tables set up")
             print("PostgreSQL connection and tables created successfully")
         except Exception as e:
             print(f"Error creating PostgreSQL connection: {str(e)}")
             raise
 
-        # Initialize memory store with embedding capabilities
-        self.store = InMemoryStore(
-            index={
-                "dims": 1536,
-                "embed": "openai:text-embedding-3-small",
-            }
-        )
-
         # Initialize Bedrock LLM
         self.llm = ChatBedrockConverse(
             provider="anthropic",
@@ -179,6 +217,27 @@ class MemoryAgent:
 
         self.bedrock_chat = self.llm
 
+        # Background memory extraction worker, started on first use
+        self.extraction_worker = None
+
+        # Per-thread watermarks so each extraction only sees new messages
+        self.watermarks = ExtractionWatermarks(self.store, overlap=extraction_overlap)
+        self.existing_memory_limit = existing_memory_limit
+
+        # Merges near-duplicate memories into the ones already stored
+        self.deduplicator = MemoryDeduplicator(self.store, threshold=dedup_threshold)
+
+        # Evicts expired and low-value memories; retrievals feed the access counts
+        self.access_tracker = AccessTracker()
+        self.compactor = MemoryCompactor(self.store, RETENTION_POLICIES, access_tracker=self.access_tracker)
+
+        # Ranks memories of all types against one shared token budget
+        self.context_builder = MemoryContextBuilder(token_budget=memory_token_budget)
+
+        # Cache the static prompt prefix where the model supports it
+        self.prompt_caching = supports_prompt_caching(model_id)
+        self.cache_usage = PromptCacheUsage()
+
         # Define memory extraction instructions
         self.semantic_instructions = "Extract important facts, preferences, and knowledge from the conversation. Focus on extracting factual information that would be useful to remember about the user."
         self.episodic_instructions = "Extract noteworthy experiences and interactions, capturing the full context and outcome. Focus on specific events, their context, and results."
@@ -193,9 +252,9 @@ class MemoryAgent:
             prompt=self._prompt_function,
             tools=[
                 # Add memory search tools
-                create_search_memory_tool(namespace=("semantic_memories",)),
-                create_search_memory_tool(namespace=("episodic_memories",)),
-                create_search_memory_tool(namespace=("procedural_memories",)),
+                create_user_search_memory_tool(("semantic_memories",)),
+                create_user_search_memory_tool(("episodic_memories",)),
+                create_user_search_memory_tool(("procedural_memories",)),
             ],
             # Provide checkpointer for conversation history
             checkpointer=self.checkpointer,
@@ -203,7 +262,7 @@ class MemoryAgent:
             store=self.store
         )
 
-        # Initialize system prompt
+        # Initialize system prompt; it never changes, so it forms the cacheable prefix
         self.system_prompt = """You are a helpful assistant with multiple types of memory:
 
 1. Semantic Memory: Facts, knowledge, and concepts you've learned
@@ -211,6 +270,10 @@ class MemoryAgent:
 3. Procedural Memory: How to perform tasks and follow procedures
 
 Use these memories to provide helpful, informed responses. When you learn something new or have a successful interaction, store it in the appropriate memory type.
+
+You can store important information using the manage_memory tools.
+You can search for information using the search_memory tools.
+When you learn something important, make sure to store it in the appropriate memory type.
 """
 
     def _prompt_function(self, state: Dict[str, Any]) -> List[Dict[str, str]]:
@@ -226,26 +289,24 @@ Use these memories to provide helpful, informed responses. When you learn someth
         # Get store from configured contextvar
         store = get_store()
 
-        # Search for relevant memories based on the latest message
-        semantic_memories = store.search(
-            ("semantic_memories",),
-            query=state["messages"][-1].content,
-        )
-
-        episodic_memories = store.search(
-            ("episodic_memories",),
-            query=state["messages"][-1].content,
-        )
-
-        procedural_memories = store.search(
-            ("procedural_memories",),
-            query=state["messages"][-1].content,
+        # Search all of the user's memory types for the latest user message in
+        # one batch, so the query is embedded once instead of once per memory type
+        user_id = config_user_id()
+        results = search_memory_namespaces(
+            store,
+            [user_namespace(namespace, user_id) for _, namespace in MEMORY_NAMESPACES.values()],
+            query=latest_user_text(state["messages"]),
+            access_tracker=self.access_tracker,
         )
-
-        # Create system message with memories
-        system_msg = f"""{self.system_prompt}
-
-## Semantic Memories (Facts & Knowledge)
+        context = self.context_builder.build_sections({
+            label: results[user_namespace(namespace, user_id)] for label, namespace in MEMORY_NAMESPACES.values()
+        })
+        semantic_memories = context["semantic"]
+        episodic_memories = context["episodic"]
+        procedural_memories = context["procedural"]
+
+        # Memories change per turn, so they follow the static system prompt
+        memories_msg = f"""## Semantic Memories (Facts & Knowledge)
 <semantic_memories>
 {semantic_memories}
 </semantic_memories>
@@ -259,49 +320,149 @@ Use these memories to provide helpful, informed responses. When you learn someth
 <procedural_memories>
 {procedural_memories}
 </procedural_memories>
-
-You can store important information using the manage_memory tools.
-You can search for information using the search_memory tools.
-When you learn something important, make sure to store it in the appropriate memory type.
 """
 
         # Return messages with system message first
-        return [{"role": "system", "content": system_msg}, *state["messages"]]
+        return build_cached_prompt(
+            self.system_prompt,
+            memories_msg,
+            state["messages"],
+            enable_cache=self.prompt_caching,
+        )
 
-    def invoke(self, messages: List[Dict[str, str]], thread_id: str = "default") -> Dict[str, Any]:
+    def invoke(
+        self,
+        messages: List[Dict[str, str]],
+        thread_id: str = "default",
+        user_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
         """
         Invoke the agent with the given messages.
 
         Args:
             messages: A list of messages to send to the agent.
             thread_id: The ID of the conversation thread.
+            user_id: The user whose memories are read. If None, a shared "default" user is used.
 
         Returns:
             The response from the agent.
         """
-        config = {"configurable": {"thread_id": thread_id}, "recursion_limit": 50}
+        config = run_config(thread_id, user_id, recursion_limit=50, callbacks=[self.cache_usage])
         return self.agent.invoke({"messages": messages}, config=config)
 
-    def stream(self, messages: List[Dict[str, str]], thread_id: str = "default"):
+    def stream(
+        self,
+        messages: List[Dict[str, str]],
+        thread_id: str = "default",
+        user_id: Optional[str] = None,
+    ):
         """
         Stream the agent's response.
 
         Args:
             messages: A list of messages to send to the agent.
             thread_id: The ID of the conversation thread.
+            user_id: The user whose memories are read. If None, a shared "default" user is used.
 
         Returns:
             A generator yielding chunks of the response.
         """
-        config = {"configurable": {"thread_id": thread_id}, "recursion_limit": 50}
+        config = run_config(thread_id, user_id, recursion_limit=50, callbacks=[self.cache_usage])
         return self.agent.stream({"messages": messages}, config=config)
 
-    def update_memories(self, messages: List[Dict[str, str]]):
+    def _relevant_existing_memories(
+        self,
+        messages: List[Dict[str, str]],
+        user_id: Optional[str] = None,
+    ) -> Dict[str, List[Dict[str, Any]]]:
         """
-        Update all memory types based on the conversation.
+        Find the user's stored memories most relevant to the messages being extracted.
 
         Args:
-            messages: A list of messages from the conversation.
+            messages: The messages about to be sent for extraction.
+            user_id: The user whose memories are searched.
+
+        Returns:
+            A dictionary mapping memory types to their most relevant existing memories.
+        """
+        query = _format_query(messages)
+        if not query:
+            return {}
+        namespaces = [user_namespace(namespace, user_id) for _, namespace in MEMORY_NAMESPACES.values()]
+        results = search_memory_namespaces(self.store, namespaces, query=query, limit=self.existing_memory_limit)
+        return {
+            kind: [item.value["content"] for item in results[user_namespace(namespace, user_id)]]
+            for kind, (_, namespace) in MEMORY_NAMESPACES.items()
+        }
+
+    def _extract_memory_writes(
+        self,
+        messages: Optional[List[Dict[str, str]]],
+        thread_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+    ) -> ExtractionResult:
+        """
+        Extract all memory types from a conversation as store writes.
+
+        With a thread_id, only the messages added since the thread's last
+        extraction (plus a small overlap) are sent. The thread stays locked
+        until the result's done() is called: the watermark is advanced only
+        if the writes were stored, so failed writes are extracted again.
+
+        Args:
+            messages: A list of messages from the conversation. If None, the
+                thread's messages are read from its latest checkpoint.
+            thread_id: The ID of the conversation thread, for incremental extraction.
+            user_id: The user the memories belong to.
+
+        Returns:
+            The (namespace, key, value) writes, one per extracted memory. Call
+            done() on it once they have been stored, or have failed to store.
+        """
+        if thread_id is None:
+            return ExtractionResult(self._extract_from_messages(to_extraction_messages(messages), user_id=user_id))
+
+        lock = self.watermarks.lock(thread_id)
+        lock.acquire()
+        try:
+            if messages is None:
+                checkpoint = self.checkpointer.get({"configurable": {"thread_id": thread_id}})
+                messages = checkpoint.get("channel_values", {}).get("messages", []) if checkpoint else []
+
+            delta, watermark = self.watermarks.delta(thread_id, messages)
+            if not delta:
+                print(f"No new messages to extract for thread {thread_id}")
+                lock.release()
+                return ExtractionResult([])
+
+            writes = self._extract_from_messages(to_extraction_messages(delta), user_id=user_id)
+        except BaseException:
+            lock.release()
+            raise
+
+        def on_done(stored: bool):
+            try:
+                if stored:
+                    self.watermarks.advance(thread_id, watermark)
+            finally:
+                lock.release()
+
+        return ExtractionResult(writes, on_done)
+
+    def _extract_from_messages(
+        self,
+        messages: List[Dict[str, str]],
+        user_id: Optional[str] = None,
+    ) -> List[MemoryWrite]:
+        """
+        Run extraction on a list of messages and turn the result into store writes.
+
+        Args:
+            messages: The messages to extract memories from.
+            user_id: The user the memories belong to.
+
+        Returns:
+            A list of (namespace, key, value) writes, one per extracted memory.
         """
         # Extract all memory types using our custom extraction function
         extracted_memories = extract_multiple_memory_types(
@@ -309,49 +470,126 @@ When you learn something important, make sure to store it in the appropriate mem
             messages=messages,
             schema_classes=[SemanticMemory, EpisodicMemory, ProceduralMemory],
             instructions="Extract important information from the conversation based on the memory type.",
+            # Only the stored memories relevant to these messages
+            existing_memories=self._relevant_existing_memories(messages, user_id=user_id),
+            # One LLM call for all three memory types
+            mode="combined",
         )
 
-        # Process semantic memories
-        semantic_memories = extracted_memories.get("SemanticMemory", [])
-        print(f"Extracted {len(semantic_memories)} semantic memories")
-
-        # Store semantic memories in the store
-        for memory in semantic_memories:
-            self.store.put(
-                ("semantic_memories",),
-                memory["id"],
-                {"kind": "SemanticMemory", "content": memory}
+        writes = []
+        for kind, (label, namespace) in MEMORY_NAMESPACES.items():
+            memories = extracted_memories.get(kind, [])
+            print(f"Extracted {len(memories)} {label} memories")
+            for memory in memories:
+                writes.append((user_namespace(namespace, user_id), memory["id"], {"kind": kind, "content": memory}))
+
+        # Update existing memories instead of inserting near-duplicates
+        writes, stats = self.deduplicator.deduplicate(writes)
+        if stats.merged or stats.collapsed:
+            print(
+                f"Deduplicated {stats.merged + stats.collapsed} of {stats.candidates} memories "
+                f"({stats.bytes_saved} bytes saved)"
             )
+        return writes
 
-        # Process episodic memories
-        episodic_memories = extracted_memories.get("EpisodicMemory", [])
-        print(f"Extracted {len(episodic_memories)} episodic memories")
+    def update_memories(
+        self,
+        messages: Optional[List[Dict[str, str]]] = None,
+        thread_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+    ):
+        """
+        Update all memory types based on the conversation.
 
-        # Store episodic memories in the store
-        for memory in episodic_memories:
-            self.store.put(
-                ("episodic_memories",),
-                memory["id"],
-                {"kind": "EpisodicMemory", "content": memory}
-            )
+        This runs extraction inline; use update_memories_in_background to keep
+        it off the request path.
 
-        # Process procedural memories
-        procedural_memories = extracted_memories.get("ProceduralMemory", [])
-        print(f"Extracted {len(procedural_memories)} procedural memories")
+        Args:
+            messages: A list of messages from the conversation. May be omitted
+                when thread_id is given.
+            thread_id: The ID of the conversation thread. When given, only the
+                messages not yet extracted from that thread are processed.
+            user_id: The user the memories belong to. If None, a shared "default" user is used.
+        """
+        extraction = self._extract_memory_writes(messages, thread_id=thread_id, user_id=user_id)
+
+        # Store all memories from this extraction in one batch
+        try:
+            put_memories(self.store, extraction.writes)
+        except BaseException:
+            extraction.done(False)
+            raise
+        extraction.done(True)
+
+        results = {label: [] for label, _ in MEMORY_NAMESPACES.values()}
+        for _, _, value in extraction.writes:
+            results[MEMORY_NAMESPACES[value["kind"]][0]].append(value["content"])
+        return results
 
-        # Store procedural memories in the store
-        for memory in procedural_memories:
-            self.store.put(
-                ("procedural_memories",),
-                memory["id"],
-                {"kind": "ProceduralMemory", "content": memory}
+    def update_memories_in_background(
+        self,
+        messages: Optional[List[Dict[str, str]]] = None,
+        thread_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+    ):
+        """
+        Queue a finished conversation turn for memory extraction and return immediately.
+
+        Extraction runs on a background worker and the memories are written to
+        the store in batches. Call flush_memories() to wait for them.
+
+        Args:
+            messages: A list of messages from the conversation. May be omitted
+                when thread_id is given.
+            thread_id: The ID of the conversation thread. When given, only the
+                messages not yet extracted from that thread are processed.
+            user_id: The user the memories belong to. If None, a shared "default" user is used.
+        """
+        if self.extraction_worker is None:
+            self.extraction_worker = MemoryExtractionWorker(self.store, self._extract_memory_writes)
+        self.extraction_worker.submit(messages, thread_id=thread_id, user_id=user_id)
+
+    def flush_memories(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued conversation turn has been extracted and stored.
+
+        Args:
+            timeout: The maximum number of seconds to wait.
+
+        Returns:
+            True if all memories were written, False if the timeout expired first.
+        """
+        if self.extraction_worker is None:
+            return True
+        return self.extraction_worker.flush(timeout=timeout)
+
+    def compact_memories(self, dry_run: bool = False):
+        """
+        Apply the retention policies to every memory namespace.
+
+        Args:
+            dry_run: Report what would be deleted without deleting anything.
+
+        Returns:
+            A compaction report per namespace.
+        """
+        reports = self.compactor.run(dry_run=dry_run)
+        for report in reports:
+            print(
+                f"{report.namespace}: scanned {report.scanned}, expired {report.expired}, "
+                f"evicted {report.evicted}, reclaimed {report.bytes_reclaimed} bytes"
             )
+        return reports
 
-        return {
-            "semantic": semantic_memories,
-            "episodic": episodic_memories,
-            "procedural": procedural_memories
-        }
+    def close(self):
+        """
+        Drain the background extraction worker and close the connection pool.
+        """
+        self.compactor.stop_background()
+        if self.extraction_worker is not None:
+            self.extraction_worker.close(drain=True)
+            self.extraction_worker = None
+        self.pool.close()
 
     # No system prompt update needed for this implementation
 
@@ -401,6 +639,9 @@ When you learn something important, make sure to store it in the appropriate mem
             print(f"Error listing checkpoints: {str(e)}")
             return []
 
+# The demo conversations all belong to one user
+DEMO_USER_ID = "alex"
+
 def main():
     """Run the memory types demonstration."""
     # Load environment variables from .env file
@@ -438,15 +679,13 @@ def main():
 
     response = agent.invoke(
         [{"role": "user", "content": user_input}],
-        thread_id="memory-demo-1"
+        thread_id="memory-demo-1",
+        user_id=DEMO_USER_ID,
     )
     print(f"Agent: {response['messages'][-1].content}")
 
-    # Update memories based on the conversation
-    agent.update_memories([
-        {"role": "user", "content": user_input},
-        {"role": "assistant", "content": response['messages'][-1].content}
-    ])
+    # Extract memories from the new messages of the thread in the background
+    agent.update_memories_in_background(thread_id="memory-demo-1", user_id=DEMO_USER_ID)
 
     # Demonstrate episodic memory
     print("\n--- Demonstrating Episodic Memory ---")
@@ -455,7 +694,8 @@ def main():
 
     response = agent.invoke(
         [{"role": "user", "content": user_input}],
-        thread_id="memory-demo-1"
+        thread_id="memory-demo-1",
+        user_id=DEMO_USER_ID,
     )
     print(f"Agent: {response['messages'][-1].content}")
 
@@ -465,17 +705,13 @@ def main():
 
     response = agent.invoke(
         [{"role": "user", "content": user_input}],
-        thread_id="memory-demo-1"
+        thread_id="memory-demo-1",
+        user_id=DEMO_USER_ID,
     )
     print(f"Agent: {response['messages'][-1].content}")
 
-    # Update memories based on the conversation
-    agent.update_memories([
-        {"role": "user", "content": "I'm struggling to explain gradient descent to my team. Can you help me come up with a good analogy?"},
-        {"role": "assistant", "content": response['messages'][-2].content},
-        {"role": "user", "content": user_input},
-        {"role": "assistant", "content": response['messages'][-1].content}
-    ])
+    # Extract memories from the new messages of the thread in the background
+    agent.update_memories_in_background(thread_id="memory-demo-1", user_id=DEMO_USER_ID)
 
     # Demonstrate procedural memory
     print("\n--- Demonstrating Procedural Memory ---")
@@ -484,15 +720,16 @@ def main():
 
     response = agent.invoke(
         [{"role": "user", "content": user_input}],
-        thread_id="memory-demo-1"
+        thread_id="memory-demo-1",
+        user_id=DEMO_USER_ID,
     )
     print(f"Agent: {response['messages'][-1].content}")
 
-    # Update memories based on the conversation
-    agent.update_memories([
-        {"role": "user", "content": user_input},
-        {"role": "assistant", "content": response['messages'][-1].content}
-    ])
+    # Extract memories from the new messages of the thread in the background
+    agent.update_memories_in_background(thread_id="memory-demo-1", user_id=DEMO_USER_ID)
+
+    # Wait for the background extraction to finish before testing recall
+    agent.flush_memories()
 
     # Test memory recall across all types
     print("\n--- Testing Memory Recall ---")
@@ -501,7 +738,8 @@ def main():
 
     response = agent.invoke(
         [{"role": "user", "content": user_input}],
-        thread_id="memory-demo-1"
+        thread_id="memory-demo-1",
+        user_id=DEMO_USER_ID,
     )
     print(f"Agent: {response['messages'][-1].content}")
 
@@ -512,7 +750,8 @@ def main():
 
     response = agent.invoke(
         [{"role": "user", "content": user_input}],
-        thread_id="memory-demo-2"
+        thread_id="memory-demo-2",
+        user_id=DEMO_USER_ID,
     )
     print(f"Agent: {response['messages'][-1].content}")
 
@@ -525,6 +764,19 @@ def main():
     checkpoints = agent.list_checkpoints("memory-demo-1")
     print(f"Found {len(checkpoints)} checkpoints for thread memory-demo-1")
 
+    # Show what the retention policies would remove
+    print("\n--- Memory Retention (dry run) ---")
+    agent.compact_memories(dry_run=True)
+
+    # Show how much of the input was served from the prompt cache
+    print("\n--- Prompt Cache Usage ---")
+    print(agent.cache_usage.stats())
+
+    # Show how the connection pool held up
+    print("\n--- Connection Pool ---")
+    print(format_pool_stats(agent.pool_metrics.stats()))
+
+    agent.close()
     print("\nExample completed.")
 
 if __name__ == "__main__":
@@ -96,10 +96,12 @@ def main():
     print("\n--- Conversation History (Thread: user-456) ---")
     agent.display_conversation_history("user-456")
 
-    # List all checkpoints
+    # List the most recent checkpoints (one page, metadata only)
     print("\n--- Checkpoints ---")
-    checkpoints = agent.list_checkpoints("user-123")
-    print(f"Found {len(checkpoints)} checkpoints for thread user-123")
+    checkpoints = agent.list_checkpoints("user-123", limit=10)
+    print(f"Latest {len(checkpoints)} checkpoints for thread user-123:")
+    for checkpoint in checkpoints:
+        print(f"  {checkpoint.checkpoint_id} step={checkpoint.step} source={checkpoint.source}")
 
     print("\nExample completed.")
 
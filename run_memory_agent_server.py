@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Run script for the memory agent server.
+
+Serves PostgresMemoryAgent over HTTP with uvicorn. Settings not given on the
+command line are read from the SERVER_* environment variables; see
+src/server/app.py. Requests authenticate with "Authorization: Bearer <token>",
+using the tokens from --api-key or SERVER_API_KEYS.
+
+Usage:
+    python run_memory_agent_server.py --port 8000
+    python run_memory_agent_server.py --fake-llm --fake-latency 0.5 --api-key dev-token:alice   # no Bedrock/OpenAI needed
+"""
+
+import argparse
+from dataclasses import replace
+
+import uvicorn
+
+from src.server import ServerSettings, create_app
+from src.server.auth import ApiKeyAuth, parse_api_keys
+from src.utils.env_utils import load_env_vars
+
+
+def main():
+    """
+    Run the memory agent server.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-concurrency", type=int, help="Agent runs executing at once")
+    parser.add_argument("--max-queue", type=int, help="Requests allowed to wait for a run slot")
+    parser.add_argument("--queue-timeout", type=float, help="Seconds a request waits for a run slot")
+    parser.add_argument("--thread-lock-timeout", type=float, help="Seconds a request waits for its thread")
+    parser.add_argument("--executor-workers", type=int, help="Threads for blocking work")
+    parser.add_argument("--fake-llm", action="store_true", help="Use FakeChatModel and fake embeddings")
+    parser.add_argument("--fake-latency", type=float, help="Seconds each fake model call takes")
+    parser.add_argument("--no-warmup", action="store_true", help="Skip the model call at startup")
+    parser.add_argument("--api-key", action="append", metavar="TOKEN:USER_ID",
+                        help="Accept a bearer token for a user; repeatable. Replaces SERVER_API_KEYS")
+    args = parser.parse_args()
+
+    # Load environment variables
+    load_env_vars()
+
+    settings = ServerSettings.from_env()
+    overrides = {
+        "max_concurrency": args.max_concurrency,
+        "max_queue": args.max_queue,
+        "queue_timeout": args.queue_timeout,
+        "thread_lock_timeout": args.thread_lock_timeout,
+        "executor_workers": args.executor_workers,
+        "fake_llm_latency": args.fake_latency,
+    }
+    settings = replace(settings, **{name: value for name, value in overrides.items() if value is not None})
+    if args.fake_llm:
+        settings = replace(settings, fake_llm=True)
+    if args.no_warmup:
+        settings = replace(settings, warmup=False)
+
+    auth = ApiKeyAuth(parse_api_keys(",".join(args.api_key)) if args.api_key else None)
+    if not auth.api_keys:
+        print("Warning: no API keys configured; every thread request will be rejected with 401.")
+
+    # One process: the per-thread locks do not span worker processes
+    uvicorn.run(create_app(settings, authenticate=auth), host=args.host, port=args.port, workers=1)
+
+
+if __name__ == "__main__":
+    main()
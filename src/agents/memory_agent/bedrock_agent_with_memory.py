@@ -13,8 +13,17 @@ from langgraph.store.memory import InMemoryStore
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.prebuilt import create_react_agent
 from langgraph.utils.config import get_store
-from langmem import create_manage_memory_tool, create_search_memory_tool
+from langmem import create_manage_memory_tool
+from src.agents.memory_agent.prompts import MEMORY_AGENT_INSTRUCTIONS
 from src.utils.env_utils import get_env_var
+from src.utils.memory_context import MemoryContextBuilder
+from src.utils.memory_namespaces import config_user_id, in_namespace, namespace_template, run_config, user_namespace
+from src.utils.memory_retrieval import create_user_search_memory_tool
+from src.utils.prompt_cache import PromptCacheUsage, build_cached_prompt, latest_user_text, supports_prompt_caching
+
+
+# Each user's memories live under (*MEMORY_NAMESPACE, user_id)
+MEMORY_NAMESPACE = ("memories",)
 
 
 class BedrockMemoryAgent:
@@ -31,6 +40,8 @@ class BedrockMemoryAgent:
         credentials_profile_name: Optional[str] = None,
         embedding_model: str = "openai:text-embedding-3-small",
         embedding_dims: int = 1536,
+        memory_token_budget: Optional[int] = None,
+        prompt_caching: Optional[bool] = None,
     ):
         """
         Initialize the BedrockMemoryAgent.
@@ -40,6 +51,9 @@ class BedrockMemoryAgent:
             credentials_profile_name: AWS credentials profile name. If None, will use default credentials.
             embedding_model: The embedding model to use for memory storage.
             embedding_dims: The dimensions of the embedding vectors.
+            memory_token_budget: Maximum estimated tokens of memories in the system prompt.
+                If None, will use MEMORY_CONTEXT_TOKENS from environment.
+            prompt_caching: Send Bedrock cache points. If None, enabled when the model supports them.
         """
         # Get model ID from environment if not provided
         if model_id is None:
@@ -57,6 +71,17 @@ class BedrockMemoryAgent:
             }
         )
 
+        # Renders the retrieved memories compactly within a token budget
+        if memory_token_budget is None:
+            memory_token_budget = int(get_env_var("MEMORY_CONTEXT_TOKENS", "1000"))
+        self.context_builder = MemoryContextBuilder(token_budget=memory_token_budget)
+
+        # Cache the static prompt prefix and report cached vs uncached input tokens
+        if prompt_caching is None:
+            prompt_caching = supports_prompt_caching(model_id)
+        self.prompt_caching = prompt_caching
+        self.cache_usage = PromptCacheUsage()
+
         # Initialize Bedrock LLM
         self.llm = ChatBedrockConverse(
             provider="anthropic",
@@ -73,9 +98,9 @@ class BedrockMemoryAgent:
             prompt=self._prompt_function,
             tools=[
                 # Add memory management tool
-                create_manage_memory_tool(namespace=("memories",)),
+                create_manage_memory_tool(namespace=namespace_template(MEMORY_NAMESPACE)),
                 # Add memory search tool
-                create_search_memory_tool(namespace=("memories",)),
+                create_user_search_memory_tool(MEMORY_NAMESPACE),
             ],
             # Provide store for memories
             store=self.store,
@@ -96,56 +121,72 @@ class BedrockMemoryAgent:
         # Get store from configured contextvar
         store = get_store()
 
-        # Search for relevant memories based on the latest message
-        memories = store.search(
-            ("memories",),
-            query=state["messages"][-1].content,
+        # Search for relevant memories based on the latest user message, so
+        # the memories stay the same across the tool-calling steps of a turn
+        # Only the current user's memories
+        namespace = user_namespace(MEMORY_NAMESPACE, config_user_id())
+        items = in_namespace(store.search(namespace, query=latest_user_text(state["messages"])), namespace)
+        memories = self.context_builder.build(items)
+
+        # Static instructions first, then the memories, then the conversation
+        return build_cached_prompt(
+            MEMORY_AGENT_INSTRUCTIONS,
+            f"## Memories\n<memories>\n{memories}\n</memories>",
+            state["messages"],
+            enable_cache=self.prompt_caching,
         )
 
-        # Create system message with memories
-        system_msg = f"""You are a helpful assistant with memory capabilities.
-
-## Memories
-<memories>
-{memories}
-</memories>
-
-You can store important information about the user by using the manage_memory tool.
-You can search for information using the search_memory tool.
-When you learn something important about the user, make sure to store it in your memory.
-"""
-
-        # Return messages with system message first
-        return [{"role": "system", "content": system_msg}, *state["messages"]]
-
-    def invoke(self, messages: List[Dict[str, str]], thread_id: str = "default") -> Dict[str, Any]:
+    def invoke(
+        self,
+        messages: List[Dict[str, str]],
+        thread_id: str = "default",
+        user_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
         """
         Invoke the agent with the given messages.
 
         Args:
             messages: A list of messages to send to the agent.
             thread_id: The ID of the conversation thread.
+            user_id: The user whose memories are read and written. If None, a shared
+                "default" user is used.
 
         Returns:
             The response from the agent.
         """
-        config = {"configurable": {"thread_id": thread_id}}
+        config = run_config(thread_id, user_id, callbacks=[self.cache_usage])
         return self.agent.invoke({"messages": messages}, config=config)
 
-    def stream(self, messages: List[Dict[str, str]], thread_id: str = "default"):
+    def stream(
+        self,
+        messages: List[Dict[str, str]],
+        thread_id: str = "default",
+        user_id: Optional[str] = None,
+    ):
         """
         Stream the agent's response with the given messages.
 
         Args:
             messages: A list of messages to send to the agent.
             thread_id: The ID of the conversation thread.
+            user_id: The user whose memories are read and written. If None, a shared
+                "default" user is used.
 
         Returns:
             A generator yielding chunks of the agent's response.
         """
-        config = {"configurable": {"thread_id": thread_id}}
+        config = run_config(thread_id, user_id, callbacks=[self.cache_usage])
         return self.agent.stream({"messages": messages}, config=config)
 
+    def prompt_cache_stats(self) -> Dict[str, Any]:
+        """
+        Get the prompt cache usage of the model calls made so far.
+
+        Returns:
+            A dictionary of cached vs uncached input tokens and call latencies
+        """
+        return self.cache_usage.stats()
+
 
 # Example usage
 def example_usage():
@@ -156,28 +197,32 @@ def example_usage():
     # First conversation - provide information
     response = agent.invoke(
         [{"role": "user", "content": "My name is John and I prefer dark mode in all applications."}],
-        thread_id="thread-1"
+        thread_id="thread-1",
+        user_id="john",
     )
     print("First response:", response["messages"][-1].content)
 
     # Second conversation - ask about name
     response = agent.invoke(
         [{"role": "user", "content": "What's my name?"}],
-        thread_id="thread-1"
+        thread_id="thread-1",
+        user_id="john",
     )
     print("Second response:", response["messages"][-1].content)
 
     # Third conversation - ask about preferences
     response = agent.invoke(
         [{"role": "user", "content": "What are my display preferences?"}],
-        thread_id="thread-1"
+        thread_id="thread-1",
+        user_id="john",
     )
     print("Third response:", response["messages"][-1].content)
 
     # New thread - test memory persistence across threads
     response = agent.invoke(
         [{"role": "user", "content": "Do you know my name or preferences?"}],
-        thread_id="thread-2"
+        thread_id="thread-2",
+        user_id="john",
     )
     print("New thread response:", response["messages"][-1].content)
 
@@ -0,0 +1,212 @@
+"""
+Paginated access to the checkpoint history of PostgreSQL conversation threads.
+
+PostgresSaver.list() deserializes every channel value and pending write of every
+checkpoint it returns, and the agent used to materialize the whole list, so
+listing a long-running thread loaded thousands of full checkpoints into memory.
+CheckpointHistory reads the checkpoints table directly: history pages carry
+only checkpoint ids, timestamps and metadata, walked newest-first along the
+primary key with a checkpoint_id cursor, and message reads fetch only the
+messages channel blob of a single checkpoint.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from psycopg.rows import dict_row
+
+
+# Checkpoint ids are time-ordered, so ordering by id is ordering by time
+PAGE_SQL = """
+SELECT checkpoint_id, parent_checkpoint_id, checkpoint ->> 'ts' AS ts, metadata
+FROM checkpoints
+WHERE thread_id = %s AND checkpoint_ns = %s
+ORDER BY checkpoint_id DESC
+LIMIT %s
+"""
+
+PAGE_BEFORE_SQL = """
+SELECT checkpoint_id, parent_checkpoint_id, checkpoint ->> 'ts' AS ts, metadata
+FROM checkpoints
+WHERE thread_id = %s AND checkpoint_ns = %s AND checkpoint_id < %s
+ORDER BY checkpoint_id DESC
+LIMIT %s
+"""
+
+COUNT_SQL = """
+SELECT count(*) AS count FROM checkpoints WHERE thread_id = %s AND checkpoint_ns = %s
+"""
+
+# The messages blob of the newest checkpoint, or of one checkpoint when an id is given
+MESSAGES_SQL = """
+SELECT c.checkpoint_id, bl.type, bl.blob
+FROM checkpoints c
+LEFT JOIN checkpoint_blobs bl
+    ON bl.thread_id = c.thread_id
+    AND bl.checkpoint_ns = c.checkpoint_ns
+    AND bl.channel = %s
+    AND bl.version = c.checkpoint -> 'channel_versions' ->> %s
+WHERE c.thread_id = %s AND c.checkpoint_ns = %s {checkpoint_filter}
+ORDER BY c.checkpoint_id DESC
+LIMIT 1
+"""
+
+
+@dataclass
+class CheckpointSummary:
+    """A checkpoint's identity and metadata, without its channel values."""
+
+    checkpoint_id: str
+    parent_checkpoint_id: Optional[str]
+    ts: Optional[str]
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def step(self) -> Optional[int]:
+        """The graph step that wrote the checkpoint."""
+        return self.metadata.get("step")
+
+    @property
+    def source(self) -> Optional[str]:
+        """What wrote the checkpoint: "input", "loop" or "update"."""
+        return self.metadata.get("source")
+
+
+class CheckpointHistory:
+    """
+    Reads checkpoint history and messages without loading full checkpoints.
+    """
+
+    def __init__(self, pool, serde=None):
+        """
+        Initialize the history reader.
+
+        Args:
+            pool: The psycopg connection pool the checkpointer writes to
+            serde: The checkpointer's serializer, used to decode message blobs.
+                If None, LangGraph's default JsonPlusSerializer is used.
+        """
+        if serde is None:
+            from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+            serde = JsonPlusSerializer()
+        self.pool = pool
+        self.serde = serde
+
+    def page(
+        self,
+        thread_id: str,
+        limit: int = 50,
+        before: Optional[str] = None,
+        checkpoint_ns: str = "",
+    ) -> Tuple[List[CheckpointSummary], Optional[str]]:
+        """
+        Get one page of a thread's checkpoints, newest first.
+
+        Args:
+            thread_id: The ID of the conversation thread
+            limit: The maximum number of checkpoints to return
+            before: Only return checkpoints older than this checkpoint ID (the cursor)
+            checkpoint_ns: The checkpoint namespace; "" for the root graph
+
+        Returns:
+            A tuple of (checkpoints, cursor for the next page). The cursor is
+            None when there are no older checkpoints.
+        """
+        with self.pool.connection() as conn, conn.cursor(row_factory=dict_row) as cur:
+            if before is None:
+                cur.execute(PAGE_SQL, (thread_id, checkpoint_ns, limit))
+            else:
+                cur.execute(PAGE_BEFORE_SQL, (thread_id, checkpoint_ns, before, limit))
+            rows = cur.fetchall()
+
+        checkpoints = [
+            CheckpointSummary(
+                checkpoint_id=row["checkpoint_id"],
+                parent_checkpoint_id=row["parent_checkpoint_id"],
+                ts=row["ts"],
+                metadata=row["metadata"] or {},
+            )
+            for row in rows
+        ]
+        cursor = checkpoints[-1].checkpoint_id if len(checkpoints) == limit else None
+        return checkpoints, cursor
+
+    def iter(
+        self,
+        thread_id: str,
+        page_size: int = 100,
+        before: Optional[str] = None,
+        checkpoint_ns: str = "",
+    ) -> Iterator[CheckpointSummary]:
+        """
+        Stream a thread's checkpoints, newest first, one page at a time.
+
+        Args:
+            thread_id: The ID of the conversation thread
+            page_size: The number of checkpoints fetched per query
+            before: Only return checkpoints older than this checkpoint ID
+            checkpoint_ns: The checkpoint namespace; "" for the root graph
+
+        Yields:
+            Checkpoint summaries
+        """
+        while True:
+            checkpoints, before = self.page(thread_id, limit=page_size, before=before, checkpoint_ns=checkpoint_ns)
+            yield from checkpoints
+            if before is None:
+                return
+
+    def count(self, thread_id: str, checkpoint_ns: str = "") -> int:
+        """
+        Count a thread's checkpoints.
+
+        Args:
+            thread_id: The ID of the conversation thread
+            checkpoint_ns: The checkpoint namespace; "" for the root graph
+
+        Returns:
+            The number of checkpoints
+        """
+        with self.pool.connection() as conn, conn.cursor(row_factory=dict_row) as cur:
+            cur.execute(COUNT_SQL, (thread_id, checkpoint_ns))
+            return cur.fetchone()["count"]
+
+    def messages(
+        self,
+        thread_id: str,
+        last_n: Optional[int] = None,
+        checkpoint_id: Optional[str] = None,
+        checkpoint_ns: str = "",
+        channel: str = "messages",
+    ) -> List[Any]:
+        """
+        Read the messages of a thread without loading the rest of its checkpoint.
+
+        Only the messages channel blob of one checkpoint is fetched and
+        decoded; other channels and pending writes are never read.
+
+        Args:
+            thread_id: The ID of the conversation thread
+            last_n: Only return the last N messages. If None, return all of them.
+            checkpoint_id: Read this checkpoint instead of the newest one
+            checkpoint_ns: The checkpoint namespace; "" for the root graph
+            channel: The state channel holding the messages
+
+        Returns:
+            The messages, oldest first; empty if the thread has no checkpoint
+        """
+        checkpoint_filter = "AND c.checkpoint_id = %s" if checkpoint_id is not None else ""
+        params: List[Any] = [channel, channel, thread_id, checkpoint_ns]
+        if checkpoint_id is not None:
+            params.append(checkpoint_id)
+
+        with self.pool.connection() as conn, conn.cursor(binary=True, row_factory=dict_row) as cur:
+            cur.execute(MESSAGES_SQL.format(checkpoint_filter=checkpoint_filter), params)
+            row = cur.fetchone()
+
+        if row is None or row["type"] is None or row["type"] == "empty":
+            return []
+        messages = self.serde.loads_typed((row["type"], row["blob"])) or []
+        if last_n is not None:
+            messages = messages[-last_n:] if last_n > 0 else []
+        return list(messages)
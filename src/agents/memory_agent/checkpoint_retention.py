@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+"""
+Retention and garbage collection for the PostgresSaver checkpoint tables.
+
+Every graph step writes a checkpoint, and nothing used to delete them, so the
+checkpoints, checkpoint_writes and checkpoint_blobs tables grew forever. The
+CheckpointRetention job keeps only the latest K checkpoints of each thread and
+deletes threads that have been inactive for longer than a TTL. Pruning runs
+in small batches, oldest checkpoint first along the primary key, so each
+statement holds its locks only briefly. An expired thread is deleted in one
+transaction that re-checks its inactivity, so a conversation that resumes
+meanwhile is left alone.
+
+Run it once or periodically from the command line:
+
+    python -m src.agents.memory_agent.checkpoint_retention --keep-latest 20 --ttl-days 30 --dry-run
+"""
+
+import argparse
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import AbstractSet, List, Optional, Set, Tuple
+
+from psycopg.rows import dict_row
+
+from src.utils.env_utils import get_env_var, load_env_vars
+
+
+# Deleted in this order, as in prune_thread: readers never find a checkpoint without its blobs
+CHECKPOINT_TABLES = ("checkpoint_writes", "checkpoints", "checkpoint_blobs")
+
+THREADS_SQL = """
+SELECT DISTINCT thread_id FROM checkpoints WHERE thread_id > %s ORDER BY thread_id LIMIT %s
+"""
+
+NAMESPACES_SQL = """
+SELECT DISTINCT checkpoint_ns FROM checkpoints WHERE thread_id = %s
+"""
+
+# The newest checkpoint that falls outside the latest K
+CUTOFF_SQL = """
+SELECT checkpoint_id FROM checkpoints
+WHERE thread_id = %s AND checkpoint_ns = %s
+ORDER BY checkpoint_id DESC
+OFFSET %s LIMIT 1
+"""
+
+OLD_CHECKPOINTS_SQL = """
+SELECT checkpoint_id, checkpoint -> 'channel_versions' AS channel_versions
+FROM checkpoints
+WHERE thread_id = %s AND checkpoint_ns = %s AND checkpoint_id <= %s
+ORDER BY checkpoint_id
+LIMIT %s
+"""
+
+DELETE_WRITES_SQL = """
+DELETE FROM checkpoint_writes
+WHERE thread_id = %s AND checkpoint_ns = %s AND checkpoint_id = ANY(%s)
+"""
+
+DELETE_CHECKPOINTS_SQL = """
+DELETE FROM checkpoints
+WHERE thread_id = %s AND checkpoint_ns = %s AND checkpoint_id = ANY(%s)
+"""
+
+# Blob versions referenced by the deleted checkpoints and by none of the kept ones.
+# Only versions read from deleted checkpoints are considered, so blobs written
+# for a checkpoint that is being saved concurrently are never touched.
+DELETE_BLOBS_SQL = """
+DELETE FROM checkpoint_blobs bl
+USING unnest(%s::text[], %s::text[]) AS d(channel, version)
+WHERE bl.thread_id = %s AND bl.checkpoint_ns = %s
+    AND bl.channel = d.channel AND bl.version = d.version
+    AND NOT EXISTS (
+        SELECT 1 FROM checkpoints c
+        WHERE c.thread_id = bl.thread_id AND c.checkpoint_ns = bl.checkpoint_ns
+            AND c.checkpoint -> 'channel_versions' ->> d.channel = d.version
+    )
+"""
+
+COUNT_OLD_SQL = """
+SELECT
+    (SELECT count(*) FROM checkpoints
+     WHERE thread_id = %(thread_id)s AND checkpoint_ns = %(ns)s AND checkpoint_id <= %(cutoff)s) AS checkpoints,
+    (SELECT count(*) FROM checkpoint_writes
+     WHERE thread_id = %(thread_id)s AND checkpoint_ns = %(ns)s AND checkpoint_id <= %(cutoff)s) AS writes,
+    (SELECT count(*) FROM checkpoint_blobs bl
+     WHERE bl.thread_id = %(thread_id)s AND bl.checkpoint_ns = %(ns)s
+        AND EXISTS (
+            SELECT 1 FROM checkpoints c
+            WHERE c.thread_id = bl.thread_id AND c.checkpoint_ns = bl.checkpoint_ns
+                AND c.checkpoint_id <= %(cutoff)s
+                AND c.checkpoint -> 'channel_versions' ->> bl.channel = bl.version)
+        AND NOT EXISTS (
+            SELECT 1 FROM checkpoints c
+            WHERE c.thread_id = bl.thread_id AND c.checkpoint_ns = bl.checkpoint_ns
+                AND c.checkpoint_id > %(cutoff)s
+                AND c.checkpoint -> 'channel_versions' ->> bl.channel = bl.version)) AS blobs
+"""
+
+# ISO-8601 UTC timestamps compare correctly as text
+LAST_ACTIVITY_SQL = """
+SELECT max(checkpoint ->> 'ts') FROM checkpoints WHERE thread_id = %s
+"""
+
+# Serializes retention runs on a thread and blocks concurrent updates of its checkpoints
+LOCK_THREAD_SQL = (
+    "SELECT pg_advisory_xact_lock(hashtext(%(thread_id)s))",
+    "SELECT 1 FROM checkpoints WHERE thread_id = %(thread_id)s FOR UPDATE",
+)
+
+# True while the thread has no checkpoint newer than the cutoff
+STILL_INACTIVE = """
+NOT EXISTS (
+    SELECT 1 FROM checkpoints c
+    WHERE c.thread_id = %(thread_id)s AND c.checkpoint ->> 'ts' >= %(cutoff)s
+)
+"""
+
+DELETE_THREAD_SQL = {
+    "checkpoint_writes": f"""
+DELETE FROM checkpoint_writes WHERE thread_id = %(thread_id)s AND {STILL_INACTIVE}
+""",
+    "checkpoints": f"""
+DELETE FROM checkpoints WHERE thread_id = %(thread_id)s AND {STILL_INACTIVE}
+""",
+    # Blobs still referenced by a checkpoint, e.g. one saved while the thread was deleted, are kept
+    "checkpoint_blobs": f"""
+DELETE FROM checkpoint_blobs bl
+WHERE bl.thread_id = %(thread_id)s AND {STILL_INACTIVE}
+    AND NOT EXISTS (
+        SELECT 1 FROM checkpoints c
+        WHERE c.thread_id = bl.thread_id AND c.checkpoint_ns = bl.checkpoint_ns
+            AND c.checkpoint -> 'channel_versions' ->> bl.channel = bl.version
+    )
+""",
+}
+
+COUNT_THREAD_SQL = """
+SELECT count(*) AS count FROM {table} WHERE thread_id = %s
+"""
+
+
+@dataclass
+class RetentionStats:
+    """What one retention run deleted, or would delete in a dry run."""
+
+    threads_scanned: int = 0
+    threads_pruned: int = 0
+    threads_expired: int = 0
+    checkpoints_deleted: int = 0
+    writes_deleted: int = 0
+    blobs_deleted: int = 0
+    seconds: float = 0.0
+    dry_run: bool = False
+
+
+class CheckpointRetention:
+    """
+    Prunes old checkpoints and expired threads from the PostgresSaver tables.
+    """
+
+    def __init__(
+        self,
+        pool,
+        keep_latest: Optional[int] = None,
+        thread_ttl_seconds: Optional[float] = None,
+        batch_size: int = 500,
+        pause_seconds: float = 0.0,
+    ):
+        """
+        Initialize the retention job.
+
+        Args:
+            pool: The psycopg connection pool the checkpointer writes to
+            keep_latest: Checkpoints to keep per thread, at least 1. If None, will use
+                CHECKPOINT_KEEP_LATEST from environment (unset keeps all).
+            thread_ttl_seconds: Delete threads without a checkpoint for this long. If None,
+                will use CHECKPOINT_THREAD_TTL_SECONDS from environment (unset keeps all).
+            batch_size: The maximum number of rows deleted per statement
+            pause_seconds: Sleep between batches to leave room for other traffic
+
+        Raises:
+            ValueError: If keep_latest is below 1 or thread_ttl_seconds is not positive
+        """
+        if keep_latest is None:
+            value = get_env_var("CHECKPOINT_KEEP_LATEST")
+            keep_latest = int(value) if value else None
+        if thread_ttl_seconds is None:
+            value = get_env_var("CHECKPOINT_THREAD_TTL_SECONDS")
+            thread_ttl_seconds = float(value) if value else None
+        # keep_latest=0 would delete every checkpoint of every thread
+        if keep_latest is not None and keep_latest < 1:
+            raise ValueError(f"keep_latest must be at least 1, got {keep_latest}")
+        if thread_ttl_seconds is not None and thread_ttl_seconds <= 0:
+            raise ValueError(f"thread_ttl_seconds must be positive, got {thread_ttl_seconds}")
+
+        self.pool = pool
+        self.keep_latest = keep_latest
+        self.thread_ttl_seconds = thread_ttl_seconds
+        self.batch_size = batch_size
+        self.pause_seconds = pause_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run(self, dry_run: bool = False) -> RetentionStats:
+        """
+        Apply the TTL and then the keep-latest limit to every thread.
+
+        Args:
+            dry_run: Count what would be deleted without deleting anything
+
+        Returns:
+            The rows deleted, or that would be deleted
+        """
+        stats = RetentionStats(dry_run=dry_run)
+        start = time.perf_counter()
+        expired: Set[str] = set()
+        if self.thread_ttl_seconds is not None:
+            expired = self.delete_inactive_threads(stats, dry_run=dry_run)
+        if self.keep_latest is not None:
+            # A dry run leaves the expired threads in place; their rows are already counted
+            self.prune_threads(stats, dry_run=dry_run, skip=expired)
+        stats.seconds = time.perf_counter() - start
+        return stats
+
+    def prune_threads(
+        self,
+        stats: RetentionStats,
+        dry_run: bool = False,
+        skip: AbstractSet[str] = frozenset(),
+    ) -> None:
+        """
+        Keep only the latest checkpoints of every thread.
+
+        Args:
+            stats: The stats to add the deleted rows to
+            dry_run: Count what would be deleted without deleting anything
+            skip: IDs of threads to leave alone, such as those already expired
+        """
+        for thread_id in self._threads():
+            if thread_id in skip:
+                continue
+            stats.threads_scanned += 1
+            pruned = False
+            for checkpoint_ns in self._fetch_column(NAMESPACES_SQL, (thread_id,)):
+                deleted = self.prune_thread(thread_id, checkpoint_ns, stats, dry_run=dry_run)
+                pruned = pruned or deleted > 0
+            stats.threads_pruned += int(pruned)
+
+    def prune_thread(
+        self,
+        thread_id: str,
+        checkpoint_ns: str,
+        stats: RetentionStats,
+        dry_run: bool = False,
+    ) -> int:
+        """
+        Delete the checkpoints of one thread namespace beyond the latest K.
+
+        Args:
+            thread_id: The ID of the conversation thread
+            checkpoint_ns: The checkpoint namespace
+            stats: The stats to add the deleted rows to
+            dry_run: Count what would be deleted without deleting anything
+
+        Returns:
+            The number of checkpoints deleted
+        """
+        cutoff = self._fetch_column(CUTOFF_SQL, (thread_id, checkpoint_ns, self.keep_latest))
+        if not cutoff:
+            return 0
+        cutoff = cutoff[0]
+
+        if dry_run:
+            with self.pool.connection() as conn, conn.cursor(row_factory=dict_row) as cur:
+                cur.execute(COUNT_OLD_SQL, {"thread_id": thread_id, "ns": checkpoint_ns, "cutoff": cutoff})
+                row = cur.fetchone()
+            stats.checkpoints_deleted += row["checkpoints"]
+            stats.writes_deleted += row["writes"]
+            stats.blobs_deleted += row["blobs"]
+            return row["checkpoints"]
+
+        deleted = 0
+        while True:
+            with self.pool.connection() as conn, conn.transaction(), conn.cursor(row_factory=dict_row) as cur:
+                cur.execute(OLD_CHECKPOINTS_SQL, (thread_id, checkpoint_ns, cutoff, self.batch_size))
+                rows = cur.fetchall()
+                if not rows:
+                    break
+                checkpoint_ids = [row["checkpoint_id"] for row in rows]
+                versions = {
+                    (channel, str(version))
+                    for row in rows
+                    for channel, version in (row["channel_versions"] or {}).items()
+                }
+
+                cur.execute(DELETE_WRITES_SQL, (thread_id, checkpoint_ns, checkpoint_ids))
+                stats.writes_deleted += cur.rowcount
+                cur.execute(DELETE_CHECKPOINTS_SQL, (thread_id, checkpoint_ns, checkpoint_ids))
+                stats.checkpoints_deleted += cur.rowcount
+                deleted += cur.rowcount
+                if versions:
+                    channels, channel_versions = zip(*versions)
+                    cur.execute(DELETE_BLOBS_SQL, (list(channels), list(channel_versions), thread_id, checkpoint_ns))
+                    stats.blobs_deleted += cur.rowcount
+            if self.pause_seconds:
+                time.sleep(self.pause_seconds)
+        return deleted
+
+    def delete_inactive_threads(self, stats: RetentionStats, dry_run: bool = False) -> Set[str]:
+        """
+        Delete every thread whose newest checkpoint is older than the TTL.
+
+        Args:
+            stats: The stats to add the deleted rows to
+            dry_run: Count what would be deleted without deleting anything
+
+        Returns:
+            The IDs of the threads deleted, or that would be deleted in a dry run
+        """
+        cutoff = (datetime.now(timezone.utc) - timedelta(seconds=self.thread_ttl_seconds)).isoformat()
+        expired: Set[str] = set()
+        for thread_id in self._threads():
+            last_activity = self._fetch_column(LAST_ACTIVITY_SQL, (thread_id,))[0]
+            if last_activity is None or last_activity >= cutoff:
+                continue
+            if self.delete_thread(thread_id, cutoff, stats, dry_run=dry_run):
+                stats.threads_expired += 1
+                expired.add(thread_id)
+            if self.pause_seconds:
+                time.sleep(self.pause_seconds)
+        return expired
+
+    def delete_thread(self, thread_id: str, cutoff: str, stats: RetentionStats, dry_run: bool = False) -> bool:
+        """
+        Delete all writes, checkpoints and blobs of a thread that is still inactive.
+
+        Runs in one transaction holding the thread's lock, and every DELETE re-checks
+        that the thread has no checkpoint at or after the cutoff, so a thread resumed
+        since it was selected is kept.
+
+        Args:
+            thread_id: The ID of the conversation thread
+            cutoff: The ISO-8601 UTC timestamp the thread's newest checkpoint must be older than
+            stats: The stats to add the deleted rows to
+            dry_run: Count what would be deleted without deleting anything
+
+        Returns:
+            Whether the thread was deleted, or would be in a dry run
+        """
+        counters = {
+            "checkpoint_writes": "writes_deleted",
+            "checkpoints": "checkpoints_deleted",
+            "checkpoint_blobs": "blobs_deleted",
+        }
+        if dry_run:
+            for table in CHECKPOINT_TABLES:
+                count = self._fetch_column(COUNT_THREAD_SQL.format(table=table), (thread_id,))[0]
+                setattr(stats, counters[table], getattr(stats, counters[table]) + count)
+            return True
+
+        params = {"thread_id": thread_id, "cutoff": cutoff}
+        counts = {}
+        with self.pool.connection() as conn, conn.transaction(), conn.cursor() as cur:
+            for sql in LOCK_THREAD_SQL:
+                cur.execute(sql, params)
+            for table in CHECKPOINT_TABLES:
+                cur.execute(DELETE_THREAD_SQL[table], params)
+                counts[table] = cur.rowcount
+        for table, count in counts.items():
+            setattr(stats, counters[table], getattr(stats, counters[table]) + count)
+        return counts["checkpoints"] > 0
+
+    def start_background(self, interval_seconds: float = 3600.0) -> None:
+        """
+        Run retention periodically on a daemon thread.
+
+        Args:
+            interval_seconds: The time between runs
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(interval_seconds):
+                try:
+                    print(format_stats(self.run()))
+                except Exception as e:
+                    print(f"Error pruning checkpoints: {str(e)}")
+
+        self._thread = threading.Thread(target=loop, name="checkpoint-retention", daemon=True)
+        self._thread.start()
+
+    def stop_background(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop the background retention thread.
+
+        Args:
+            timeout: How long to wait for a running pass to finish
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def _threads(self):
+        last = ""
+        while True:
+            thread_ids = self._fetch_column(THREADS_SQL, (last, self.batch_size))
+            if not thread_ids:
+                return
+            yield from thread_ids
+            last = thread_ids[-1]
+
+    def _fetch_column(self, sql: str, params: Tuple) -> List:
+        with self.pool.connection() as conn, conn.cursor() as cur:
+            cur.execute(sql, params)
+            return [row[0] for row in cur.fetchall()]
+
+
+def format_stats(stats: RetentionStats) -> str:
+    """
+    Format retention stats as a one-line summary.
+
+    Args:
+        stats: The stats of a retention run
+
+    Returns:
+        A human-readable summary
+    """
+    verb = "would delete" if stats.dry_run else "deleted"
+    return (
+        f"Checkpoint retention {verb} {stats.checkpoints_deleted} checkpoints, {stats.writes_deleted} writes "
+        f"and {stats.blobs_deleted} blobs; {stats.threads_expired} threads expired, "
+        f"{stats.threads_pruned} of {stats.threads_scanned} threads pruned ({stats.seconds:.1f}s)"
+    )
+
+
+def main():
+    """Run checkpoint retention from the command line."""
+    parser = argparse.ArgumentParser(description="Prune old checkpoints from the PostgreSQL checkpointer tables.")
+    parser.add_argument("--keep-latest", type=int, default=None, help="Checkpoints to keep per thread")
+    parser.add_argument("--ttl-days", type=float, default=None, help="Delete threads inactive for this many days")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--pause", type=float, default=0.0, help="Seconds to sleep between batches")
+    parser.add_argument("--interval", type=float, default=None, help="Repeat every N seconds instead of running once")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be deleted")
+    args = parser.parse_args()
+
+    load_env_vars()
+    from src.agents.memory_agent.pool import create_pool
+
+    conninfo = (
+        f"postgresql://{get_env_var('PG_USER')}:{get_env_var('PG_PASSWORD')}@{get_env_var('PG_HOST')}:"
+        f"{get_env_var('PG_PORT', '5432')}/{get_env_var('PG_DB')}"
+    )
+    with create_pool(conninfo, name="checkpoint-retention") as pool:
+        retention = CheckpointRetention(
+            pool,
+            keep_latest=args.keep_latest,
+            thread_ttl_seconds=args.ttl_days * 86400 if args.ttl_days is not None else None,
+            batch_size=args.batch_size,
+            pause_seconds=args.pause,
+        )
+        if retention.keep_latest is None and retention.thread_ttl_seconds is None:
+            parser.error("set --keep-latest and/or --ttl-days (or CHECKPOINT_KEEP_LATEST / CHECKPOINT_THREAD_TTL_SECONDS)")
+
+        while True:
+            print(format_stats(retention.run(dry_run=args.dry_run)))
+            if args.interval is None:
+                break
+            time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
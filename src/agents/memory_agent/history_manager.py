@@ -0,0 +1,230 @@
+"""
+Conversation windowing and rolling summarization for long threads.
+
+The agents used to send the whole checkpointed message history to the model on
+every step, so input tokens and latency grew linearly with the thread. The
+ConversationHistoryManager runs as the ReAct agent's pre_model_hook: it keeps
+the last few turns verbatim within a token cap and folds older turns into a
+rolling summary. The summary and the number of messages it covers are stored
+in the graph state, and therefore in the checkpoint, so each turn only
+summarizes the messages that have just left the window.
+
+History is split at user messages, so an assistant tool call and its tool
+results always belong to the same turn and are kept or summarized together.
+"""
+
+from typing import Any, Dict, List, Sequence, Tuple
+
+from langchain_core.messages import BaseMessage, HumanMessage
+from langchain_core.runnables import RunnableLambda
+from langgraph.prebuilt.chat_agent_executor import AgentState
+from typing_extensions import NotRequired
+
+from src.utils.memory_context import estimate_tokens
+
+
+class HistoryState(AgentState):
+    """Agent state with a rolling summary of the turns outside the window."""
+
+    history_summary: NotRequired[str]
+    summarized_message_count: NotRequired[int]
+
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a user and an assistant.
+
+CURRENT SUMMARY:
+{summary}
+
+NEW MESSAGES:
+{messages}
+
+Update the summary with the new messages. Keep facts about the user, decisions, open questions and
+results of tool calls that later turns may depend on. Drop small talk. Write at most {max_words} words
+of plain prose and return only the updated summary.
+"""
+
+# The summary call runs inside the graph; without this it would inherit the run's
+# callbacks, so its tokens would be streamed to clients and counted in PromptCacheUsage
+SUMMARY_CONFIG = {"callbacks": []}
+
+
+def _message_text(message: BaseMessage) -> str:
+    content = message.content
+    if not isinstance(content, str):
+        content = "".join(
+            block if isinstance(block, str) else block.get("text", "") for block in content
+        )
+    for tool_call in getattr(message, "tool_calls", None) or []:
+        content += f" [called {tool_call['name']}({tool_call['args']})]"
+    return content
+
+
+def split_turns(messages: Sequence[BaseMessage]) -> List[List[BaseMessage]]:
+    """
+    Split a conversation into turns, each starting at a user message.
+
+    Args:
+        messages: The conversation messages
+
+    Returns:
+        The turns, oldest first; messages before the first user message form their own turn
+    """
+    turns: List[List[BaseMessage]] = []
+    for message in messages:
+        if isinstance(message, HumanMessage) or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+class ConversationHistoryManager:
+    """
+    Pre-model hook that windows the conversation and summarizes older turns.
+    """
+
+    def __init__(
+        self,
+        llm,
+        max_tokens: int = 4000,
+        keep_last_turns: int = 4,
+        summary_max_words: int = 300,
+    ):
+        """
+        Initialize the history manager.
+
+        Args:
+            llm: The chat model used to update the summary
+            max_tokens: The maximum estimated tokens of verbatim history sent to the model
+            keep_last_turns: The maximum number of recent turns kept verbatim
+            summary_max_words: The target length of the rolling summary
+        """
+        self.llm = llm
+        self.max_tokens = max_tokens
+        self.keep_last_turns = keep_last_turns
+        self.summary_max_words = summary_max_words
+
+    def __call__(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Choose the messages sent to the model and update the rolling summary.
+
+        Args:
+            state: The current agent state
+
+        Returns:
+            A state update with the windowed llm_input_messages and the summary
+        """
+        messages, summary, summarized, window_start = self._plan(state)
+        if window_start > summarized:
+            try:
+                summary = self.summarize(summary, messages[summarized:window_start])
+                summarized = window_start
+            except Exception as e:
+                print(f"Error summarizing conversation history: {str(e)}")
+        return self._update(messages, summary, summarized)
+
+    async def acall(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Async version of __call__, used as the hook of the async agent.
+
+        Args:
+            state: The current agent state
+
+        Returns:
+            A state update with the windowed llm_input_messages and the summary
+        """
+        messages, summary, summarized, window_start = self._plan(state)
+        if window_start > summarized:
+            try:
+                summary = await self.asummarize(summary, messages[summarized:window_start])
+                summarized = window_start
+            except Exception as e:
+                print(f"Error summarizing conversation history: {str(e)}")
+        return self._update(messages, summary, summarized)
+
+    def as_runnable(self) -> RunnableLambda:
+        """
+        Wrap the hook so async graphs await acall instead of running __call__ in a thread.
+
+        Returns:
+            A runnable usable as the pre_model_hook of sync and async agents
+        """
+        return RunnableLambda(self, afunc=self.acall, name="history_manager")
+
+    def _plan(self, state: Dict[str, Any]) -> Tuple[Sequence[BaseMessage], str, int, int]:
+        messages = state["messages"]
+        summary = state.get("history_summary", "")
+        summarized = state.get("summarized_message_count", 0)
+        if summarized > len(messages):
+            # The history was rewritten; start over
+            summary, summarized = "", 0
+        return messages, summary, summarized, self.window_start(messages)
+
+    @staticmethod
+    def _update(messages: Sequence[BaseMessage], summary: str, summarized: int) -> Dict[str, Any]:
+        return {
+            "llm_input_messages": list(messages[summarized:]),
+            "history_summary": summary,
+            "summarized_message_count": summarized,
+        }
+
+    def window_start(self, messages: Sequence[BaseMessage]) -> int:
+        """
+        Find the index of the first message kept verbatim.
+
+        The most recent turn is always kept; older turns are added while they
+        fit within keep_last_turns and max_tokens.
+
+        Args:
+            messages: The conversation messages
+
+        Returns:
+            The index of the first message of the oldest kept turn
+        """
+        turns = split_turns(messages)
+        start = len(messages)
+        used = 0
+        for count, turn in enumerate(reversed(turns)):
+            cost = sum(estimate_tokens(_message_text(message)) for message in turn)
+            if count > 0 and (count >= self.keep_last_turns or used + cost > self.max_tokens):
+                break
+            used += cost
+            start -= len(turn)
+        return start
+
+    def summarize(self, summary: str, messages: Sequence[BaseMessage]) -> str:
+        """
+        Fold messages that left the window into the running summary.
+
+        Args:
+            summary: The current summary
+            messages: The messages to add to it
+
+        Returns:
+            The updated summary
+        """
+        return _message_text(
+            self.llm.invoke(self._summary_prompt(summary, messages), config=SUMMARY_CONFIG)
+        ).strip()
+
+    async def asummarize(self, summary: str, messages: Sequence[BaseMessage]) -> str:
+        """
+        Async version of summarize.
+
+        Args:
+            summary: The current summary
+            messages: The messages to add to it
+
+        Returns:
+            The updated summary
+        """
+        return _message_text(
+            await self.llm.ainvoke(self._summary_prompt(summary, messages), config=SUMMARY_CONFIG)
+        ).strip()
+
+    def _summary_prompt(self, summary: str, messages: Sequence[BaseMessage]) -> str:
+        lines = [f"{message.type.upper()}: {_message_text(message)}" for message in messages]
+        return SUMMARY_PROMPT.format(
+            summary=summary or "(none yet)",
+            messages="\n".join(lines),
+            max_words=self.summary_max_words,
+        )
@@ -0,0 +1,167 @@
+"""
+Move memories from the old global namespaces into a user's partition.
+
+Before memories were partitioned per user, every agent wrote to one global
+namespace such as ("memories",). The agents now only read (*namespace, user_id),
+so memories left under the global namespace are invisible to every user until
+they are moved. migrate_namespace moves the items stored exactly under the old
+namespace, not under its user partitions, to one user's partition, usually
+that of the "default" user, which runs without a user_id read.
+
+The store_vectors rows reference store(prefix, key) without ON UPDATE CASCADE,
+so a batch copies its store rows to the new prefix, points their embeddings at
+the copies and deletes the originals in one transaction; nothing is
+re-embedded. Items whose key already exists in the user's partition are left
+in place and reported. The store's columns are read from the catalog, since
+older langgraph-checkpoint-postgres releases have no expires_at/ttl_minutes.
+
+Run it once after upgrading, with the agents stopped or not yet writing:
+
+    python -m src.agents.memory_agent.migrate_user_namespaces --user-id default
+"""
+
+import argparse
+from dataclasses import dataclass
+from typing import List, Sequence
+
+from psycopg import sql
+
+from src.utils.env_utils import get_env_var, load_env_vars
+from src.utils.memory_namespaces import DEFAULT_USER_ID, user_namespace
+
+# The global namespaces the agents and the memory types demo used
+LEGACY_NAMESPACES = ("memories", "semantic_memories", "episodic_memories", "procedural_memories")
+
+# The next batch of keys at the old prefix, after the last one moved or skipped
+BATCH_KEYS_SQL = """
+SELECT key FROM store
+WHERE prefix = %(old)s AND key > %(after)s
+ORDER BY key
+LIMIT %(batch_size)s
+FOR UPDATE
+"""
+
+# The columns of the store table the agents' search_path resolves to
+STORE_COLUMNS_SQL = """
+SELECT attname FROM pg_attribute
+WHERE attrelid = 'store'::regclass AND attnum > 0 AND NOT attisdropped
+ORDER BY attnum
+"""
+
+COPY_SQL = """
+INSERT INTO store (prefix, {columns})
+SELECT %(new)s, {columns}
+FROM store
+WHERE prefix = %(old)s AND key = ANY(%(keys)s)
+ON CONFLICT (prefix, key) DO NOTHING
+RETURNING key
+"""
+
+MOVE_VECTORS_SQL = "UPDATE store_vectors SET prefix = %(new)s WHERE prefix = %(old)s AND key = ANY(%(keys)s)"
+
+DELETE_SQL = "DELETE FROM store WHERE prefix = %(old)s AND key = ANY(%(keys)s)"
+
+COUNT_SQL = """
+SELECT count(*) FILTER (WHERE t.key IS NULL), count(t.key)
+FROM store s
+LEFT JOIN store t ON t.prefix = %(new)s AND t.key = s.key
+WHERE s.prefix = %(old)s
+"""
+
+
+def _namespace_text(namespace: Sequence[str]) -> str:
+    # PostgresStore stores a namespace as its labels joined with "."
+    return ".".join(namespace)
+
+
+def _copy_sql(conn) -> sql.Composed:
+    columns: List[str] = [row[0] for row in conn.execute(STORE_COLUMNS_SQL).fetchall() if row[0] != "prefix"]
+    return sql.SQL(COPY_SQL).format(columns=sql.SQL(", ").join(map(sql.Identifier, columns)))
+
+
+@dataclass
+class NamespaceMigration:
+    """The outcome of moving one global namespace into a user's partition."""
+
+    namespace: str
+    target: str
+    moved: int = 0
+    # Items left in place because the user already has an item with the same key
+    conflicts: int = 0
+
+
+def migrate_namespace(
+    pool,
+    namespace: Sequence[str],
+    user_id: str = DEFAULT_USER_ID,
+    batch_size: int = 500,
+    dry_run: bool = False,
+) -> NamespaceMigration:
+    """
+    Move the items stored exactly under a global namespace to a user's partition.
+
+    Args:
+        pool: The psycopg connection pool of the memory store
+        namespace: The old global namespace, e.g. ("memories",)
+        user_id: The user whose partition receives the items
+        batch_size: Items moved per transaction
+        dry_run: Only count the items that would be moved and left in place
+
+    Returns:
+        The number of items moved and left in place
+    """
+    old = _namespace_text(namespace)
+    new = _namespace_text(user_namespace(namespace, user_id))
+    result = NamespaceMigration(namespace=old, target=new)
+    if dry_run:
+        with pool.connection() as conn:
+            result.moved, result.conflicts = conn.execute(COUNT_SQL, {"old": old, "new": new}).fetchone()
+        return result
+
+    with pool.connection() as conn:
+        copy_sql = _copy_sql(conn)
+    after = ""
+    while True:
+        with pool.connection() as conn, conn.transaction():
+            params = {"old": old, "new": new, "after": after, "batch_size": batch_size}
+            keys = [row[0] for row in conn.execute(BATCH_KEYS_SQL, params).fetchall()]
+            if not keys:
+                return result
+            after = keys[-1]
+            copied = [row[0] for row in conn.execute(copy_sql, {**params, "keys": keys}).fetchall()]
+            if copied:
+                conn.execute(MOVE_VECTORS_SQL, {**params, "keys": copied})
+                conn.execute(DELETE_SQL, {**params, "keys": copied})
+            result.moved += len(copied)
+            result.conflicts += len(keys) - len(copied)
+
+
+def main():
+    """Move memories from the global namespaces into a user's partition from the command line."""
+    parser = argparse.ArgumentParser(description="Move memories from the global namespaces into a user's partition.")
+    parser.add_argument("--user-id", default=DEFAULT_USER_ID, help="The user who receives the memories")
+    parser.add_argument("--namespace", action="append",
+                        help=f"A global namespace to move; repeatable (default: {', '.join(LEGACY_NAMESPACES)})")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="Only count the memories that would be moved")
+    args = parser.parse_args()
+
+    load_env_vars()
+    from src.agents.memory_agent.pool import create_pool
+
+    conninfo = (
+        f"postgresql://{get_env_var('PG_USER')}:{get_env_var('PG_PASSWORD')}@{get_env_var('PG_HOST')}:"
+        f"{get_env_var('PG_PORT', '5432')}/{get_env_var('PG_DB')}"
+    )
+    with create_pool(conninfo, name="namespace-migration") as pool:
+        for name in args.namespace or LEGACY_NAMESPACES:
+            result = migrate_namespace(
+                pool, tuple(name.split(".")), args.user_id, batch_size=args.batch_size, dry_run=args.dry_run
+            )
+            verb = "Would move" if args.dry_run else "Moved"
+            print(f"{verb} {result.moved} memories from {result.namespace} to {result.target}"
+                  + (f"; {result.conflicts} left in place, their keys already exist" if result.conflicts else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Skip-if-current schema migrations for the checkpointer and memory store tables.
+
+PostgresSaver.setup() and PostgresStore.setup() run their CREATE TABLE IF NOT
+EXISTS statements and migration checks on every call, so every agent
+construction paid several round trips and took catalog locks, which adds up
+when many workers restart at once. ensure_schema() instead reads the three
+migration version tables in one query and only runs setup() for the parts
+that are behind. Migrations are serialized across processes with an advisory
+lock, so workers starting together against a new database do not race each
+other.
+
+Run the migrations once at deploy time with:
+
+    python -m src.agents.memory_agent.migrations
+
+and start the agents with PG_SCHEMA_MIGRATIONS=skip to not touch the schema at all.
+"""
+
+import argparse
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from psycopg import errors
+
+from src.utils.env_utils import get_env_var, load_env_vars
+
+
+# Arbitrary application-wide key for pg_advisory_lock
+MIGRATION_LOCK_KEY = 7_112_304_551
+
+# How agents handle the schema on construction
+MIGRATION_MODES = ("auto", "always", "skip")
+
+
+@dataclass
+class SchemaStatus:
+    """Applied vs expected migration versions of each component."""
+
+    # None means the component's migration table does not exist yet
+    applied: Dict[str, Optional[int]] = field(default_factory=dict)
+    expected: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def pending(self) -> List[str]:
+        """The components whose schema is behind."""
+        return [
+            name for name, version in self.expected.items()
+            if self.applied.get(name) is None or self.applied[name] < version
+        ]
+
+    @property
+    def up_to_date(self) -> bool:
+        """Whether every component is at its expected version."""
+        return not self.pending
+
+
+def expected_versions(checkpointer, store=None) -> Dict[str, int]:
+    """
+    Get the latest migration version of each component.
+
+    Args:
+        checkpointer: The PostgresSaver (or AsyncPostgresSaver)
+        store: The PostgresStore, if the memory store is used
+
+    Returns:
+        A dictionary of component name to its latest migration version
+    """
+    expected = {"checkpoint": len(checkpointer.MIGRATIONS) - 1}
+    if store is not None:
+        expected["store"] = len(store.MIGRATIONS) - 1
+        if store.index_config:
+            # Vector migrations whose condition does not hold are skipped without
+            # recording a version, so only count the ones that apply to this index
+            applicable = [
+                v for v, migration in enumerate(store.VECTOR_MIGRATIONS)
+                if not migration.condition or migration.condition(store)
+            ]
+            if applicable:
+                expected["vector"] = max(applicable)
+    return expected
+
+
+def _version_sql(components: List[str]) -> str:
+    columns = ", ".join(f"(SELECT max(v) FROM {name}_migrations) AS {name}" for name in components)
+    return f"SELECT {columns}"
+
+
+def schema_status(pool, checkpointer, store=None) -> SchemaStatus:
+    """
+    Read the applied migration versions in a single query.
+
+    Args:
+        pool: The psycopg connection pool the checkpointer and store use
+        checkpointer: The PostgresSaver
+        store: The PostgresStore, if the memory store is used
+
+    Returns:
+        The applied and expected versions
+    """
+    expected = expected_versions(checkpointer, store)
+    with pool.connection() as conn:
+        try:
+            row = conn.execute(_version_sql(list(expected))).fetchone()
+        except errors.UndefinedTable:
+            # A new database; nothing has been migrated yet
+            conn.rollback()
+            return SchemaStatus(applied={name: None for name in expected}, expected=expected)
+    return SchemaStatus(applied=dict(zip(expected, row)), expected=expected)
+
+
+def ensure_schema(pool, checkpointer, store=None, mode: str = "auto") -> bool:
+    """
+    Bring the checkpointer and store tables up to date.
+
+    In "auto" mode an up-to-date database costs one query. Otherwise the
+    outdated components are migrated under an advisory lock, which needs a
+    second pool connection while setup() runs.
+
+    Args:
+        pool: The psycopg connection pool the checkpointer and store use
+        checkpointer: The PostgresSaver
+        store: The PostgresStore, if the memory store is used
+        mode: "auto" to migrate only when behind, "always" to run setup() regardless,
+            or "skip" to not touch the schema (migrations run at deploy time)
+
+    Returns:
+        Whether any setup() ran
+    """
+    if mode not in MIGRATION_MODES:
+        raise ValueError(f"Unknown migration mode {mode!r}; expected one of {MIGRATION_MODES}")
+    if mode == "skip":
+        return False
+    if mode == "auto" and schema_status(pool, checkpointer, store).up_to_date:
+        return False
+
+    with pool.connection() as lock_conn:
+        lock_conn.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_KEY,))
+        try:
+            # Another process may have migrated while we waited for the lock
+            pending = ["checkpoint", "store", "vector"]
+            if mode == "auto":
+                pending = schema_status(pool, checkpointer, store).pending
+            if "checkpoint" in pending:
+                checkpointer.setup()
+            if store is not None and ("store" in pending or "vector" in pending):
+                store.setup()
+            return bool(pending)
+        finally:
+            lock_conn.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_KEY,))
+
+
+def migration_mode(mode: Optional[str] = None) -> str:
+    """
+    Resolve the migration mode for an agent.
+
+    Args:
+        mode: "auto", "always" or "skip". If None, will use PG_SCHEMA_MIGRATIONS from
+            environment (default: "auto").
+
+    Returns:
+        The migration mode
+    """
+    if mode is None:
+        mode = get_env_var("PG_SCHEMA_MIGRATIONS", "auto")
+    return mode.lower()
+
+
+def main():
+    """Check or apply the schema migrations from the command line."""
+    parser = argparse.ArgumentParser(description="Apply the checkpointer and memory store migrations.")
+    parser.add_argument("--check", action="store_true",
+                        help="Only report the versions; exit with status 1 if migrations are pending")
+    parser.add_argument("--embedding-model", default="openai:text-embedding-3-small")
+    parser.add_argument("--embedding-dims", type=int, default=1536)
+    args = parser.parse_args()
+
+    load_env_vars()
+    from langgraph.checkpoint.postgres import PostgresSaver
+    from src.agents.memory_agent.pool import create_pool
+    from src.agents.memory_agent.postgres_store import create_postgres_store
+
+    conninfo = (
+        f"postgresql://{get_env_var('PG_USER')}:{get_env_var('PG_PASSWORD')}@{get_env_var('PG_HOST')}:"
+        f"{get_env_var('PG_PORT', '5432')}/{get_env_var('PG_DB')}"
+    )
+    with create_pool(conninfo, name="schema-migrations") as pool:
+        checkpointer = PostgresSaver(pool)
+        store = create_postgres_store(
+            pool,
+            embedding_model=args.embedding_model,
+            embedding_dims=args.embedding_dims,
+            setup=False,
+        )
+        status = schema_status(pool, checkpointer, store)
+        for name, version in status.expected.items():
+            print(f"{name}: applied {status.applied[name]}, latest {version}")
+        if args.check:
+            raise SystemExit(1 if status.pending else 0)
+
+        start = time.perf_counter()
+        if ensure_schema(pool, checkpointer, store):
+            print(f"Migrated {', '.join(status.pending)} in {time.perf_counter() - start:.2f}s")
+        else:
+            print("Schema is up to date")
+
+
+if __name__ == "__main__":
+    main()
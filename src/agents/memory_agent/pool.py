@@ -0,0 +1,220 @@
+"""
+Configurable, instrumented PostgreSQL connection pools for the memory agents.
+
+The agents used to open ConnectionPool(conninfo, kwargs={"autocommit": True})
+with psycopg_pool's defaults: a fixed pool of four connections, no health check
+and no visibility into how long requests wait for a connection. PoolSettings
+reads the sizing, lifetime, idle and acquire timeouts from the environment,
+connections are checked before they are handed out, and PoolMetrics turns
+psycopg_pool's counters into wait time, utilization and connection churn.
+
+Connections prepare a statement once it has run prepare_threshold times, so the
+checkpointer's hot queries (get_tuple, put, put_writes) are parsed and planned
+once per connection rather than on every call. Set PG_PREPARE_THRESHOLD=none
+when connecting through a transaction-mode PgBouncer, which cannot keep
+prepared statements.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
+
+from src.utils.env_utils import get_env_var
+
+
+@dataclass
+class PoolSettings:
+    """Sizing and timeouts of a PostgreSQL connection pool."""
+
+    min_size: int = 2
+    max_size: int = 10
+    # Seconds before a connection is replaced, and before an idle one above min_size is closed
+    max_lifetime: float = 3600.0
+    max_idle: float = 600.0
+    # Seconds a request waits for a connection before raising PoolTimeout
+    timeout: float = 30.0
+    # Requests allowed to queue for a connection; 0 means unlimited
+    max_waiting: int = 0
+    # Executions before a query is prepared; None disables prepared statements
+    prepare_threshold: Optional[int] = 1
+
+    @classmethod
+    def from_env(cls) -> "PoolSettings":
+        """
+        Read the pool settings from the environment.
+
+        Uses PG_POOL_MIN_SIZE, PG_POOL_MAX_SIZE, PG_POOL_MAX_LIFETIME, PG_POOL_MAX_IDLE,
+        PG_POOL_TIMEOUT, PG_POOL_MAX_WAITING and PG_PREPARE_THRESHOLD; unset
+        variables keep the defaults.
+
+        Returns:
+            The pool settings
+        """
+        defaults = cls()
+        prepare_threshold = get_env_var("PG_PREPARE_THRESHOLD", str(defaults.prepare_threshold))
+        return cls(
+            min_size=int(get_env_var("PG_POOL_MIN_SIZE", str(defaults.min_size))),
+            max_size=int(get_env_var("PG_POOL_MAX_SIZE", str(defaults.max_size))),
+            max_lifetime=float(get_env_var("PG_POOL_MAX_LIFETIME", str(defaults.max_lifetime))),
+            max_idle=float(get_env_var("PG_POOL_MAX_IDLE", str(defaults.max_idle))),
+            timeout=float(get_env_var("PG_POOL_TIMEOUT", str(defaults.timeout))),
+            max_waiting=int(get_env_var("PG_POOL_MAX_WAITING", str(defaults.max_waiting))),
+            prepare_threshold=None if prepare_threshold.lower() == "none" else int(prepare_threshold),
+        )
+
+    def pool_kwargs(self) -> Dict[str, Any]:
+        """
+        Build the keyword arguments shared by ConnectionPool and AsyncConnectionPool.
+
+        Returns:
+            The pool keyword arguments, without conninfo and check
+        """
+        return {
+            # autocommit=True allows CREATE INDEX CONCURRENTLY during setup
+            "kwargs": {"autocommit": True, "prepare_threshold": self.prepare_threshold},
+            "min_size": self.min_size,
+            "max_size": max(self.max_size, self.min_size),
+            "max_lifetime": self.max_lifetime,
+            "max_idle": self.max_idle,
+            "timeout": self.timeout,
+            "max_waiting": self.max_waiting,
+        }
+
+
+def create_pool(
+    conninfo: str,
+    settings: Optional[PoolSettings] = None,
+    name: str = "memory-agent",
+    configure: Optional[Callable] = None,
+) -> ConnectionPool:
+    """
+    Open a connection pool that health-checks connections before handing them out.
+
+    Args:
+        conninfo: The PostgreSQL connection string
+        settings: The pool settings. If None, will use PoolSettings.from_env().
+        name: The pool name, shown in psycopg_pool's logs
+        configure: Called with each new connection before it joins the pool,
+            e.g. postgres_store.configure_vector_search
+
+    Returns:
+        An open ConnectionPool
+    """
+    if settings is None:
+        settings = PoolSettings.from_env()
+    return ConnectionPool(
+        conninfo,
+        check=ConnectionPool.check_connection,
+        configure=configure,
+        name=name,
+        open=True,
+        **settings.pool_kwargs(),
+    )
+
+
+async def create_async_pool(
+    conninfo: str,
+    settings: Optional[PoolSettings] = None,
+    name: str = "memory-agent-async",
+    configure: Optional[Callable] = None,
+) -> AsyncConnectionPool:
+    """
+    Open the async equivalent of create_pool; must be called inside the event loop.
+
+    Args:
+        conninfo: The PostgreSQL connection string
+        settings: The pool settings. If None, will use PoolSettings.from_env().
+        name: The pool name, shown in psycopg_pool's logs
+        configure: An async callable called with each new connection, e.g.
+            postgres_store.aconfigure_vector_search
+
+    Returns:
+        An open AsyncConnectionPool
+    """
+    if settings is None:
+        settings = PoolSettings.from_env()
+    pool = AsyncConnectionPool(
+        conninfo,
+        check=AsyncConnectionPool.check_connection,
+        configure=configure,
+        name=name,
+        open=False,
+        **settings.pool_kwargs(),
+    )
+    await pool.open()
+    return pool
+
+
+class PoolMetrics:
+    """
+    Wait time, utilization and connection churn of a pool since it was created.
+    """
+
+    def __init__(self, pool):
+        """
+        Initialize the metrics for a pool.
+
+        Args:
+            pool: The ConnectionPool or AsyncConnectionPool to report on
+        """
+        self.pool = pool
+        self.started = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the current pool metrics.
+
+        Returns:
+            A dictionary of pool size and utilization gauges, request wait times,
+            timeouts and connections opened, lost or discarded as broken
+        """
+        raw = self.pool.get_stats()
+        size = raw.get("pool_size", 0)
+        available = raw.get("pool_available", 0)
+        max_size = raw.get("pool_max", 0)
+        requests = raw.get("requests_num", 0)
+        queued = raw.get("requests_queued", 0)
+        wait_ms = raw.get("requests_wait_ms", 0)
+        opened = raw.get("connections_num", 0)
+        minutes = max(time.monotonic() - self.started, 1e-9) / 60
+        return {
+            "pool_size": size,
+            "pool_max": max_size,
+            "in_use": size - available,
+            "utilization": (size - available) / max_size if max_size else 0.0,
+            "requests_waiting": raw.get("requests_waiting", 0),
+            "requests": requests,
+            "requests_queued": queued,
+            "mean_wait_ms": wait_ms / requests if requests else 0.0,
+            "mean_queued_wait_ms": wait_ms / queued if queued else 0.0,
+            "request_errors": raw.get("requests_errors", 0),
+            "connections_opened": opened,
+            "connections_lost": raw.get("connections_lost", 0),
+            "connection_errors": raw.get("connections_errors", 0),
+            "returns_bad": raw.get("returns_bad", 0),
+            "mean_connect_ms": raw.get("connections_ms", 0) / opened if opened else 0.0,
+            "connections_opened_per_minute": opened / minutes,
+        }
+
+
+def format_pool_stats(stats: Dict[str, Any]) -> str:
+    """
+    Format pool metrics as one line.
+
+    Args:
+        stats: The result of PoolMetrics.stats()
+
+    Returns:
+        A human-readable summary
+    """
+    return (
+        f"{stats['in_use']}/{stats['pool_size']} connections in use (max {stats['pool_max']}, "
+        f"{stats['utilization']:.0%} utilized), {stats['requests_waiting']} waiting; "
+        f"{stats['requests']} requests, {stats['requests_queued']} queued, "
+        f"mean wait {stats['mean_wait_ms']:.1f} ms, {stats['request_errors']} timed out; "
+        f"{stats['connections_opened']} connections opened "
+        f"({stats['connections_opened_per_minute']:.1f}/min), {stats['connections_lost']} lost, "
+        f"{stats['returns_bad']} returned broken"
+    )
@@ -4,26 +4,56 @@ PostgreSQL Memory Agent: An agent with memory capabilities using AWS Bedrock and
 
 This module implements an agent with memory capabilities using AWS Bedrock as the
 base LLM and LangMem for memory management with PostgreSQL for persistent storage.
+
+invoke/stream run on a blocking connection pool. ainvoke/astream run on an
+AsyncConnectionPool with AsyncPostgresSaver and AsyncPostgresStore, so one
+event loop can serve many conversations while they wait on the model.
 """
 
+import asyncio
 import os
-from typing import Dict, List, Any, Optional
+from typing import AsyncIterator, Dict, Iterator, List, Any, Optional
 from langchain_aws import ChatBedrockConverse
+from langchain_core.language_models import BaseChatModel
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.checkpoint.postgres import PostgresSaver
+from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
 from langgraph.prebuilt import create_react_agent
 from langgraph.utils.config import get_store
-from langmem import create_manage_memory_tool, create_search_memory_tool
+from langmem import create_manage_memory_tool
+from src.agents.memory_agent.checkpoint_history import CheckpointHistory, CheckpointSummary
+from src.agents.memory_agent.checkpoint_retention import CheckpointRetention, RetentionStats
+from src.agents.memory_agent.history_manager import ConversationHistoryManager, HistoryState
+from src.agents.memory_agent.migrations import ensure_schema, migration_mode
+from src.agents.memory_agent.pool import PoolMetrics, PoolSettings, create_async_pool, create_pool
+from src.agents.memory_agent.prompts import MEMORY_AGENT_INSTRUCTIONS
+from src.agents.memory_agent.postgres_store import (
+    aconfigure_vector_search,
+    configure_vector_search,
+    create_async_postgres_store,
+    create_postgres_store,
+)
+from src.utils.memory_context import MemoryContextBuilder
+from src.utils.memory_lifecycle import AccessTracker, CompactionReport, MemoryCompactor, RetentionPolicy
+from src.utils.memory_namespaces import config_user_id, in_namespace, namespace_template, run_config, user_namespace
+from src.utils.memory_retrieval import create_user_search_memory_tool
+from src.utils.prompt_cache import PromptCacheUsage, build_cached_prompt, latest_user_text, supports_prompt_caching
 from src.utils.env_utils import get_env_var, load_env_vars
 
 
+# Each user's memories live under (*MEMORY_NAMESPACE, user_id)
+MEMORY_NAMESPACE = ("memories",)
+
+
 class PostgresMemoryAgent:
     """
     An agent with memory capabilities using AWS Bedrock and LangMem with PostgreSQL storage.
 
     This agent can store and retrieve information across conversations using
     LangMem's memory management tools and AWS Bedrock as the base LLM.
-    The memories are stored in a PostgreSQL database for persistence.
+    Both the conversation checkpoints and the long-term memories are stored in a
+    PostgreSQL database for persistence; memory embeddings live in a pgvector
+    column with an HNSW index.
     """
 
     def __init__(
@@ -37,6 +67,14 @@ class PostgresMemoryAgent:
         pg_user: Optional[str] = None,
         pg_password: Optional[str] = None,
         pg_port: Optional[str] = None,
+        retention_policy: Optional[RetentionPolicy] = None,
+        memory_token_budget: Optional[int] = None,
+        prompt_caching: Optional[bool] = None,
+        history_max_tokens: Optional[int] = None,
+        history_keep_turns: int = 4,
+        llm: Optional[BaseChatModel] = None,
+        pool_settings: Optional[PoolSettings] = None,
+        schema_migrations: Optional[str] = None,
     ):
         """
         Initialize the PostgresMemoryAgent.
@@ -51,6 +89,22 @@ class PostgresMemoryAgent:
             pg_user: PostgreSQL username. If None, will use PG_USER from environment.
             pg_password: PostgreSQL password. If None, will use PG_PASSWORD from environment.
             pg_port: PostgreSQL port. If None, will use PG_PORT from environment.
+            retention_policy: Retention policy applied to each user's memories. If None, will use
+                MEMORY_TTL_SECONDS and MEMORY_MAX_ITEMS from environment (unset means keep forever).
+            memory_token_budget: Maximum estimated tokens of memories in the system prompt.
+                If None, will use MEMORY_CONTEXT_TOKENS from environment.
+            prompt_caching: Send Bedrock cache points. If None, enabled when the model supports them.
+            history_max_tokens: Maximum estimated tokens of verbatim conversation history sent to the
+                model; older turns are summarized. If None, will use HISTORY_MAX_TOKENS from environment
+                (unset sends the full history).
+            history_keep_turns: Maximum number of recent turns kept verbatim when windowing is enabled.
+            llm: Chat model to use instead of Bedrock, e.g. a FakeChatModel for load tests.
+                If None, a ChatBedrockConverse model is created from model_id.
+            pool_settings: Sizing and timeouts of the sync and async connection pools.
+                If None, will use the PG_POOL_* variables from environment.
+            schema_migrations: "auto" to migrate the tables only when their version is behind,
+                "always" to run setup() on every construction, or "skip" when migrations run at
+                deploy time. If None, will use PG_SCHEMA_MIGRATIONS from environment (default: "auto").
         """
         # Load environment variables
         load_env_vars()
@@ -77,46 +131,167 @@ class PostgresMemoryAgent:
 
         # Construct PostgreSQL connection string
         postgres_connection_string = f"postgresql://{pg_user}:{pg_password}@{pg_host}:{pg_port}/{pg_db}"
+        # Kept for the async pool, which is opened on first use inside the event loop
+        self.postgres_connection_string = postgres_connection_string
+        self.embedding_model = embedding_model
+        self.embedding_dims = embedding_dims
+        if pool_settings is None:
+            pool_settings = PoolSettings.from_env()
+        self.pool_settings = pool_settings
 
         # Initialize PostgreSQL checkpointer
         print(f"Initializing PostgreSQL checkpointer at {pg_host}...")
         # Create a connection pool to keep the connection alive
         try:
             print("Creating PostgreSQL connection...")
-            from psycopg_pool import ConnectionPool
             # Store the pool as an instance variable to keep it alive
-            # Set autocommit=True to allow CREATE INDEX CONCURRENTLY
-            self.pool = ConnectionPool(postgres_connection_string, kwargs={"autocommit": True})
+            self.pool = create_pool(
+                postgres_connection_string, self.pool_settings, configure=configure_vector_search
+            )
+            self.pool_metrics = PoolMetrics(self.pool)
             # Create the checkpointer using the pool
             self.checkpointer = PostgresSaver(self.pool)
-            # Setup the checkpointer to create the necessary tables
-            print("Setting up PostgreSQL tables...")
-            self.checkpointer.setup()
+            # Create the long-term memory store on the same pool
+            self.store = create_postgres_store(
+                self.pool,
+                embedding_model=embedding_model,
+                embedding_dims=embedding_dims,
+                setup=False,
+            )
+            # Create or migrate the tables; a current schema costs one version query
+            if ensure_schema(self.pool, self.checkpointer, self.store, mode=migration_mode(schema_migrations)):
+                print("PostgreSQL tables set up")
+            # Reads checkpoint history and messages without loading full checkpoints
+            self.history = CheckpointHistory(self.pool, serde=self.checkpointer.serde)
+            # Prunes old checkpoints per CHECKPOINT_KEEP_LATEST / CHECKPOINT_THREAD_TTL_SECONDS
+            self.checkpoint_retention = CheckpointRetention(self.pool)
             print("PostgreSQL connection and tables created successfully")
         except Exception as e:
             print(f"Error creating PostgreSQL connection: {str(e)}")
             raise
 
-        # Initialize Bedrock LLM
-        self.llm = ChatBedrockConverse(
-            model=model_id,
-            credentials_profile_name=credentials_profile_name,
+        # Retention for long-term memories; compact_memories() applies it
+        if retention_policy is None:
+            ttl_seconds = get_env_var("MEMORY_TTL_SECONDS")
+            max_items = get_env_var("MEMORY_MAX_ITEMS")
+            retention_policy = RetentionPolicy(
+                ttl_seconds=float(ttl_seconds) if ttl_seconds else None,
+                max_items=int(max_items) if max_items else None,
+            )
+        self.access_tracker = AccessTracker()
+        self.compactor = MemoryCompactor(
+            self.store,
+            {MEMORY_NAMESPACE: retention_policy},
+            access_tracker=self.access_tracker,
         )
 
+        # Renders the retrieved memories compactly within a token budget
+        if memory_token_budget is None:
+            memory_token_budget = int(get_env_var("MEMORY_CONTEXT_TOKENS", "1000"))
+        self.context_builder = MemoryContextBuilder(token_budget=memory_token_budget)
+
+        # Cache the static prompt prefix and report cached vs uncached input tokens
+        if prompt_caching is None:
+            prompt_caching = supports_prompt_caching(model_id)
+        self.prompt_caching = prompt_caching
+        self.cache_usage = PromptCacheUsage()
+
+        # Initialize Bedrock LLM
+        if llm is None:
+            llm = ChatBedrockConverse(
+                model=model_id,
+                credentials_profile_name=credentials_profile_name,
+            )
+        self.llm = llm
+
+        # Window long conversations and summarize older turns into the checkpoint
+        if history_max_tokens is None:
+            value = get_env_var("HISTORY_MAX_TOKENS")
+            history_max_tokens = int(value) if value else None
+        self.history_manager = None
+        if history_max_tokens is not None:
+            self.history_manager = ConversationHistoryManager(
+                self.llm,
+                max_tokens=history_max_tokens,
+                keep_last_turns=history_keep_turns,
+            )
+
         # Create agent with memory capabilities
-        self.agent = create_react_agent(
+        self.agent = self._create_agent(self.checkpointer, self.store, self._prompt_function)
+
+        # The async agent and its pool are created by the first ainvoke/astream
+        self.async_pool = None
+        self.async_pool_metrics = None
+        self.async_checkpointer = None
+        self.async_store = None
+        self.async_agent = None
+        self._async_init_lock = asyncio.Lock()
+
+    def _create_agent(self, checkpointer, store, prompt):
+        """
+        Create the ReAct agent on the given checkpointer and store.
+
+        Args:
+            checkpointer: The sync or async Postgres checkpointer
+            store: The sync or async Postgres store
+            prompt: The sync or async prompt function
+
+        Returns:
+            The compiled agent graph
+        """
+        return create_react_agent(
             self.llm,
-            prompt=self._prompt_function,
+            prompt=prompt,
             tools=[
                 # Add memory management tool
-                create_manage_memory_tool(namespace=("memories",)),
+                create_manage_memory_tool(namespace=namespace_template(MEMORY_NAMESPACE)),
                 # Add memory search tool
-                create_search_memory_tool(namespace=("memories",)),
+                create_user_search_memory_tool(MEMORY_NAMESPACE),
             ],
+            # Provide store for memories
+            store=store,
             # Provide checkpointer for conversation history
-            checkpointer=self.checkpointer,
+            checkpointer=checkpointer,
+            # Trim the history sent to the model, keeping the summary in the checkpoint
+            pre_model_hook=self.history_manager.as_runnable() if self.history_manager is not None else None,
+            state_schema=HistoryState if self.history_manager is not None else None,
         )
 
+    async def _ensure_async_agent(self):
+        """
+        Open the async pool and create the async agent on first use.
+
+        The tables were already set up by __init__, so no migrations run here.
+
+        Returns:
+            The async agent
+        """
+        if self.async_agent is not None:
+            return self.async_agent
+        async with self._async_init_lock:
+            if self.async_agent is None:
+                pool = await create_async_pool(
+                    self.postgres_connection_string, self.pool_settings, configure=aconfigure_vector_search
+                )
+                try:
+                    self.async_checkpointer = AsyncPostgresSaver(pool)
+                    self.async_store = await create_async_postgres_store(
+                        pool,
+                        embedding_model=self.embedding_model,
+                        embedding_dims=self.embedding_dims,
+                        setup=False,
+                    )
+                except Exception as e:
+                    print(f"Error creating async PostgreSQL connection: {str(e)}")
+                    await pool.close()
+                    raise
+                self.async_pool = pool
+                self.async_pool_metrics = PoolMetrics(pool)
+                self.async_agent = self._create_agent(
+                    self.async_checkpointer, self.async_store, self._aprompt_function
+                )
+        return self.async_agent
+
     def _prompt_function(self, state: Dict[str, Any]) -> List[Dict[str, str]]:
         """
         Prepare the messages for the LLM with relevant memories.
@@ -130,62 +305,234 @@ class PostgresMemoryAgent:
         # Get store from configured contextvar
         store = get_store()
 
-        # Search for relevant memories based on the latest message
-        memories = ""
+        # Search for relevant memories based on the latest user message, so
+        # the memories stay the same across the tool-calling steps of a turn
+        items = []
         if store is not None:
             try:
-                memories = store.search(
-                    ("memories",),
-                    query=state["messages"][-1].content,
+                # Only the current user's memories
+                namespace = user_namespace(MEMORY_NAMESPACE, config_user_id())
+                items = in_namespace(
+                    store.search(namespace, query=latest_user_text(state["messages"])), namespace
                 )
             except Exception as e:
                 print(f"Error searching memories: {str(e)}")
                 # Continue with empty memories
 
-        # Create system message with memories
-        system_msg = f"""You are a helpful assistant with memory capabilities.
+        return self._build_prompt(state, items)
 
-## Memories
-<memories>
-{memories}
-</memories>
+    async def _aprompt_function(self, state: Dict[str, Any]) -> List[Dict[str, str]]:
+        """
+        Async version of _prompt_function, used by ainvoke and astream.
 
-You can store important information about the user by using the manage_memory tool.
-You can search for information using the search_memory tool.
-When you learn something important about the user, make sure to store it in your memory.
-"""
+        Args:
+            state: The current state of the conversation.
 
-        # Return messages with system message first
-        return [{"role": "system", "content": system_msg}, *state["messages"]]
+        Returns:
+            A list of messages with the system message containing memories.
+        """
+        store = get_store()
 
-    def invoke(self, messages: List[Dict[str, str]], thread_id: str = "default") -> Dict[str, Any]:
+        items = []
+        if store is not None:
+            try:
+                namespace = user_namespace(MEMORY_NAMESPACE, config_user_id())
+                items = in_namespace(
+                    await store.asearch(namespace, query=latest_user_text(state["messages"])), namespace
+                )
+            except Exception as e:
+                print(f"Error searching memories: {str(e)}")
+
+        return self._build_prompt(state, items)
+
+    def _build_prompt(self, state: Dict[str, Any], items: List[Any]) -> List[Dict[str, str]]:
+        """
+        Render the retrieved memories and the conversation into the model input.
+
+        Args:
+            state: The current state of the conversation.
+            items: The memories retrieved for the latest user message.
+
+        Returns:
+            A list of messages with the system message containing memories.
+        """
+        self.access_tracker.record(items)
+        memories = self.context_builder.build(items)
+
+        volatile = f"## Memories\n<memories>\n{memories}\n</memories>"
+        # With windowing, state["messages"] holds only the recent turns
+        summary = state.get("history_summary")
+        if summary:
+            volatile += f"\n\n## Earlier Conversation\n<conversation_summary>\n{summary}\n</conversation_summary>"
+
+        # Static instructions first, then the memories, then the conversation
+        return build_cached_prompt(
+            MEMORY_AGENT_INSTRUCTIONS,
+            volatile,
+            state["messages"],
+            enable_cache=self.prompt_caching,
+        )
+
+    def invoke(
+        self,
+        messages: List[Dict[str, str]],
+        thread_id: str = "default",
+        user_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
         """
         Invoke the agent with the given messages.
 
         Args:
             messages: A list of messages to send to the agent.
             thread_id: The ID of the conversation thread.
+            user_id: The user whose memories are read and written. If None, a shared
+                "default" user is used.
 
         Returns:
             The response from the agent.
         """
-        config = {"configurable": {"thread_id": thread_id}}
+        config = run_config(thread_id, user_id, callbacks=[self.cache_usage])
         return self.agent.invoke({"messages": messages}, config=config)
 
-    def stream(self, messages: List[Dict[str, str]], thread_id: str = "default"):
+    def stream(
+        self,
+        messages: List[Dict[str, str]],
+        thread_id: str = "default",
+        user_id: Optional[str] = None,
+    ):
         """
         Stream the agent's response with the given messages.
 
         Args:
             messages: A list of messages to send to the agent.
             thread_id: The ID of the conversation thread.
+            user_id: The user whose memories are read and written. If None, a shared
+                "default" user is used.
 
         Returns:
             A generator yielding chunks of the agent's response.
         """
-        config = {"configurable": {"thread_id": thread_id}}
+        config = run_config(thread_id, user_id, callbacks=[self.cache_usage])
         return self.agent.stream({"messages": messages}, config=config)
 
+    async def ainvoke(
+        self,
+        messages: List[Dict[str, str]],
+        thread_id: str = "default",
+        user_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Invoke the agent asynchronously with the given messages.
+
+        Runs on the async pool, checkpointer and store, so the event loop is
+        free while the model call is in flight.
+
+        Args:
+            messages: A list of messages to send to the agent.
+            thread_id: The ID of the conversation thread.
+            user_id: The user whose memories are read and written. If None, a shared
+                "default" user is used.
+
+        Returns:
+            The response from the agent.
+        """
+        agent = await self._ensure_async_agent()
+        config = run_config(thread_id, user_id, callbacks=[self.cache_usage])
+        return await agent.ainvoke({"messages": messages}, config=config)
+
+    async def astream(
+        self,
+        messages: List[Dict[str, str]],
+        thread_id: str = "default",
+        user_id: Optional[str] = None,
+        stream_mode: Optional[str] = None,
+    ) -> AsyncIterator[Any]:
+        """
+        Stream the agent's response asynchronously with the given messages.
+
+        Args:
+            messages: A list of messages to send to the agent.
+            thread_id: The ID of the conversation thread.
+            user_id: The user whose memories are read and written. If None, a shared
+                "default" user is used.
+            stream_mode: The LangGraph stream mode, e.g. "messages" for model tokens.
+                If None, the graph's default ("values") is used.
+
+        Yields:
+            Chunks of the agent's response.
+        """
+        agent = await self._ensure_async_agent()
+        config = run_config(thread_id, user_id, callbacks=[self.cache_usage])
+        async for chunk in agent.astream({"messages": messages}, config=config, stream_mode=stream_mode):
+            yield chunk
+
+    async def aopen(self):
+        """
+        Open the async pool and create the async agent now rather than on the first request.
+        """
+        await self._ensure_async_agent()
+
+    async def aclose(self):
+        """
+        Close the async connection pool, if ainvoke/astream opened one.
+        """
+        async with self._async_init_lock:
+            if self.async_pool is not None:
+                await self.async_pool.close()
+            self.async_pool = None
+            self.async_pool_metrics = None
+            self.async_checkpointer = None
+            self.async_store = None
+            self.async_agent = None
+
+    def prompt_cache_stats(self) -> Dict[str, Any]:
+        """
+        Get the prompt cache usage of the model calls made so far.
+
+        Returns:
+            A dictionary of cached vs uncached input tokens and call latencies
+        """
+        return self.cache_usage.stats()
+
+    def pool_stats(self) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Get the connection pool metrics.
+
+        Returns:
+            Wait time, utilization and churn of the "sync" pool and of the "async"
+            pool (None until ainvoke/astream has opened it)
+        """
+        return {
+            "sync": self.pool_metrics.stats(),
+            "async": self.async_pool_metrics.stats() if self.async_pool_metrics is not None else None,
+        }
+
+    def compact_memories(self, dry_run=False) -> List[CompactionReport]:
+        """
+        Apply the retention policy to the stored memories.
+
+        Args:
+            dry_run: Report what would be deleted without deleting anything
+
+        Returns:
+            A compaction report per namespace
+        """
+        return self.compactor.run(dry_run=dry_run)
+
+    def prune_checkpoints(self, dry_run=False) -> RetentionStats:
+        """
+        Delete checkpoints beyond the retention limits.
+
+        Use self.checkpoint_retention.start_background() to prune periodically instead.
+
+        Args:
+            dry_run: Count what would be deleted without deleting anything
+
+        Returns:
+            The number of checkpoints, writes and blobs deleted
+        """
+        return self.checkpoint_retention.run(dry_run=dry_run)
+
     def get_checkpoint(self, thread_id="default"):
         """
         Get the checkpoint for a specific thread.
@@ -199,33 +546,68 @@ When you learn something important about the user, make sure to store it in your
         config = {"configurable": {"thread_id": thread_id}}
         return self.checkpointer.get(config)
 
-    def list_checkpoints(self, thread_id="default"):
+    def list_checkpoints(
+        self,
+        thread_id="default",
+        limit: int = 50,
+        before: Optional[str] = None,
+    ) -> List[CheckpointSummary]:
         """
-        List all checkpoints for a specific thread.
+        List one page of checkpoints for a specific thread, newest first.
+
+        Only checkpoint ids, timestamps and metadata are loaded.
 
         Args:
             thread_id: The ID of the conversation thread
+            limit: The maximum number of checkpoints to return
+            before: Only list checkpoints older than this checkpoint ID; pass the
+                last checkpoint_id of the previous page to get the next page
 
         Returns:
-            A list of checkpoint tuples
+            A list of checkpoint summaries
         """
-        config = {"configurable": {"thread_id": thread_id}}
-        return list(self.checkpointer.list(config))
+        checkpoints, _ = self.history.page(thread_id, limit=limit, before=before)
+        return checkpoints
 
-    def display_conversation_history(self, thread_id="default"):
+    def iter_checkpoints(self, thread_id="default", page_size: int = 100) -> Iterator[CheckpointSummary]:
+        """
+        Stream all checkpoints for a specific thread, newest first, one page at a time.
+
+        Args:
+            thread_id: The ID of the conversation thread
+            page_size: The number of checkpoints fetched per query
+
+        Returns:
+            A generator of checkpoint summaries
+        """
+        return self.history.iter(thread_id, page_size=page_size)
+
+    def get_recent_messages(self, thread_id="default", last_n: Optional[int] = 10) -> List[Any]:
+        """
+        Get the last messages of a specific thread.
+
+        Args:
+            thread_id: The ID of the conversation thread
+            last_n: The number of messages to return. If None, return all of them.
+
+        Returns:
+            The messages, oldest first
+        """
+        return self.history.messages(thread_id, last_n=last_n)
+
+    def display_conversation_history(self, thread_id="default", last_n: Optional[int] = None):
         """
         Display the conversation history for a specific thread.
 
         Args:
             thread_id: The ID of the conversation thread
+            last_n: Only display the last N messages. If None, display all of them.
         """
-        checkpoint = self.get_checkpoint(thread_id)
-        if not checkpoint:
+        messages = self.get_recent_messages(thread_id, last_n=last_n)
+        if not messages:
             print(f"No conversation history found for thread {thread_id}")
             return
 
-        messages = checkpoint.get("channel_values", {}).get("messages", [])
-
         print(f"=== Conversation History (Thread: {thread_id}) ===")
         print(f"Total messages: {len(messages)}")
         print("=" * 50)
@@ -248,28 +630,32 @@ def example_usage():
     # First conversation - provide information
     response = agent.invoke(
         [{"role": "user", "content": "My name is John and I prefer dark mode in all applications."}],
-        thread_id="thread-1"
+        thread_id="thread-1",
+        user_id="john",
     )
     print("First response:", response["messages"][-1].content)
 
     # Second conversation - ask about name
     response = agent.invoke(
         [{"role": "user", "content": "What's my name?"}],
-        thread_id="thread-1"
+        thread_id="thread-1",
+        user_id="john",
     )
     print("Second response:", response["messages"][-1].content)
 
     # Third conversation - ask about preferences
     response = agent.invoke(
         [{"role": "user", "content": "What are my display preferences?"}],
-        thread_id="thread-1"
+        thread_id="thread-1",
+        user_id="john",
     )
     print("Third response:", response["messages"][-1].content)
 
-    # New thread - test memory persistence across threads
+    # New thread - test memory persistence across threads for the same user
     response = agent.invoke(
         [{"role": "user", "content": "Do you know my name or preferences?"}],
-        thread_id="thread-2"
+        thread_id="thread-2",
+        user_id="john",
     )
     print("New thread response:", response["messages"][-1].content)
 
@@ -284,6 +670,8 @@ def example_usage():
     print("\nCheckpoints for Thread 1:")
     checkpoints = agent.list_checkpoints("thread-1")
     print(f"Found {len(checkpoints)} checkpoints")
+    for checkpoint in checkpoints[:5]:
+        print(f"  {checkpoint.checkpoint_id} step={checkpoint.step} source={checkpoint.source} at {checkpoint.ts}")
 
 
 if __name__ == "__main__":
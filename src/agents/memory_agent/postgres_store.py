@@ -0,0 +1,203 @@
+"""
+PostgreSQL-backed long-term memory store for the memory agents.
+
+This module builds a LangGraph PostgresStore on top of an existing connection
+pool. Memory values are stored as JSONB and their embeddings are kept in a
+pgvector column indexed with HNSW, so semantic search stays fast as the number
+of memories grows and memories survive process restarts.
+
+create_async_postgres_store builds the AsyncPostgresStore equivalent on an
+AsyncConnectionPool for the agent's ainvoke/astream.
+
+Searches are scoped to a namespace prefix. When the planner answers one with
+the HNSW index, pgvector filters the prefix after the nearest-neighbour scan,
+which finds at most hnsw.ef_search candidates (40 by default), so a user whose
+memories are a small share of the table gets few results or none. Pools opened
+with configure=configure_vector_search set hnsw.iterative_scan, which makes
+pgvector 0.8+ keep scanning the index until the filtered query has its rows.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+from langgraph.store.base.embed import ensure_embeddings
+from langgraph.store.postgres import AsyncPostgresStore, PostgresStore
+from src.models.langchain_embeddings import DeduplicatingEmbeddings
+from src.utils.env_utils import get_env_var
+
+# The first pgvector release with hnsw.iterative_scan
+ITERATIVE_SCAN_VERSION = (0, 8)
+ITERATIVE_SCAN_MODES = ("strict_order", "relaxed_order", "off")
+
+# The pgvector library the server loads; the extension may not be created yet
+PGVECTOR_VERSION_SQL = "SELECT default_version FROM pg_available_extensions WHERE name = 'vector'"
+
+_warned_no_iterative_scan = False
+
+
+def _version_tuple(version: Optional[str]) -> Tuple[int, ...]:
+    return tuple(int(part) for part in version.split(".") if part.isdigit()) if version else ()
+
+
+def _vector_search_settings(pgvector_version: Optional[str]) -> List[str]:
+    """
+    Build the SET statements for scoped vector searches on one connection.
+
+    Args:
+        pgvector_version: The pgvector version available on the server, or None
+
+    Returns:
+        The statements to run; empty if the server's pgvector has no iterative scans
+    """
+    global _warned_no_iterative_scan
+    mode = get_env_var("PG_STORE_HNSW_ITERATIVE_SCAN", "strict_order").lower()
+    if mode not in ITERATIVE_SCAN_MODES:
+        raise ValueError(f"Unknown PG_STORE_HNSW_ITERATIVE_SCAN {mode!r}; expected one of {ITERATIVE_SCAN_MODES}")
+    if pgvector_version is None or mode == "off":
+        return []
+    if _version_tuple(pgvector_version) < ITERATIVE_SCAN_VERSION:
+        if not _warned_no_iterative_scan:
+            _warned_no_iterative_scan = True
+            print(f"Warning: pgvector {pgvector_version} has no hnsw.iterative_scan; per-user memory "
+                  f"searches answered by the HNSW index may miss results. Upgrade to pgvector 0.8 or later.")
+        return []
+    return [f"SET hnsw.iterative_scan = {mode}"]
+
+
+def configure_vector_search(conn) -> None:
+    """
+    Enable iterative HNSW scans on a new pool connection.
+
+    Pass it as create_pool(configure=...) for pools the store searches on.
+    Uses PG_STORE_HNSW_ITERATIVE_SCAN from environment (default: strict_order;
+    "off" to disable).
+
+    Args:
+        conn: The psycopg connection, in autocommit mode
+    """
+    row = conn.execute(PGVECTOR_VERSION_SQL).fetchone()
+    for statement in _vector_search_settings(row[0] if row else None):
+        conn.execute(statement)
+
+
+async def aconfigure_vector_search(conn) -> None:
+    """
+    Async version of configure_vector_search, for create_async_pool(configure=...).
+
+    Args:
+        conn: The psycopg async connection, in autocommit mode
+    """
+    row = await (await conn.execute(PGVECTOR_VERSION_SQL)).fetchone()
+    for statement in _vector_search_settings(row[0] if row else None):
+        await conn.execute(statement)
+
+
+def _index_config(
+    embedding_model: str,
+    embedding_dims: int,
+    index_fields: Optional[List[str]],
+    hnsw_m: Optional[int],
+    hnsw_ef_construction: Optional[int],
+) -> Dict[str, Any]:
+    """
+    Build the pgvector index configuration shared by the sync and async stores.
+
+    Args:
+        embedding_model: The embedding model used to index memories.
+        embedding_dims: The dimensions of the embedding vectors.
+        index_fields: JSON paths of the memory value to embed. If None, the whole value is embedded.
+        hnsw_m: HNSW graph degree. If None, will use PG_STORE_HNSW_M from environment.
+        hnsw_ef_construction: HNSW build-time candidate list size. If None, will use
+            PG_STORE_HNSW_EF_CONSTRUCTION from environment.
+
+    Returns:
+        The index configuration for PostgresStore / AsyncPostgresStore.
+    """
+    if hnsw_m is None:
+        hnsw_m = int(get_env_var("PG_STORE_HNSW_M", "16"))
+    if hnsw_ef_construction is None:
+        hnsw_ef_construction = int(get_env_var("PG_STORE_HNSW_EF_CONSTRUCTION", "64"))
+
+    index = {
+        "dims": embedding_dims,
+        # Batched searches for the same query then embed it only once
+        "embed": DeduplicatingEmbeddings(ensure_embeddings(embedding_model)),
+        "distance_type": "cosine",
+        "ann_index_config": {
+            "kind": "hnsw",
+            "m": hnsw_m,
+            "ef_construction": hnsw_ef_construction,
+        },
+    }
+    if index_fields is not None:
+        index["fields"] = index_fields
+    return index
+
+
+def create_postgres_store(
+    pool,
+    embedding_model: str = "openai:text-embedding-3-small",
+    embedding_dims: int = 1536,
+    index_fields: Optional[List[str]] = None,
+    hnsw_m: Optional[int] = None,
+    hnsw_ef_construction: Optional[int] = None,
+    setup: bool = True,
+) -> PostgresStore:
+    """
+    Create a pgvector-backed memory store that reuses an existing connection pool.
+
+    Args:
+        pool: The psycopg ConnectionPool (or connection) to run queries on.
+        embedding_model: The embedding model used to index memories.
+        embedding_dims: The dimensions of the embedding vectors.
+        index_fields: JSON paths of the memory value to embed. If None, the whole value is embedded.
+        hnsw_m: HNSW graph degree. If None, will use PG_STORE_HNSW_M from environment.
+        hnsw_ef_construction: HNSW build-time candidate list size. If None, will use
+            PG_STORE_HNSW_EF_CONSTRUCTION from environment.
+        setup: Whether to create the store tables and vector index.
+
+    Returns:
+        A PostgresStore ready to be passed to create_react_agent.
+    """
+    index = _index_config(embedding_model, embedding_dims, index_fields, hnsw_m, hnsw_ef_construction)
+    store = PostgresStore(pool, index=index)
+
+    if setup:
+        # Creates the store tables, the pgvector extension and the HNSW index
+        store.setup()
+
+    return store
+
+
+async def create_async_postgres_store(
+    pool,
+    embedding_model: str = "openai:text-embedding-3-small",
+    embedding_dims: int = 1536,
+    index_fields: Optional[List[str]] = None,
+    hnsw_m: Optional[int] = None,
+    hnsw_ef_construction: Optional[int] = None,
+    setup: bool = True,
+) -> AsyncPostgresStore:
+    """
+    Create the async pgvector-backed memory store on an AsyncConnectionPool.
+
+    Takes the same arguments as create_postgres_store.
+
+    Args:
+        pool: The psycopg AsyncConnectionPool (or async connection) to run queries on.
+        embedding_model: The embedding model used to index memories.
+        embedding_dims: The dimensions of the embedding vectors.
+        index_fields: JSON paths of the memory value to embed. If None, the whole value is embedded.
+        hnsw_m: HNSW graph degree. If None, will use PG_STORE_HNSW_M from environment.
+        hnsw_ef_construction: HNSW build-time candidate list size. If None, will use
+            PG_STORE_HNSW_EF_CONSTRUCTION from environment.
+        setup: Whether to create the store tables and vector index.
+
+    Returns:
+        An AsyncPostgresStore ready to be passed to create_react_agent.
+    """
+    index = _index_config(embedding_model, embedding_dims, index_fields, hnsw_m, hnsw_ef_construction)
+    store = AsyncPostgresStore(pool, index=index)
+
+    if setup:
+        await store.setup()
+
+    return store
@@ -8,16 +8,12 @@ from langchain.tools import BaseTool
 from typing import Optional
 from langchain_core.callbacks.manager import CallbackManagerForToolRun
 import os
+from functools import lru_cache
 from langchain_community.document_loaders import WebBaseLoader
 from langchain_community.vectorstores import Chroma
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnablePassthrough
-# Updated import for HuggingFaceEmbeddings
-try:
-    from langchain_huggingface import HuggingFaceEmbeddings
-except ImportError:
-    # Fallback to old import if langchain_huggingface is not installed
-    from langchain_community.embeddings import HuggingFaceEmbeddings
+from src.models.langchain_embeddings import SharedSentenceTransformerEmbeddings
 from src.utils.env_utils import load_env_vars, get_env_var, get_env_list
 
 # Load environment variables
@@ -29,21 +25,30 @@ SQL_DIR_PATH = get_env_var("SQL_DIR_PATH", "data/sql_scripts")
 # List of SQL files to include (Optional)
 SQL_FILE_LIST = get_env_list("SQL_LIST_MINI", ",") or ['meta_data.sql']
 
-# Load SQL file contents
-sql_contents = []
-for filename in os.listdir(SQL_DIR_PATH):
-    if filename.endswith(".sql") and (not SQL_FILE_LIST or filename in SQL_FILE_LIST):
-        with open(os.path.join(SQL_DIR_PATH, filename), "r") as file:
-            sql_content = file.read()
-            print(sql_content)
-            sql_contents.append(sql_content)
 
-# Embed SQL contents and create a vector store
-vectorstore = Chroma.from_texts(
-    texts=sql_contents,
-    embedding=HuggingFaceEmbeddings(model_name="sentence-transformers/all-mpnet-base-v2")
-)
-retriever = vectorstore.as_retriever(search_kwargs={"k": 1})
+@lru_cache(maxsize=None)
+def get_retriever():
+    """
+    Build the SQL script retriever on first use.
+
+    The SQL files are embedded with the process-wide shared model, so importing
+    this module no longer loads model weights or embeds anything.
+    """
+    # Load SQL file contents
+    sql_contents = []
+    for filename in os.listdir(SQL_DIR_PATH):
+        if filename.endswith(".sql") and (not SQL_FILE_LIST or filename in SQL_FILE_LIST):
+            with open(os.path.join(SQL_DIR_PATH, filename), "r") as file:
+                sql_content = file.read()
+                print(sql_content)
+                sql_contents.append(sql_content)
+
+    # Embed SQL contents and create a vector store
+    vectorstore = Chroma.from_texts(
+        texts=sql_contents,
+        embedding=SharedSentenceTransformerEmbeddings(model_name="sentence-transformers/all-mpnet-base-v2")
+    )
+    return vectorstore.as_retriever(search_kwargs={"k": 1})
 
 class QueryHelpTool(BaseTool):
     """
@@ -58,7 +63,7 @@ class QueryHelpTool(BaseTool):
         run_manager: Optional[CallbackManagerForToolRun] = None
     ) -> str:
         """Use the tool to retrieve relevant SQL scripts."""
-        relevant_doc = retriever.get_relevant_documents(query)
+        relevant_doc = get_retriever().get_relevant_documents(query)
         if not relevant_doc:
             return "No relevant SQL scripts found for the given query."
         return relevant_doc[0].page_content
@@ -0,0 +1,217 @@
+"""
+Module for coalescing concurrent single-text embedding requests into batches
+"""
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+from src.models.embedding_model import EmbeddingModel
+
+
+_STOP = object()
+
+
+class BatchingEmbeddingService:
+    """
+    A front-end for an EmbeddingModel that batches requests from many callers
+
+    Threads call embed() and asyncio tasks call aembed() with a single text.
+    Requests are queued and a background thread flushes them to the model as
+    one batch as soon as max_batch_size requests are waiting or the oldest
+    request has waited max_wait_ms, whichever comes first. Larger batches give
+    better throughput; a shorter wait gives lower latency under light load.
+    """
+
+    def __init__(
+        self,
+        embedding_model: EmbeddingModel,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        max_queue_size: int = 0,
+    ):
+        """
+        Initialize the batching service and start its worker thread
+
+        Args:
+            embedding_model: The model used to embed each batch
+            max_batch_size: The maximum number of texts sent to the model at once
+            max_wait_ms: How long the first request of a batch may wait for company
+            max_queue_size: The maximum number of waiting requests (0 for unbounded).
+                When full, embed() blocks and aembed() waits for room.
+        """
+        self.embedding_model = embedding_model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue_size)
+        self._stats_lock = threading.Lock()
+        self._requests = 0
+        self._batches = 0
+        self._max_batch_seen = 0
+        self._batch_sizes: Dict[int, int] = {}
+        self._encode_seconds = 0.0
+        # Guards _closed and _submitting, so close() can wait for submits already past the check
+        self._state = threading.Condition()
+        self._closed = False
+        self._submitting = 0
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, text: str, timeout: Optional[float] = None) -> Future:
+        """
+        Queue a text for embedding
+
+        Args:
+            text: The text to embed
+            timeout: How long to wait for room in a bounded queue
+
+        Returns:
+            A future resolving to the embedding
+
+        Raises:
+            RuntimeError: If the service is closed
+        """
+        with self._state:
+            if self._closed:
+                raise RuntimeError("BatchingEmbeddingService is closed")
+            self._submitting += 1
+        try:
+            future: Future = Future()
+            self._queue.put((text, future, time.monotonic()), timeout=timeout)
+            return future
+        finally:
+            with self._state:
+                self._submitting -= 1
+                self._state.notify_all()
+
+    def embed(self, text: str, timeout: Optional[float] = None) -> List[float]:
+        """
+        Embed a single text, blocking until its batch has been encoded
+
+        Args:
+            text: The text to embed
+            timeout: The maximum number of seconds to wait for the result
+
+        Returns:
+            The embedding for the text
+        """
+        return self.submit(text, timeout=timeout).result(timeout=timeout)
+
+    async def aembed(self, text: str) -> List[float]:
+        """
+        Embed a single text from an asyncio task without blocking the event loop
+
+        Args:
+            text: The text to embed
+
+        Returns:
+            The embedding for the text
+        """
+        try:
+            future = self.submit(text, timeout=0)
+        except queue.Full:
+            # Wait for room off the event loop rather than spinning on it
+            future = await asyncio.get_running_loop().run_in_executor(None, self.submit, text)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get queue and batching statistics
+
+        Returns:
+            A dictionary with the current queue depth, request and batch counts,
+            the average and largest batch size, and a batch size histogram
+        """
+        with self._stats_lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "requests": self._requests,
+                "batches": self._batches,
+                "avg_batch_size": self._requests / self._batches if self._batches else 0.0,
+                "max_batch_size": self._max_batch_seen,
+                "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+                "encode_seconds": self._encode_seconds,
+            }
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop accepting requests, finish the queued ones and stop the worker
+
+        Requests still queued once the worker has stopped fail with RuntimeError.
+
+        Args:
+            timeout: How long to wait for the worker to finish
+        """
+        with self._state:
+            if self._closed:
+                return
+            self._closed = True
+            # Submits that passed the closed check enqueue before _STOP, so the worker sees them
+            self._state.wait_for(lambda: self._submitting == 0)
+        self._queue.put(_STOP)
+        self._worker.join(timeout=timeout)
+        if not self._worker.is_alive():
+            self._fail_pending()
+
+    def __enter__(self) -> "BatchingEmbeddingService":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch: List[Tuple[str, Future, float]] = [item]
+            deadline = item[2] + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+
+    def _fail_pending(self) -> None:
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not _STOP and item[1].set_running_or_notify_cancel():
+                item[1].set_exception(RuntimeError("BatchingEmbeddingService is closed"))
+
+    def _flush(self, batch: List[Tuple[str, Future, float]]) -> None:
+        # Skip callers that gave up before their batch ran
+        batch = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        start = time.perf_counter()
+        try:
+            embeddings = self.embedding_model.get_embeddings([text for text, _, _ in batch])
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        elapsed = time.perf_counter() - start
+
+        for (_, future, _), embedding in zip(batch, embeddings):
+            future.set_result(embedding)
+
+        with self._stats_lock:
+            size = len(batch)
+            self._requests += size
+            self._batches += 1
+            self._max_batch_seen = max(self._max_batch_seen, size)
+            self._batch_sizes[size] = self._batch_sizes.get(size, 0) + 1
+            self._encode_seconds += elapsed
@@ -0,0 +1,274 @@
+"""
+Module for caching embeddings across calls and process restarts
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """
+    A two-tier, content-addressed cache for embedding vectors
+
+    Vectors are keyed by a hash of the model name, the backend that produced
+    them and the normalized text, so vectors from different models, or from the
+    float and int8 graphs of one model, never answer for each other. The first
+    tier is an in-process LRU; the optional second tier is a SQLite file holding
+    float32 vectors, evicted least-recently-used once it grows past a size limit.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        max_memory_items: int = 10000,
+        db_path: Optional[str] = None,
+        max_disk_bytes: int = 512 * 1024 * 1024,
+        backend: str = "torch",
+    ):
+        """
+        Initialize the embedding cache
+
+        Args:
+            model_name: The name of the model the cached vectors come from
+            max_memory_items: Maximum number of vectors kept in the in-process LRU
+            db_path: Path to the SQLite file for the on-disk tier. If None, only
+                the in-process tier is used.
+            max_disk_bytes: Maximum total size of the vectors kept on disk
+            backend: The backend that computes the vectors, including its quantization:
+                "torch", "onnx" (int8) or "onnx-fp32", as in EmbeddingModel
+        """
+        self.model_name = model_name
+        self.backend = backend
+        self.max_memory_items = max_memory_items
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._db = None
+        self._disk_bytes = 0
+        if db_path is not None:
+            directory = os.path.dirname(os.path.abspath(db_path))
+            os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, "
+                "nbytes INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS embeddings_last_access ON embeddings (last_access)"
+            )
+            self._db.commit()
+            row = self._db.execute("SELECT COALESCE(SUM(nbytes), 0) FROM embeddings").fetchone()
+            self._disk_bytes = row[0]
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """
+        Normalize text before hashing so trivially different inputs share a key
+
+        Args:
+            text: The text to normalize
+
+        Returns:
+            The text with surrounding whitespace stripped and inner runs collapsed
+        """
+        return " ".join(text.split())
+
+    def make_key(self, text: str) -> str:
+        """
+        Build the cache key for a text
+
+        Args:
+            text: The text to build the key for
+
+        Returns:
+            A hex digest of the model name, the backend and the normalized text
+        """
+        payload = f"{self.model_name}\0{self.backend}\0{self.normalize(text)}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """
+        Look up the vector for a single text
+
+        Args:
+            text: The text to look up
+
+        Returns:
+            The cached float32 vector, or None on a miss
+        """
+        return self.get_many([text])[0]
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """
+        Look up the vectors for a batch of texts
+
+        Args:
+            texts: The texts to look up
+
+        Returns:
+            A list aligned with texts holding the cached vector or None for each miss
+        """
+        keys = [self.make_key(text) for text in texts]
+        results: List[Optional[np.ndarray]] = [None] * len(keys)
+        disk_lookups: Dict[str, List[int]] = {}
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    results[i] = vector
+                else:
+                    disk_lookups.setdefault(key, []).append(i)
+
+            if disk_lookups and self._db is not None:
+                found = self._read_disk(list(disk_lookups))
+                for key, vector in found.items():
+                    self._remember(key, vector)
+                    for i in disk_lookups.pop(key):
+                        results[i] = vector
+                        self.disk_hits += 1
+
+            self.misses += sum(len(indexes) for indexes in disk_lookups.values())
+
+        return results
+
+    def put(self, text: str, vector: Sequence[float]) -> None:
+        """
+        Store the vector for a single text
+
+        Args:
+            text: The text that was embedded
+            vector: Its embedding
+        """
+        self.put_many([text], [vector])
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        """
+        Store the vectors for a batch of texts
+
+        Args:
+            texts: The texts that were embedded
+            vectors: Their embeddings, aligned with texts
+        """
+        entries = {
+            self.make_key(text): np.asarray(vector, dtype=np.float32)
+            for text, vector in zip(texts, vectors)
+        }
+        with self._lock:
+            for key, vector in entries.items():
+                self._remember(key, vector)
+            if self._db is not None:
+                self._write_disk(entries)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get the cache counters
+
+        Returns:
+            A dictionary of hit/miss counters, hit rate and tier sizes
+        """
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "memory_items": len(self._memory),
+                "disk_bytes": self._disk_bytes,
+            }
+
+    def close(self) -> None:
+        """
+        Close the on-disk tier
+        """
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        for chunk in _chunks(keys):
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._db.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+            ).fetchall()
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float32)
+        if found:
+            now = time.time()
+            self._db.executemany(
+                "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                [(now, key) for key in found],
+            )
+            self._db.commit()
+        return found
+
+    def _write_disk(self, entries: Dict[str, np.ndarray]) -> None:
+        # Subtract the size of rows being replaced so the byte total stays exact
+        replaced = 0
+        for chunk in _chunks(list(entries)):
+            placeholders = ",".join("?" * len(chunk))
+            replaced += self._db.execute(
+                f"SELECT COALESCE(SUM(nbytes), 0) FROM embeddings WHERE key IN ({placeholders})",
+                chunk,
+            ).fetchone()[0]
+
+        now = time.time()
+        self._db.executemany(
+            "INSERT OR REPLACE INTO embeddings (key, vector, nbytes, last_access) VALUES (?, ?, ?, ?)",
+            [(key, vector.tobytes(), vector.nbytes, now) for key, vector in entries.items()],
+        )
+        self._disk_bytes += sum(vector.nbytes for vector in entries.values()) - replaced
+        self._evict_disk()
+        self._db.commit()
+
+    def _evict_disk(self) -> None:
+        if self._disk_bytes <= self.max_disk_bytes:
+            return
+        # Trim to 90% of the limit so eviction does not run on every write
+        target = int(self.max_disk_bytes * 0.9)
+        while self._disk_bytes > target:
+            rows = self._db.execute(
+                "SELECT key, nbytes FROM embeddings ORDER BY last_access LIMIT 256"
+            ).fetchall()
+            if not rows:
+                break
+            evicted = []
+            for key, nbytes in rows:
+                if self._disk_bytes <= target:
+                    break
+                evicted.append((key,))
+                self._disk_bytes -= nbytes
+            self._db.executemany("DELETE FROM embeddings WHERE key = ?", evicted)
+            self.evictions += len(evicted)
+
+
+def _chunks(keys: List[str], size: int = 500):
+    # Stay well below SQLite's bound-parameter limit
+    for start in range(0, len(keys), size):
+        yield keys[start:start + size]
@@ -1,8 +1,12 @@
 """
 Module for embedding models
 """
-from typing import List
+from typing import List, Optional, Tuple
+import numpy as np
 from sentence_transformers import SentenceTransformer
+from src.models.embedding_cache import EmbeddingCache
+from src.models.model_registry import ModelRegistry, get_model
+from src.models.similarity import normalize_embeddings, top_k
 
 
 class EmbeddingModel:
@@ -10,14 +14,60 @@ class EmbeddingModel:
     A class for generating embeddings from text
     """
     
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        cache: Optional[EmbeddingCache] = None,
+        device: Optional[str] = None,
+        backend: str = "torch",
+    ):
         """
         Initialize the embedding model
         
+        The model weights are not loaded here; they are fetched from the shared
+        model registry on first use, so every EmbeddingModel for the same model
+        and device shares one copy.
+        
         Args:
             model_name: The name of the sentence-transformers model to use
+            cache: Optional embedding cache for this model and backend. When set, only
+                texts missing from the cache are sent to the model.
+            device: The device to run the model on. If None, sentence-transformers picks one.
+            backend: "torch" to run the sentence-transformers model, "onnx" for the int8
+                quantized ONNX Runtime graph, or "onnx-fp32" for the unquantized graph.
+        """
+        if backend not in ("torch", "onnx", "onnx-fp32"):
+            raise ValueError(f"Unknown embedding backend: {backend}")
+        if cache is not None:
+            if ModelRegistry.canonical_name(cache.model_name) != ModelRegistry.canonical_name(model_name):
+                raise ValueError(
+                    f"Embedding cache is for model {cache.model_name}, not {model_name}"
+                )
+            if cache.backend != backend:
+                raise ValueError(
+                    f"Embedding cache is for the {cache.backend} backend, not {backend}"
+                )
+        self.model_name = model_name
+        self.device = device
+        self.cache = cache
+        self.backend = backend
+    
+    @property
+    def model(self) -> SentenceTransformer:
+        """
+        The shared SentenceTransformer instance, loaded on first access
+        """
+        return get_model(self.model_name, device=self.device)
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
         """
-        self.model = SentenceTransformer(model_name)
+        Encode texts with the selected backend
+        """
+        if self.backend == "torch":
+            return self.model.encode(texts)
+        # Imported here so the torch backend does not need onnxruntime installed
+        from src.models.onnx_backend import get_onnx_backend
+        return get_onnx_backend(self.model_name, quantize=self.backend == "onnx").encode(texts)
     
     def get_embeddings(self, texts: List[str]) -> List[List[float]]:
         """
@@ -29,7 +79,19 @@ class EmbeddingModel:
         Returns:
             A list of embeddings, one for each text
         """
-        return self.model.encode(texts).tolist()
+        if self.cache is None:
+            return self._encode(texts).tolist()
+
+        vectors = self.cache.get_many(texts)
+        miss_indexes = [i for i, vector in enumerate(vectors) if vector is None]
+        if miss_indexes:
+            # Encode each distinct missing text once, in a single batch
+            miss_texts = list(dict.fromkeys(texts[i] for i in miss_indexes))
+            encoded = dict(zip(miss_texts, self._encode(miss_texts)))
+            self.cache.put_many(miss_texts, [encoded[text] for text in miss_texts])
+            for i in miss_indexes:
+                vectors[i] = encoded[texts[i]]
+        return [vector.tolist() for vector in vectors]
     
     def get_embedding(self, text: str) -> List[float]:
         """
@@ -41,7 +103,7 @@ class EmbeddingModel:
         Returns:
             The embedding for the text
         """
-        return self.model.encode(text).tolist()
+        return self.get_embeddings([text])[0]
     
     def similarity(self, text1: str, text2: str) -> float:
         """
@@ -57,3 +119,31 @@ class EmbeddingModel:
         embedding1 = self.model.encode(text1)
         embedding2 = self.model.encode(text2)
         return self.model.similarity(embedding1, embedding2)
+
+    def encode_normalized(self, texts: List[str]) -> np.ndarray:
+        """
+        Generate L2-normalized float32 embeddings for use with top_k
+        
+        Args:
+            texts: A list of texts to embed
+            
+        Returns:
+            A (len(texts), dims) float32 matrix with unit-length rows
+        """
+        return normalize_embeddings(self.get_embeddings(texts))
+
+    @staticmethod
+    def top_k(queries, corpus, k: int = 10, chunk_size: int = 65536) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rank precomputed corpus embeddings against one or many query embeddings
+        
+        Args:
+            queries: A normalized query vector or (m, dims) matrix of query vectors
+            corpus: A normalized (n, dims) matrix or memmap of corpus vectors
+            k: The number of results per query; must be at least 1
+            chunk_size: The number of corpus rows scored per step
+            
+        Returns:
+            A tuple of (indices, scores) sorted by descending similarity
+        """
+        return top_k(queries, corpus, k=k, chunk_size=chunk_size)
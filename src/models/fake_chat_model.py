@@ -0,0 +1,80 @@
+"""
+A chat model that answers without calling a provider, for load tests and local runs.
+
+FakeChatModel waits for a configurable latency and returns canned responses,
+so the agents can be exercised under concurrency without Bedrock credentials
+or cost. The async path uses asyncio.sleep, so concurrent requests overlap on
+one event loop the way real Bedrock calls do.
+"""
+
+import asyncio
+import time
+from typing import Any, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import PrivateAttr
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    A chat model with fixed latency that cycles through canned responses.
+
+    It never calls tools, so a ReAct agent finishes after one model call.
+    """
+
+    responses: List[str] = ["OK"]
+    latency: float = 0.0
+
+    _calls: int = PrivateAttr(default=0)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "FakeChatModel":
+        """
+        Accept tools for compatibility with create_react_agent; they are never called.
+
+        Returns:
+            The model itself
+        """
+        return self
+
+    def _next_message(self, messages: List[BaseMessage]) -> ChatResult:
+        content = self.responses[self._calls % len(self.responses)]
+        self._calls += 1
+        input_tokens = sum(len(str(message.content)) for message in messages) // 4
+        message = AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": len(content) // 4,
+                "total_tokens": input_tokens + len(content) // 4,
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._next_message(messages)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._next_message(messages)
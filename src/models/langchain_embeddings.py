@@ -0,0 +1,127 @@
+"""
+Module for exposing registry-managed models through the LangChain Embeddings interface
+"""
+from typing import List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+
+class SharedSentenceTransformerEmbeddings(Embeddings):
+    """
+    A drop-in replacement for HuggingFaceEmbeddings backed by the shared model registry
+
+    The underlying model is only loaded on the first embed call, and every
+    instance for the same (model, device) reuses the same weights.
+    """
+
+    def __init__(self, model_name: str = "sentence-transformers/all-mpnet-base-v2", device: Optional[str] = None):
+        """
+        Initialize the embeddings wrapper
+
+        Args:
+            model_name: The name of the sentence-transformers model to use
+            device: The device to load the model on
+        """
+        self.model_name = model_name
+        self.device = device
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed a list of documents
+
+        Args:
+            texts: The documents to embed
+
+        Returns:
+            A list of embeddings, one for each document
+        """
+        # Imported here so DeduplicatingEmbeddings does not pull in sentence-transformers
+        from src.models.model_registry import get_model
+        return get_model(self.model_name, device=self.device).encode(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Embed a single query
+
+        Args:
+            text: The query to embed
+
+        Returns:
+            The embedding for the query
+        """
+        return self.embed_documents([text])[0]
+
+
+class DeduplicatingEmbeddings(Embeddings):
+    """
+    Wraps another Embeddings so repeated texts in one call are embedded only once
+
+    Stores embed every query of a batched multi-namespace search in a single
+    embed_documents call; when those queries are the same text this sends it to
+    the model once and fans the vector back out.
+    """
+
+    def __init__(self, embeddings: Embeddings):
+        """
+        Initialize the wrapper
+
+        Args:
+            embeddings: The embeddings implementation to delegate to
+        """
+        self.embeddings = embeddings
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed a list of documents, sending each distinct text once
+
+        Args:
+            texts: The documents to embed
+
+        Returns:
+            A list of embeddings, one for each document
+        """
+        unique = list(dict.fromkeys(texts))
+        if len(unique) == len(texts):
+            return self.embeddings.embed_documents(texts)
+        vectors = dict(zip(unique, self.embeddings.embed_documents(unique)))
+        return [vectors[text] for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Embed a single query
+
+        Args:
+            text: The query to embed
+
+        Returns:
+            The embedding for the query
+        """
+        return self.embeddings.embed_query(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Asynchronously embed a list of documents, sending each distinct text once
+
+        Args:
+            texts: The documents to embed
+
+        Returns:
+            A list of embeddings, one for each document
+        """
+        unique = list(dict.fromkeys(texts))
+        if len(unique) == len(texts):
+            return await self.embeddings.aembed_documents(texts)
+        vectors = dict(zip(unique, await self.embeddings.aembed_documents(unique)))
+        return [vectors[text] for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """
+        Asynchronously embed a single query
+
+        Args:
+            text: The query to embed
+
+        Returns:
+            The embedding for the query
+        """
+        return await self.embeddings.aembed_query(text)
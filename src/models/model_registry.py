@@ -0,0 +1,174 @@
+"""
+Module for sharing loaded sentence-transformers models across a process
+"""
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from sentence_transformers import SentenceTransformer
+
+
+def _resident_bytes() -> Optional[int]:
+    # Current resident set size, where the platform exposes it cheaply
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class ModelRegistry:
+    """
+    A process-wide registry of sentence-transformers models
+
+    Each (model, device) pair is loaded the first time it is requested and the
+    same instance is handed to every caller afterwards, so a process holds one
+    copy of each model's weights. Models can also be loaded ahead of time with
+    prewarm() so the first request does not pay the load cost.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty registry
+        """
+        self._models: Dict[Tuple[str, Optional[str]], SentenceTransformer] = {}
+        self._stats: Dict[Tuple[str, Optional[str]], Dict[str, Optional[float]]] = {}
+        self._key_locks: Dict[Tuple[str, Optional[str]], threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def canonical_name(model_name: str) -> str:
+        """
+        Map short sentence-transformers names to their hub id so aliases share one entry
+
+        Args:
+            model_name: A model name such as "all-mpnet-base-v2" or a full hub id/path
+
+        Returns:
+            The canonical model name
+        """
+        if "/" in model_name or os.path.exists(model_name):
+            return model_name
+        return f"sentence-transformers/{model_name}"
+
+    def get(self, model_name: str, device: Optional[str] = None) -> SentenceTransformer:
+        """
+        Get a shared model instance, loading it on first use
+
+        Args:
+            model_name: The name of the sentence-transformers model
+            device: The device to load the model on. If None, sentence-transformers picks one.
+
+        Returns:
+            The shared SentenceTransformer instance
+        """
+        key = (self.canonical_name(model_name), device)
+        model = self._models.get(key)
+        if model is not None:
+            return model
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Load outside the registry lock so different models can load in parallel
+        with key_lock:
+            model = self._models.get(key)
+            if model is None:
+                rss_before = _resident_bytes()
+                start = time.perf_counter()
+                model = SentenceTransformer(key[0], device=device)
+                load_seconds = time.perf_counter() - start
+                rss_after = _resident_bytes()
+
+                parameter_bytes = sum(
+                    tensor.numel() * tensor.element_size()
+                    for tensor in list(model.parameters()) + list(model.buffers())
+                )
+                self._stats[key] = {
+                    "load_seconds": load_seconds,
+                    "parameter_bytes": parameter_bytes,
+                    "rss_delta_bytes": (
+                        rss_after - rss_before if rss_before is not None and rss_after is not None else None
+                    ),
+                }
+                self._models[key] = model
+        return model
+
+    def prewarm(self, model_names: Iterable[str], device: Optional[str] = None) -> None:
+        """
+        Load models ahead of the first request
+
+        Args:
+            model_names: The names of the models to load
+            device: The device to load them on
+        """
+        for model_name in model_names:
+            self.get(model_name, device=device)
+
+    def is_loaded(self, model_name: str, device: Optional[str] = None) -> bool:
+        """
+        Check whether a model has already been loaded
+
+        Args:
+            model_name: The name of the model
+            device: The device it was loaded on
+
+        Returns:
+            True if the model is resident in this process
+        """
+        return (self.canonical_name(model_name), device) in self._models
+
+    def stats(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """
+        Get load time and memory figures for every loaded model
+
+        Returns:
+            A dictionary keyed by "model@device" with load_seconds, parameter_bytes
+            and rss_delta_bytes (None where resident memory cannot be measured)
+        """
+        with self._lock:
+            return {
+                f"{name}@{device or 'auto'}": dict(stats)
+                for (name, device), stats in self._stats.items()
+            }
+
+    def unload(self, model_name: str, device: Optional[str] = None) -> None:
+        """
+        Drop a model from the registry so its memory can be reclaimed
+
+        Args:
+            model_name: The name of the model
+            device: The device it was loaded on
+        """
+        key = (self.canonical_name(model_name), device)
+        with self._lock:
+            self._models.pop(key, None)
+            self._stats.pop(key, None)
+
+
+_registry = ModelRegistry()
+
+
+def get_registry() -> ModelRegistry:
+    """
+    Get the process-wide model registry
+
+    Returns:
+        The shared ModelRegistry
+    """
+    return _registry
+
+
+def get_model(model_name: str, device: Optional[str] = None) -> SentenceTransformer:
+    """
+    Get a shared model instance from the process-wide registry
+
+    Args:
+        model_name: The name of the sentence-transformers model
+        device: The device to load the model on
+
+    Returns:
+        The shared SentenceTransformer instance
+    """
+    return _registry.get(model_name, device=device)
@@ -0,0 +1,256 @@
+"""
+Module for running sentence-transformers models on CPU with ONNX Runtime
+"""
+import json
+import os
+import shutil
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.models.model_registry import ModelRegistry, get_model
+from src.utils.env_utils import get_env_var
+
+# Where sentence-transformers keeps max_seq_length, next to the model weights
+SENTENCE_BERT_CONFIG = "sentence_bert_config.json"
+
+
+def _require_onnx():
+    try:
+        import onnxruntime
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+        from transformers import AutoTokenizer
+    except ImportError as e:
+        raise ImportError(
+            "The ONNX embedding backend requires onnxruntime and optimum. "
+            "Install them with: pip install 'optimum[onnxruntime]'"
+        ) from e
+    return onnxruntime, ORTModelForFeatureExtraction, AutoTokenizer
+
+
+def _sentence_transformers_max_length(model_name: str, export_dir: str, tokenizer) -> int:
+    """
+    Get the token limit sentence-transformers truncates the model's inputs to
+
+    The model's sentence_bert_config.json is copied into the export directory
+    on first use, so later runs do not need the hub.
+
+    Args:
+        model_name: The hub id or local path of the model
+        export_dir: The directory the ONNX export is kept in
+        tokenizer: The model's tokenizer, whose limit is used if the model has no config
+
+    Returns:
+        The maximum number of tokens per text
+    """
+    config_path = os.path.join(export_dir, SENTENCE_BERT_CONFIG)
+    if not os.path.exists(config_path):
+        try:
+            if os.path.isdir(model_name):
+                source = os.path.join(model_name, SENTENCE_BERT_CONFIG)
+            else:
+                from huggingface_hub import hf_hub_download
+                source = hf_hub_download(model_name, SENTENCE_BERT_CONFIG)
+            shutil.copy(source, config_path)
+        except Exception as e:
+            print(f"Could not read {SENTENCE_BERT_CONFIG} of {model_name}, using the tokenizer's limit: {str(e)}")
+    if os.path.exists(config_path):
+        with open(config_path) as f:
+            max_seq_length = json.load(f).get("max_seq_length")
+        if max_seq_length:
+            return min(int(max_seq_length), tokenizer.model_max_length)
+    return tokenizer.model_max_length
+
+
+class OnnxEmbeddingBackend:
+    """
+    A CPU inference backend that runs an exported ONNX graph of a sentence-transformers model
+
+    On first use the model is exported to ONNX and, if requested, dynamically
+    quantized to int8; both artifacts are cached on disk. Texts are sorted by
+    token length and batched in that order so each batch is padded only to the
+    length of its own longest text, then mean-pooled and L2-normalized to match
+    the sentence-transformers output of the MiniLM and MPNet models.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        quantize: bool = True,
+        num_threads: Optional[int] = None,
+        batch_size: int = 32,
+        max_length: Optional[int] = None,
+        normalize: bool = True,
+        cache_dir: Optional[str] = None,
+    ):
+        """
+        Initialize the backend, exporting and quantizing the model if needed
+
+        Args:
+            model_name: The name of the sentence-transformers model to use
+            quantize: Whether to run the int8 dynamically quantized graph
+            num_threads: Intra-op thread count. If None, will use ONNX_NUM_THREADS
+                from environment, falling back to the number of CPUs.
+            batch_size: The maximum number of texts per inference call
+            max_length: The maximum number of tokens per text. If None, will use the
+                model's max_seq_length from its sentence-transformers config
+                (256 for all-MiniLM-L6-v2, 384 for all-mpnet-base-v2).
+            normalize: Whether to L2-normalize the pooled embeddings
+            cache_dir: Where exported graphs are kept. If None, will use ONNX_CACHE_DIR
+                from environment, falling back to ~/.cache/agenticllm/onnx.
+        """
+        onnxruntime, ORTModelForFeatureExtraction, AutoTokenizer = _require_onnx()
+
+        self.model_name = ModelRegistry.canonical_name(model_name)
+        self.quantize = quantize
+        self.batch_size = batch_size
+        self.normalize = normalize
+
+        if num_threads is None:
+            num_threads = int(get_env_var("ONNX_NUM_THREADS", str(os.cpu_count() or 1)))
+        self.num_threads = num_threads
+
+        if cache_dir is None:
+            cache_dir = get_env_var(
+                "ONNX_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "agenticllm", "onnx")
+            )
+        export_dir = os.path.join(cache_dir, self.model_name.replace("/", "__"))
+        model_path = os.path.join(export_dir, "model.onnx")
+
+        if not os.path.exists(model_path):
+            ort_model = ORTModelForFeatureExtraction.from_pretrained(self.model_name, export=True)
+            ort_model.save_pretrained(export_dir)
+            AutoTokenizer.from_pretrained(self.model_name).save_pretrained(export_dir)
+
+        if quantize:
+            quantized_path = os.path.join(export_dir, "model_int8.onnx")
+            if not os.path.exists(quantized_path):
+                from onnxruntime.quantization import QuantType, quantize_dynamic
+                quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+            model_path = quantized_path
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = num_threads
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(
+            model_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {model_input.name for model_input in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(export_dir)
+        if max_length is None:
+            max_length = _sentence_transformers_max_length(self.model_name, export_dir, self.tokenizer)
+        self.max_length = max_length
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Generate embeddings for a list of texts
+
+        Args:
+            texts: A list of texts to embed
+
+        Returns:
+            A (len(texts), dims) float32 matrix, in the same order as texts
+        """
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        # Bucket by token length so each batch pads to a similar length
+        lengths = self.tokenizer(texts, truncation=True, max_length=self.max_length, return_length=True)["length"]
+        order = np.argsort(lengths, kind="stable")
+
+        batches = []
+        for start in range(0, len(texts), self.batch_size):
+            batch_texts = [texts[i] for i in order[start:start + self.batch_size]]
+            batches.append(self._encode_batch(batch_texts))
+
+        sorted_embeddings = np.concatenate(batches, axis=0)
+        embeddings = np.empty_like(sorted_embeddings)
+        embeddings[order] = sorted_embeddings
+        return embeddings
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encoded = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=self.max_length, return_tensors="np"
+        )
+        inputs = {name: value.astype(np.int64) for name, value in encoded.items() if name in self._input_names}
+        token_embeddings = self.session.run(None, inputs)[0]
+
+        # Mean pooling over the non-padding tokens
+        mask = encoded["attention_mask"][..., np.newaxis].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.normalize:
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.astype(np.float32)
+
+
+@lru_cache(maxsize=None)
+def get_onnx_backend(model_name: str, quantize: bool = True, num_threads: Optional[int] = None) -> OnnxEmbeddingBackend:
+    """
+    Get a shared ONNX backend, creating it on first use
+
+    Args:
+        model_name: The name of the sentence-transformers model to use
+        quantize: Whether to run the int8 dynamically quantized graph
+        num_threads: Intra-op thread count
+
+    Returns:
+        The shared OnnxEmbeddingBackend
+    """
+    return OnnxEmbeddingBackend(model_name, quantize=quantize, num_threads=num_threads)
+
+
+def check_parity(
+    model_name: str,
+    texts: List[str],
+    quantize: bool = True,
+    min_cosine: float = 0.99,
+) -> Dict[str, float]:
+    """
+    Compare ONNX embeddings against the PyTorch sentence-transformers output
+
+    Args:
+        model_name: The name of the sentence-transformers model to compare
+        texts: The texts to embed with both backends
+        quantize: Whether to check the int8 quantized graph
+        min_cosine: The lowest per-text cosine similarity considered a pass
+
+    Returns:
+        A dictionary with the minimum and mean cosine similarity, the maximum
+        absolute difference, and whether the check passed
+    """
+    reference = np.asarray(get_model(model_name).encode(texts, normalize_embeddings=True), dtype=np.float32)
+    candidate = get_onnx_backend(model_name, quantize=quantize).encode(texts)
+
+    cosines = np.sum(reference * candidate, axis=1)
+    return {
+        "min_cosine": float(cosines.min()),
+        "mean_cosine": float(cosines.mean()),
+        "max_abs_diff": float(np.abs(reference - candidate).max()),
+        "passed": bool(cosines.min() >= min_cosine),
+    }
+
+
+def benchmark(texts: List[str], backend, repeats: int = 3) -> float:
+    """
+    Measure encoding throughput for a backend
+
+    Args:
+        texts: The texts to embed on each repeat
+        backend: An object with an encode(texts) method
+        repeats: How many times to encode the texts; the best run is reported
+
+    Returns:
+        The best observed throughput in sentences per second
+    """
+    # Warm-up run so lazy initialization is not measured
+    backend.encode(texts[: min(len(texts), 8)])
+    best = 0.0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        backend.encode(texts)
+        elapsed = time.perf_counter() - start
+        best = max(best, len(texts) / elapsed)
+    return best
@@ -0,0 +1,116 @@
+"""
+Module for vectorized similarity search over precomputed embeddings
+"""
+from typing import Tuple
+
+import numpy as np
+
+
+def normalize_embeddings(embeddings) -> np.ndarray:
+    """
+    Convert embeddings to L2-normalized float32 so dot products are cosine similarities
+
+    Args:
+        embeddings: A vector or a matrix with one embedding per row
+
+    Returns:
+        A float32 array of the same shape with unit-length rows
+    """
+    array = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(array, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return array / norms
+
+
+def save_corpus(path: str, embeddings) -> None:
+    """
+    Write a corpus of embeddings to a raw float32 file that can be memory-mapped
+
+    Args:
+        path: The file to write
+        embeddings: A matrix with one normalized embedding per row
+    """
+    np.ascontiguousarray(embeddings, dtype=np.float32).tofile(path)
+
+
+def load_corpus(path: str, dims: int) -> np.memmap:
+    """
+    Memory-map a corpus written by save_corpus without reading it into RAM
+
+    Args:
+        path: The file to map
+        dims: The dimensions of the embedding vectors
+
+    Returns:
+        A read-only (n, dims) float32 memmap
+    """
+    return np.memmap(path, dtype=np.float32, mode="r").reshape(-1, dims)
+
+
+def top_k(
+    queries,
+    corpus,
+    k: int = 10,
+    chunk_size: int = 65536,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find the k most similar corpus rows for one or many queries
+
+    Both inputs must already be normalized float32 embeddings. The corpus is
+    scored chunk_size rows at a time with a single matrix multiply per chunk,
+    and only the running top k per query is kept, so a memory-mapped corpus
+    larger than RAM is streamed from disk rather than loaded.
+
+    Args:
+        queries: A single query vector or a (m, dims) matrix of queries
+        corpus: A (n, dims) matrix or memmap of corpus embeddings
+        k: The number of results per query; must be at least 1
+        chunk_size: The number of corpus rows scored per step
+
+    Returns:
+        A tuple of (indices, scores). For a single query vector both have shape
+        (k,); for a matrix of queries both have shape (m, k). Results are sorted
+        by descending score, and k is capped at the corpus size.
+
+    Raises:
+        ValueError: If k is less than 1
+    """
+    if k < 1:
+        # np.argpartition(scores, -0) would keep every column instead of none
+        raise ValueError(f"k must be at least 1, got {k}")
+    queries = np.asarray(queries, dtype=np.float32)
+    single = queries.ndim == 1
+    if single:
+        queries = queries[np.newaxis, :]
+
+    n = corpus.shape[0]
+    k = min(k, n)
+    best_scores = np.empty((queries.shape[0], 0), dtype=np.float32)
+    best_indices = np.empty((queries.shape[0], 0), dtype=np.int64)
+
+    for start in range(0, n, chunk_size):
+        chunk = np.asarray(corpus[start:start + chunk_size], dtype=np.float32)
+        scores = queries @ chunk.T
+
+        # Keep only this chunk's top k before merging with the running best
+        if scores.shape[1] > k:
+            local = np.argpartition(scores, -k, axis=1)[:, -k:]
+            scores = np.take_along_axis(scores, local, axis=1)
+        else:
+            local = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+
+        merged_scores = np.concatenate([best_scores, scores], axis=1)
+        merged_indices = np.concatenate([best_indices, local + start], axis=1)
+        if merged_scores.shape[1] > k:
+            keep = np.argpartition(merged_scores, -k, axis=1)[:, -k:]
+            merged_scores = np.take_along_axis(merged_scores, keep, axis=1)
+            merged_indices = np.take_along_axis(merged_indices, keep, axis=1)
+        best_scores, best_indices = merged_scores, merged_indices
+
+    order = np.argsort(-best_scores, axis=1)
+    best_scores = np.take_along_axis(best_scores, order, axis=1)
+    best_indices = np.take_along_axis(best_indices, order, axis=1)
+
+    if single:
+        return best_indices[0], best_scores[0]
+    return best_indices, best_scores
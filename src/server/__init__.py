@@ -0,0 +1,10 @@
+"""
+ASGI server for the memory agents.
+
+create_app() builds a Starlette application with invoke and streaming
+endpoints per conversation thread, plus health and readiness probes.
+"""
+
+from .app import ServerSettings, create_app
+
+__all__ = ["ServerSettings", "create_app"]
@@ -0,0 +1,411 @@
+"""
+ASGI server for the PostgreSQL memory agent.
+
+Endpoints:
+
+- POST /v1/threads/{thread_id}/invoke: run one turn and return the new messages as JSON
+- POST /v1/threads/{thread_id}/stream: run one turn and stream it as server-sent events
+- GET /healthz: liveness; the event loop is serving requests
+- GET /readyz: readiness; the agent is created and warmed up, the database answers
+  and the admission queue has room
+
+Thread requests must be authenticated (see src/server/auth.py); the user is
+taken from the credentials, and a thread can only be used by the user who
+started it. Requests on the same thread_id are serialized by per-thread locks.
+Agent runs execute on one event loop through ainvoke/astream, bounded by an
+admission controller; blocking work that LangGraph hands to threads runs on a
+bounded executor. See ServerSettings for the knobs.
+"""
+
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from langchain_core.messages import AIMessageChunk, BaseMessage, HumanMessage
+from pydantic import BaseModel, ValidationError
+from starlette.applications import Starlette
+from starlette.background import BackgroundTask
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from src.server.auth import ApiKeyAuth, ThreadOwners
+from src.server.concurrency import AdmissionController, Overloaded, ThreadBusy, ThreadLocks
+from src.utils.env_utils import get_env_var
+
+
+@dataclass
+class ServerSettings:
+    """Concurrency limits and model options of the agent server."""
+
+    # Agent runs executing at once, and requests allowed to wait for one
+    max_concurrency: int = 64
+    max_queue: int = 256
+    # Seconds a request waits for a run slot, and for its thread to be free
+    queue_timeout: float = 10.0
+    thread_lock_timeout: float = 30.0
+    # Threads for blocking work LangGraph runs off the event loop
+    executor_workers: int = 8
+    # Seconds the readiness probe waits for the database
+    ready_timeout: float = 2.0
+    # Call the model once at startup so the first request does not pay for connection setup
+    warmup: bool = True
+    # Use FakeChatModel and fake embeddings instead of Bedrock and OpenAI
+    fake_llm: bool = False
+    fake_llm_latency: float = 0.5
+    embedding_dims: int = 1536
+
+    @classmethod
+    def from_env(cls) -> "ServerSettings":
+        """
+        Read the server settings from the environment.
+
+        Uses SERVER_MAX_CONCURRENCY, SERVER_MAX_QUEUE, SERVER_QUEUE_TIMEOUT,
+        SERVER_THREAD_LOCK_TIMEOUT, SERVER_EXECUTOR_WORKERS, SERVER_READY_TIMEOUT,
+        SERVER_WARMUP, SERVER_FAKE_LLM, SERVER_FAKE_LLM_LATENCY and
+        SERVER_EMBEDDING_DIMS; unset variables keep the defaults.
+
+        Returns:
+            The server settings
+        """
+        defaults = cls()
+
+        def flag(name: str, default: bool) -> bool:
+            return get_env_var(name, str(default)).lower() in ("1", "true", "yes")
+
+        return cls(
+            max_concurrency=int(get_env_var("SERVER_MAX_CONCURRENCY", str(defaults.max_concurrency))),
+            max_queue=int(get_env_var("SERVER_MAX_QUEUE", str(defaults.max_queue))),
+            queue_timeout=float(get_env_var("SERVER_QUEUE_TIMEOUT", str(defaults.queue_timeout))),
+            thread_lock_timeout=float(get_env_var("SERVER_THREAD_LOCK_TIMEOUT", str(defaults.thread_lock_timeout))),
+            executor_workers=int(get_env_var("SERVER_EXECUTOR_WORKERS", str(defaults.executor_workers))),
+            ready_timeout=float(get_env_var("SERVER_READY_TIMEOUT", str(defaults.ready_timeout))),
+            warmup=flag("SERVER_WARMUP", defaults.warmup),
+            fake_llm=flag("SERVER_FAKE_LLM", defaults.fake_llm),
+            fake_llm_latency=float(get_env_var("SERVER_FAKE_LLM_LATENCY", str(defaults.fake_llm_latency))),
+            embedding_dims=int(get_env_var("SERVER_EMBEDDING_DIMS", str(defaults.embedding_dims))),
+        )
+
+
+class TurnRequest(BaseModel):
+    """The body of an invoke or stream request."""
+
+    # Either a single user message or a list of {"role", "content"} messages
+    message: Optional[str] = None
+    messages: Optional[List[Dict[str, Any]]] = None
+
+    def input_messages(self) -> List[Dict[str, Any]]:
+        """The messages to send to the agent."""
+        if self.messages:
+            return self.messages
+        if self.message:
+            return [{"role": "user", "content": self.message}]
+        raise ValueError("Provide message or messages")
+
+
+def default_agent_factory(settings: ServerSettings):
+    """
+    Create the PostgresMemoryAgent the server runs.
+
+    Args:
+        settings: The server settings; fake_llm swaps in FakeChatModel and fake embeddings
+
+    Returns:
+        The agent
+    """
+    from src.agents.memory_agent.postgres_memory_agent import PostgresMemoryAgent
+
+    if not settings.fake_llm:
+        return PostgresMemoryAgent(embedding_dims=settings.embedding_dims)
+
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from src.models.fake_chat_model import FakeChatModel
+
+    return PostgresMemoryAgent(
+        embedding_model=DeterministicFakeEmbedding(size=settings.embedding_dims),
+        embedding_dims=settings.embedding_dims,
+        prompt_caching=False,
+        llm=FakeChatModel(
+            responses=["This is a reply from the fake chat model."],
+            latency=settings.fake_llm_latency,
+        ),
+    )
+
+
+def serialize_message(message: BaseMessage) -> Dict[str, Any]:
+    """
+    Convert a message to JSON.
+
+    Args:
+        message: The message
+
+    Returns:
+        The message type and content, plus any tool calls
+    """
+    data = {"type": message.type, "content": message.content}
+    if getattr(message, "tool_calls", None):
+        data["tool_calls"] = message.tool_calls
+    if message.type == "tool":
+        data["name"] = message.name
+    return data
+
+
+def _turn_messages(messages: List[BaseMessage]) -> List[BaseMessage]:
+    """The messages after the last user message, i.e. this turn's output."""
+    for index in range(len(messages) - 1, -1, -1):
+        if isinstance(messages[index], HumanMessage):
+            return messages[index + 1:]
+    return messages
+
+
+# Graph nodes whose messages are streamed to clients: the model's replies and the tool results
+STREAMED_NODES = ("agent", "tools")
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class AgentServer:
+    """
+    Holds the agent and the concurrency controls, and handles the requests.
+    """
+
+    def __init__(
+        self,
+        settings: Optional[ServerSettings] = None,
+        agent_factory: Optional[Callable[[ServerSettings], Any]] = None,
+        authenticate: Optional[Callable[[Request], Awaitable[Optional[str]]]] = None,
+    ):
+        """
+        Initialize the server state; the agent is created on startup.
+
+        Args:
+            settings: The server settings. If None, will use ServerSettings.from_env().
+            agent_factory: Creates the agent from the settings. If None, default_agent_factory is used.
+            authenticate: Returns the user a request is authenticated as, or None to reject it.
+                If None, ApiKeyAuth() is used.
+        """
+        if settings is None:
+            settings = ServerSettings.from_env()
+        self.settings = settings
+        self.agent_factory = agent_factory or default_agent_factory
+        self.authenticate = authenticate or ApiKeyAuth()
+        self.agent = None
+        self.owners = None
+        self.warm = False
+        self.thread_locks = ThreadLocks()
+        self.admission = AdmissionController(
+            max_concurrency=settings.max_concurrency,
+            max_queue=settings.max_queue,
+            queue_timeout=settings.queue_timeout,
+        )
+
+    @asynccontextmanager
+    async def lifespan(self, app: Starlette) -> AsyncIterator[None]:
+        """Create and warm up the agent on startup and close its pools on shutdown."""
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=self.settings.executor_workers, thread_name_prefix="agent-server")
+        loop.set_default_executor(executor)
+
+        # The constructor connects and checks the schema; keep it off the event loop
+        self.agent = await asyncio.to_thread(self.agent_factory, self.settings)
+        await self.agent.aopen()
+        self.owners = ThreadOwners(self.agent.async_store)
+        if self.settings.warmup:
+            try:
+                await self.agent.llm.ainvoke("ping")
+            except Exception as e:
+                print(f"Error warming up the model: {str(e)}")
+        self.warm = True
+        try:
+            yield
+        finally:
+            self.warm = False
+            await self.agent.aclose()
+            await asyncio.to_thread(self.agent.pool.close)
+            executor.shutdown(wait=False)
+
+    async def _admit(self, thread_id: str, user_id: str) -> Optional[JSONResponse]:
+        """Take the thread's lock and a run slot, or return the error response."""
+        try:
+            await self.thread_locks.acquire(thread_id, timeout=self.settings.thread_lock_timeout)
+        except ThreadBusy as e:
+            return JSONResponse({"error": str(e)}, status_code=409)
+        try:
+            owned = await self.owners.claim(thread_id, user_id)
+        except Exception as e:
+            self.thread_locks.release(thread_id)
+            print(f"Error checking the owner of thread {thread_id}: {str(e)}")
+            return JSONResponse({"error": "Could not check thread owner"}, status_code=500)
+        if not owned:
+            # Same response as an unknown route, so other users' thread IDs are not revealed
+            self.thread_locks.release(thread_id)
+            return JSONResponse({"error": "Not Found"}, status_code=404)
+        try:
+            await self.admission.acquire()
+        except Overloaded as e:
+            self.thread_locks.release(thread_id)
+            return JSONResponse(
+                {"error": str(e)},
+                status_code=503,
+                headers={"Retry-After": str(max(1, int(self.settings.queue_timeout)))},
+            )
+        return None
+
+    def _release(self, thread_id: str) -> None:
+        self.admission.release()
+        self.thread_locks.release(thread_id)
+
+    async def _parse(self, request: Request):
+        """Authenticate the request and parse its body; returns (user_id, messages) or (None, error response)."""
+        user_id = await self.authenticate(request)
+        if user_id is None:
+            return None, JSONResponse(
+                {"error": "Unauthorized"}, status_code=401, headers={"WWW-Authenticate": "Bearer"}
+            )
+        try:
+            body = TurnRequest.model_validate(await request.json())
+            return user_id, body.input_messages()
+        except json.JSONDecodeError:
+            return None, JSONResponse({"error": "Body must be JSON"}, status_code=400)
+        except ValidationError as e:
+            return None, JSONResponse({"error": e.errors(include_url=False)}, status_code=422)
+        except ValueError as e:
+            return None, JSONResponse({"error": str(e)}, status_code=422)
+
+    async def invoke(self, request: Request) -> JSONResponse:
+        """Run one turn on a thread and return this turn's messages."""
+        thread_id = request.path_params["thread_id"]
+        user_id, messages = await self._parse(request)
+        if user_id is None:
+            return messages
+
+        error = await self._admit(thread_id, user_id)
+        if error is not None:
+            return error
+        start = time.perf_counter()
+        try:
+            result = await self.agent.ainvoke(messages, thread_id=thread_id, user_id=user_id)
+        except Exception as e:
+            print(f"Error invoking agent on thread {thread_id}: {str(e)}")
+            return JSONResponse({"error": "Agent run failed"}, status_code=500)
+        finally:
+            self._release(thread_id)
+
+        output = _turn_messages(result["messages"])
+        return JSONResponse({
+            "thread_id": thread_id,
+            "output": output[-1].content if output else "",
+            "messages": [serialize_message(message) for message in output],
+            "seconds": time.perf_counter() - start,
+        })
+
+    async def stream(self, request: Request):
+        """Run one turn on a thread and stream tokens, tool results and the end of the turn as SSE."""
+        thread_id = request.path_params["thread_id"]
+        user_id, messages = await self._parse(request)
+        if user_id is None:
+            return messages
+
+        error = await self._admit(thread_id, user_id)
+        if error is not None:
+            return error
+
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                self._release(thread_id)
+
+        async def events() -> AsyncIterator[str]:
+            try:
+                async for message, metadata in self.agent.astream(
+                    messages, thread_id=thread_id, user_id=user_id, stream_mode="messages"
+                ):
+                    # Only the agent's replies and tool results; not e.g. the history summarizer
+                    node = metadata.get("langgraph_node")
+                    if node not in STREAMED_NODES:
+                        continue
+                    if isinstance(message, AIMessageChunk):
+                        if message.content:
+                            yield _sse("token", {"content": message.content, "node": node})
+                        if message.tool_call_chunks:
+                            yield _sse("tool_call", {"tool_call_chunks": message.tool_call_chunks})
+                    else:
+                        yield _sse("message", serialize_message(message))
+                yield _sse("done", {"thread_id": thread_id})
+            except Exception as e:
+                print(f"Error streaming agent on thread {thread_id}: {str(e)}")
+                yield _sse("error", {"error": "Agent run failed"})
+            finally:
+                release()
+
+        # The background task releases the slot if the client disconnects before streaming starts
+        return StreamingResponse(
+            events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            background=BackgroundTask(release),
+        )
+
+    async def healthz(self, request: Request) -> JSONResponse:
+        """Liveness probe."""
+        return JSONResponse({"status": "ok"})
+
+    async def readyz(self, request: Request) -> JSONResponse:
+        """Readiness probe: agent warm, database reachable, admission queue not full."""
+        checks = {"agent_warm": self.warm, "database": False, "accepting": not self.admission.saturated}
+        pool = self.agent.async_pool if self.agent is not None else None
+        if pool is not None:
+            try:
+                async with asyncio.timeout(self.settings.ready_timeout):
+                    async with pool.connection() as conn:
+                        await conn.execute("SELECT 1")
+                checks["database"] = True
+            except Exception as e:
+                print(f"Readiness check failed: {str(e)}")
+
+        ready = all(checks.values())
+        body = {"status": "ready" if ready else "not ready", "checks": checks, "admission": self.admission.stats()}
+        if self.agent is not None and self.warm:
+            body["pools"] = self.agent.pool_stats()
+        return JSONResponse(body, status_code=200 if ready else 503)
+
+
+def create_app(
+    settings: Optional[ServerSettings] = None,
+    agent_factory: Optional[Callable[[ServerSettings], Any]] = None,
+    authenticate: Optional[Callable[[Request], Awaitable[Optional[str]]]] = None,
+) -> Starlette:
+    """
+    Create the ASGI application.
+
+    Args:
+        settings: The server settings. If None, will use ServerSettings.from_env().
+        agent_factory: Creates the agent from the settings. If None, a PostgresMemoryAgent
+            is created, with FakeChatModel when settings.fake_llm is set.
+        authenticate: Returns the user a request is authenticated as, or None to reject it.
+            If None, bearer tokens are checked against SERVER_API_KEYS.
+
+    Returns:
+        The Starlette application
+    """
+    server = AgentServer(settings=settings, agent_factory=agent_factory, authenticate=authenticate)
+    app = Starlette(
+        routes=[
+            Route("/v1/threads/{thread_id}/invoke", server.invoke, methods=["POST"]),
+            Route("/v1/threads/{thread_id}/stream", server.stream, methods=["POST"]),
+            Route("/healthz", server.healthz, methods=["GET"]),
+            Route("/readyz", server.readyz, methods=["GET"]),
+        ],
+        lifespan=server.lifespan,
+    )
+    app.state.server = server
+    return app
@@ -0,0 +1,114 @@
+"""
+Authentication and thread ownership for the agent server.
+
+The user a request acts for comes from its credentials, never from the
+request body: ApiKeyAuth maps bearer tokens to user IDs. Each conversation
+thread belongs to the user who started it. ThreadOwners records the owner
+in the agent's store on the first turn and rejects other users afterwards,
+so a caller can neither continue nor read another user's thread, and the
+user_id passed to the agent (and so the memory namespace) is always the
+authenticated one.
+"""
+
+from typing import Dict, Optional, Tuple
+
+from starlette.requests import Request
+
+from src.utils.env_utils import get_env_var
+from src.utils.memory_namespaces import validate_user_id
+
+OWNER_NAMESPACE = ("thread_owners",)
+
+
+def parse_api_keys(value: Optional[str]) -> Dict[str, str]:
+    """
+    Parse API keys given as "token:user_id" pairs separated by commas.
+
+    Args:
+        value: The API keys, e.g. "k1:alice,k2:bob"
+
+    Returns:
+        A dictionary mapping each token to its user ID
+
+    Raises:
+        ValueError: If a pair has no token, or a user ID that is empty or contains "."
+            (user IDs are memory namespace labels)
+    """
+    keys = {}
+    for pair in (value or "").split(","):
+        if not pair.strip():
+            continue
+        token, _, user_id = pair.strip().partition(":")
+        if not token:
+            raise ValueError(f"Invalid API key {pair.strip()!r}: expected token:user_id")
+        keys[token] = validate_user_id(user_id)
+    return keys
+
+
+class ApiKeyAuth:
+    """
+    Authenticates requests by their "Authorization: Bearer <token>" header.
+    """
+
+    def __init__(self, api_keys: Optional[Dict[str, str]] = None):
+        """
+        Initialize the authenticator.
+
+        Args:
+            api_keys: A dictionary mapping tokens to user IDs. If None, will use
+                SERVER_API_KEYS ("token:user_id,...") from environment.
+        """
+        if api_keys is None:
+            api_keys = parse_api_keys(get_env_var("SERVER_API_KEYS"))
+        self.api_keys = api_keys
+
+    async def __call__(self, request: Request) -> Optional[str]:
+        """
+        Get the user a request is authenticated as.
+
+        Args:
+            request: The incoming request
+
+        Returns:
+            The user ID, or None if the request has no valid token
+        """
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer":
+            return None
+        return self.api_keys.get(token.strip())
+
+
+class ThreadOwners:
+    """
+    Records which user owns each conversation thread, in the agent's store.
+    """
+
+    def __init__(self, store, namespace: Tuple[str, ...] = OWNER_NAMESPACE):
+        """
+        Initialize the owner registry.
+
+        Args:
+            store: The async-capable store the owners are kept in
+            namespace: The store namespace holding the owners
+        """
+        self.store = store
+        self.namespace = namespace
+
+    async def claim(self, thread_id: str, user_id: str) -> bool:
+        """
+        Check that a user may use a thread, making them its owner if it has none.
+
+        Call it while holding the thread's lock, so two users cannot both claim a new thread.
+
+        Args:
+            thread_id: The ID of the conversation thread
+            user_id: The authenticated user
+
+        Returns:
+            True if the user owns the thread
+        """
+        item = await self.store.aget(self.namespace, thread_id)
+        if item is None:
+            await self.store.aput(self.namespace, thread_id, {"user_id": user_id}, index=False)
+            return True
+        return item.value.get("user_id") == user_id
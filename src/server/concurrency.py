@@ -0,0 +1,148 @@
+"""
+Request serialization and admission control for the agent server.
+
+ThreadLocks gives every conversation thread its own asyncio lock, so two
+requests on the same thread_id run one after the other instead of both
+reading the same checkpoint and writing conflicting successors. The locks are
+per process; run one server process per set of threads, or route by thread_id,
+when scaling out.
+
+AdmissionController bounds how many agent runs execute at once and how many
+wait for a slot. Requests beyond the queue, or that wait longer than the
+queue timeout, are rejected straight away, so a burst returns 503s instead of
+piling up connections and model calls until everything times out.
+"""
+
+import asyncio
+from typing import Any, Dict, Optional
+
+
+class ThreadBusy(Exception):
+    """Raised when a thread's lock is not acquired within the timeout."""
+
+
+class Overloaded(Exception):
+    """Raised when a request is not admitted."""
+
+
+class ThreadLocks:
+    """
+    One asyncio lock per conversation thread, dropped once nobody holds or awaits it.
+    """
+
+    def __init__(self):
+        """Initialize the lock table."""
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._users: Dict[str, int] = {}
+
+    async def acquire(self, thread_id: str, timeout: Optional[float] = None) -> None:
+        """
+        Wait for exclusive use of a thread.
+
+        Args:
+            thread_id: The ID of the conversation thread
+            timeout: The maximum number of seconds to wait. If None, wait forever.
+
+        Raises:
+            ThreadBusy: If the lock was not acquired within the timeout
+        """
+        lock = self._locks.setdefault(thread_id, asyncio.Lock())
+        self._users[thread_id] = self._users.get(thread_id, 0) + 1
+        try:
+            await asyncio.wait_for(lock.acquire(), timeout)
+        except asyncio.TimeoutError:
+            self._forget(thread_id)
+            raise ThreadBusy(f"Thread {thread_id} is busy")
+        except BaseException:
+            self._forget(thread_id)
+            raise
+
+    def release(self, thread_id: str) -> None:
+        """
+        Release a thread acquired with acquire().
+
+        Args:
+            thread_id: The ID of the conversation thread
+        """
+        self._locks[thread_id].release()
+        self._forget(thread_id)
+
+    def _forget(self, thread_id: str) -> None:
+        self._users[thread_id] -= 1
+        if self._users[thread_id] == 0:
+            del self._users[thread_id]
+            del self._locks[thread_id]
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+
+class AdmissionController:
+    """
+    Bounds concurrent agent runs and the queue of requests waiting for one.
+    """
+
+    def __init__(self, max_concurrency: int = 64, max_queue: int = 256, queue_timeout: float = 10.0):
+        """
+        Initialize the admission controller.
+
+        Args:
+            max_concurrency: The maximum number of agent runs executing at once
+            max_queue: The maximum number of requests waiting for a run slot
+            queue_timeout: The maximum number of seconds a request waits for a slot
+        """
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self.running = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    async def acquire(self) -> None:
+        """
+        Wait for a run slot.
+
+        Raises:
+            Overloaded: If the queue is full or no slot frees up within the queue timeout
+        """
+        if self._slots.locked() and self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise Overloaded("Too many requests waiting")
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise Overloaded(f"No run slot within {self.queue_timeout}s")
+        finally:
+            self.waiting -= 1
+        self.running += 1
+        self.admitted += 1
+
+    def release(self) -> None:
+        """Release a slot acquired with acquire()."""
+        self.running -= 1
+        self._slots.release()
+
+    @property
+    def saturated(self) -> bool:
+        """Whether new requests would be rejected right now."""
+        return self._slots.locked() and self.waiting >= self.max_queue
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the admission counters.
+
+        Returns:
+            A dictionary of running and waiting requests and admitted/rejected totals
+        """
+        return {
+            "running": self.running,
+            "waiting": self.waiting,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
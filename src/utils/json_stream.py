@@ -0,0 +1,113 @@
+"""
+Incremental parsing of a JSON array from streamed LLM output.
+
+Extraction responses are a JSON array of memory objects, usually surrounded by
+some text or a code fence. Waiting for the whole response and parsing it in one
+go means nothing can be used until generation ends, and a single malformed or
+truncated element loses the whole response. The JsonArrayStreamParser scans
+the text as it arrives and returns each array element as soon as its closing
+bracket is seen; an element that fails to parse is skipped on its own.
+"""
+
+import json
+from typing import Any, List
+
+
+class JsonArrayStreamParser:
+    """
+    Parses the elements of the first JSON array in a stream of text chunks.
+
+    Each character is scanned once, tracking nesting depth and string state, so
+    the cost is linear in the length of the response.
+    """
+
+    def __init__(self):
+        """Initialize the parser before the start of the array."""
+        self._text = ""
+        self._pos = 0
+        self._element_start = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self.started = False
+        self.done = False
+        self.errors: List[str] = []
+
+    @property
+    def pending(self) -> bool:
+        """True if the text seen so far ends inside an unfinished element."""
+        return self._element_start is not None
+
+    def feed(self, chunk: str) -> List[Any]:
+        """
+        Add a chunk of text and return the array elements it completed.
+
+        Args:
+            chunk: The next piece of the response text
+
+        Returns:
+            The elements completed by this chunk, in order
+        """
+        elements: List[Any] = []
+        if self.done:
+            return elements
+
+        text = self._text + chunk
+        i = self._pos
+        while i < len(text) and not self.done:
+            c = text[i]
+            if not self.started:
+                self.started = c == "["
+                i += 1
+                continue
+
+            if self._element_start is None:
+                if c in " \t\r\n,":
+                    i += 1
+                    continue
+                if c == "]":
+                    self.done = True
+                    i += 1
+                    break
+                self._element_start = i
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+            elif c == '"':
+                self._in_string = True
+            elif c in "{[":
+                self._depth += 1
+            elif c in "}]":
+                if self._depth == 0:
+                    # The array closed right after a scalar element
+                    self._emit(text[self._element_start:i], elements)
+                    self.done = True
+                    i += 1
+                    break
+                self._depth -= 1
+                if self._depth == 0:
+                    self._emit(text[self._element_start:i + 1], elements)
+            elif c == "," and self._depth == 0:
+                self._emit(text[self._element_start:i], elements)
+            i += 1
+
+        # Keep only the unfinished element, so the buffer stays small
+        keep_from = self._element_start if self._element_start is not None else i
+        self._text = text[keep_from:]
+        self._pos = i - keep_from
+        if self._element_start is not None:
+            self._element_start = 0
+        return elements
+
+    def _emit(self, raw: str, elements: List[Any]) -> None:
+        self._element_start = None
+        try:
+            elements.append(json.loads(raw))
+        except json.JSONDecodeError as e:
+            self.errors.append(f"{e}: {raw[:200]}")
+
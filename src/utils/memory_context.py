@@ -0,0 +1,134 @@
+"""
+Token-budgeted rendering of memories for the system prompt.
+
+The prompt functions used to interpolate the Python repr of the search results,
+so every ReAct step paid for keys, timestamps and namespaces, and the system
+prompt grew with the number of memories. The MemoryContextBuilder renders each
+memory as one compact line, keeps the highest-scoring ones first and stops once
+a token budget is spent.
+"""
+
+import json
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from langgraph.store.base import Item
+
+from src.utils.memory_dedup import VOLATILE_FIELDS
+
+
+# Rough characters per token for English text with the Claude and GPT tokenizers
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=16384)
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens in a text without running a tokenizer.
+
+    Args:
+        text: The text to measure
+
+    Returns:
+        The estimated token count, rounded up
+    """
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def render_memory(value: Dict[str, Any]) -> str:
+    """
+    Render a stored memory value as a single compact line.
+
+    Args:
+        value: The memory value as stored by the manage_memory tool or the extractors
+
+    Returns:
+        The memory's content without ids, timestamps or JSON punctuation
+    """
+    content = value.get("content", value)
+    if isinstance(content, dict):
+        return "; ".join(
+            f"{name}: {field}" for name, field in content.items()
+            if name not in VOLATILE_FIELDS and field not in (None, "")
+        )
+    if isinstance(content, str):
+        return " ".join(content.split())
+    return json.dumps(content, separators=(",", ":"), default=str)
+
+
+class MemoryContextBuilder:
+    """
+    Renders search results into prompt text within a token budget.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 1000,
+        max_item_tokens: int = 200,
+        render_fn: Callable[[Dict[str, Any]], str] = render_memory,
+    ):
+        """
+        Initialize the context builder.
+
+        Args:
+            token_budget: The maximum estimated tokens of rendered memories
+            max_item_tokens: Longer memories are truncated to this many tokens
+            render_fn: Renders a memory value as one line of text
+        """
+        self.token_budget = token_budget
+        self.max_item_tokens = max_item_tokens
+        self.render_fn = render_fn
+
+    def build(self, items: Iterable[Item]) -> str:
+        """
+        Render the best memories that fit in the token budget.
+
+        Args:
+            items: Search results, in any order
+
+        Returns:
+            One "- memory" line per included memory, highest score first
+        """
+        return self.build_sections({"": items})[""]
+
+    def build_sections(self, sections: Dict[str, Iterable[Item]]) -> Dict[str, str]:
+        """
+        Render several groups of memories that share one token budget.
+
+        Memories are ranked across all groups, so a group with weak matches
+        does not take budget from one with strong matches.
+
+        Args:
+            sections: A dictionary mapping section names to search results
+
+        Returns:
+            A dictionary mapping each section name to its rendered memories
+        """
+        ranked: List[Tuple[float, str, str]] = []
+        for name, items in sections.items():
+            for item in items:
+                score = getattr(item, "score", None)
+                ranked.append((score if score is not None else float("-inf"), name, self._line(item)))
+        ranked.sort(key=lambda entry: entry[0], reverse=True)
+
+        lines: Dict[str, List[str]] = {name: [] for name in sections}
+        seen = set()
+        used = 0
+        for _, name, line in ranked:
+            if not line or line in seen:
+                continue
+            cost = estimate_tokens(line)
+            if used + cost > self.token_budget:
+                continue
+            seen.add(line)
+            lines[name].append(line)
+            used += cost
+        return {name: "\n".join(section) for name, section in lines.items()}
+
+    def _line(self, item: Item) -> str:
+        text = self.render_fn(item.value)
+        max_chars = self.max_item_tokens * CHARS_PER_TOKEN
+        if len(text) > max_chars:
+            text = text[:max_chars - 3].rstrip() + "..."
+        return f"- {text}" if text else ""
+
@@ -0,0 +1,225 @@
+"""
+Near-duplicate suppression for extracted memories.
+
+Every extraction used to insert each memory under a fresh uuid, so facts the
+user repeats ("prefers dark mode") piled up as near-identical rows. The
+MemoryDeduplicator runs before the writes: it collapses near-duplicates within
+the batch, then looks up the nearest stored neighbours of all remaining
+candidates in a single store batch and turns a candidate into an update of the
+matching memory when the similarity is above a threshold.
+"""
+
+import json
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langgraph.store.base import BaseStore, SearchOp
+
+from src.utils.memory_namespaces import in_namespace
+from src.utils.memory_writes import MemoryWrite
+
+
+# Content fields that differ between copies of the same memory
+VOLATILE_FIELDS = ("id", "timestamp")
+
+
+def memory_text(value: Dict[str, Any]) -> str:
+    """
+    Build the text a memory value is compared by, ignoring ids and timestamps.
+
+    Args:
+        value: The memory value as written to the store
+
+    Returns:
+        A stable JSON rendering of the value
+    """
+    value = dict(value)
+    content = value.get("content")
+    if isinstance(content, dict):
+        value["content"] = {k: v for k, v in content.items() if k not in VOLATILE_FIELDS}
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+def merge_memories(existing: Dict[str, Any], candidate: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Merge a new memory into the stored memory it duplicates.
+
+    Newer text fields win, numeric scores such as importance keep the highest
+    value, the stored memory keeps its id, and a mention counter is kept.
+
+    Args:
+        existing: The stored memory value
+        candidate: The newly extracted memory value
+
+    Returns:
+        The merged value to write under the existing key
+    """
+    merged = {**existing, **candidate}
+    old_content = existing.get("content")
+    new_content = candidate.get("content")
+    if isinstance(old_content, dict) and isinstance(new_content, dict):
+        content = {**old_content, **new_content}
+        for name, old in old_content.items():
+            new = new_content.get(name)
+            if isinstance(old, (int, float)) and isinstance(new, (int, float)):
+                content[name] = max(old, new)
+        if "id" in old_content:
+            content["id"] = old_content["id"]
+        merged["content"] = content
+    merged["mentions"] = existing.get("mentions", 1) + candidate.get("mentions", 1)
+    return merged
+
+
+@dataclass
+class DedupStats:
+    """Counts from one or more deduplication passes."""
+
+    candidates: int = 0
+    inserted: int = 0
+    merged: int = 0
+    collapsed: int = 0
+    bytes_saved: int = 0
+    by_namespace: Dict[Tuple[str, ...], int] = field(default_factory=dict)
+
+    def add(self, other: "DedupStats") -> None:
+        """Accumulate another pass into these totals."""
+        self.candidates += other.candidates
+        self.inserted += other.inserted
+        self.merged += other.merged
+        self.collapsed += other.collapsed
+        self.bytes_saved += other.bytes_saved
+        for namespace, count in other.by_namespace.items():
+            self.by_namespace[namespace] = self.by_namespace.get(namespace, 0) + count
+
+
+class MemoryDeduplicator:
+    """
+    Turns a batch of memory writes into inserts, merges and drops.
+    """
+
+    def __init__(
+        self,
+        store: BaseStore,
+        threshold: float = 0.9,
+        neighbours: int = 3,
+        embed_fn: Optional[Callable[[List[str]], List[List[float]]]] = None,
+        text_fn: Callable[[Dict[str, Any]], str] = memory_text,
+        merge_fn: Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]] = merge_memories,
+    ):
+        """
+        Initialize the deduplicator.
+
+        Args:
+            store: The store the memories are written to
+            threshold: The similarity at or above which two memories are duplicates
+            neighbours: How many stored neighbours to compare each candidate with
+            embed_fn: Optional batch embedding function used to find near-duplicates
+                within a batch. Without it only identical texts are collapsed.
+            text_fn: Renders a memory value as the text to compare
+            merge_fn: Merges a candidate into the stored memory it duplicates
+        """
+        self.store = store
+        self.threshold = threshold
+        self.neighbours = neighbours
+        self.embed_fn = embed_fn
+        self.text_fn = text_fn
+        self.merge_fn = merge_fn
+        self.totals = DedupStats()
+        self._totals_lock = threading.Lock()
+
+    def deduplicate(self, writes: Sequence[MemoryWrite]) -> Tuple[List[MemoryWrite], DedupStats]:
+        """
+        Deduplicate a batch of memory writes against each other and the store.
+
+        Args:
+            writes: The (namespace, key, value) writes produced by one extraction
+
+        Returns:
+            A tuple of (writes to apply, stats for this batch). Writes that
+            duplicate a stored memory are rewritten to update that memory's key.
+        """
+        stats = DedupStats(candidates=len(writes))
+        if not writes:
+            return [], stats
+
+        texts = [self.text_fn(value) for _, _, value in writes]
+        writes, kept = self._collapse_batch(list(writes), texts, stats)
+
+        # One batched nearest-neighbour search for every remaining candidate
+        ops = [
+            SearchOp(namespace_prefix=tuple(writes[i][0]), query=texts[i], limit=self.neighbours)
+            for i in kept
+        ]
+        results = self.store.batch(ops)
+
+        output: List[MemoryWrite] = []
+        merged_keys: Dict[Tuple[Tuple[str, ...], str], int] = {}
+        for i, hits in zip(kept, results):
+            namespace, key, value = writes[i]
+            best = max(
+                # Only the write's own namespace; a prefix search can return other users' items
+                (hit for hit in in_namespace(hits, namespace) if hit.score is not None),
+                key=lambda hit: hit.score,
+                default=None,
+            )
+            if best is None or best.score < self.threshold:
+                output.append((namespace, key, value))
+                stats.inserted += 1
+                continue
+
+            # Merge into the stored memory, or into an earlier merge into it
+            target = (tuple(namespace), best.key)
+            if target in merged_keys:
+                index = merged_keys[target]
+                previous = output[index][2]
+                output[index] = (namespace, best.key, self.merge_fn(previous, value))
+            else:
+                merged_keys[target] = len(output)
+                output.append((namespace, best.key, self.merge_fn(best.value, value)))
+            stats.merged += 1
+            stats.bytes_saved += len(texts[i].encode("utf-8"))
+            stats.by_namespace[tuple(namespace)] = stats.by_namespace.get(tuple(namespace), 0) + 1
+
+        with self._totals_lock:
+            self.totals.add(stats)
+        return output, stats
+
+    def _collapse_batch(
+        self,
+        writes: List[MemoryWrite],
+        texts: List[str],
+        stats: DedupStats,
+    ) -> Tuple[List[MemoryWrite], List[int]]:
+        """Fold candidates that duplicate an earlier candidate in the same namespace into it."""
+        if self.embed_fn is not None:
+            vectors = np.asarray(self.embed_fn(texts), dtype=np.float32)
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors /= np.where(norms == 0, 1.0, norms)
+            similarity = vectors @ vectors.T
+        else:
+            similarity = None
+
+        namespaces = [tuple(namespace) for namespace, _, _ in writes]
+        kept: List[int] = []
+        for i in range(len(writes)):
+            duplicate_of = None
+            for j in kept:
+                if namespaces[j] != namespaces[i]:
+                    continue
+                if texts[j] == texts[i] or (similarity is not None and similarity[i, j] >= self.threshold):
+                    duplicate_of = j
+                    break
+            if duplicate_of is None:
+                kept.append(i)
+                continue
+
+            # Fold the duplicate into the candidate it repeats
+            namespace, key, value = writes[duplicate_of]
+            writes[duplicate_of] = (namespace, key, self.merge_fn(value, writes[i][2]))
+            stats.collapsed += 1
+            stats.bytes_saved += len(texts[i].encode("utf-8"))
+            stats.by_namespace[namespaces[i]] = stats.by_namespace.get(namespaces[i], 0) + 1
+
+        return writes, kept
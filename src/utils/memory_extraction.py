@@ -6,33 +6,22 @@ without relying on function calling, which may not be supported by all models.
 """
 
 import json
+import re
 import uuid
-from typing import Dict, List, Any, Type, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Iterator, List, Any, Tuple, Type, Optional
 
 from langchain_aws import ChatBedrockConverse
 from pydantic import BaseModel, ValidationError
 
-def extract_memories(
-    llm: ChatBedrockConverse,
-    messages: List[Dict[str, str]],
-    schema_class: Type[BaseModel],
-    instructions: str,
-    existing_memories: Optional[List[Dict[str, Any]]] = None
-) -> List[Dict[str, Any]]:
-    """
-    Extract structured memories from a conversation using a structured prompt.
+from src.utils.json_stream import JsonArrayStreamParser
 
-    Args:
-        llm: The language model to use for extraction
-        messages: The conversation messages
-        schema_class: The Pydantic model class defining the memory structure
-        instructions: Instructions for memory extraction
-        existing_memories: Optional list of existing memories to consider
+EXTRACTION_MODES = ("sequential", "concurrent", "combined")
 
-    Returns:
-        A list of extracted memories as dictionaries
-    """
-    # Create a schema description from the Pydantic model
+
+def _schema_fields(schema_class: Type[BaseModel]) -> List[Dict[str, Any]]:
+    """Describe the fields of a Pydantic memory schema for the extraction prompt."""
     schema_fields = []
     model_schema = schema_class.model_json_schema()
 
@@ -49,20 +38,89 @@ def extract_memories(
             "default": field_info.get("default", "None")
         })
 
-    # Format the conversation for the prompt
-    conversation_text = "\n".join([
+    return schema_fields
+
+
+def _compact_json(value: Any) -> str:
+    """Serialize a value as JSON without indentation or spaces after separators."""
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+@lru_cache(maxsize=None)
+def _schema_text(schema_class: Type[BaseModel]) -> str:
+    """Render the field description of a memory schema once per schema class."""
+    return _compact_json(_schema_fields(schema_class))
+
+
+def to_extraction_messages(messages: List[Any]) -> List[Dict[str, str]]:
+    """
+    Convert checkpointed chat messages to the role/content dicts used for extraction.
+
+    Tool results and assistant turns that only contain tool calls are dropped,
+    since they carry no conversational content worth remembering.
+
+    Args:
+        messages: LangChain message objects or role/content dicts
+
+    Returns:
+        A list of {"role", "content"} dictionaries
+    """
+    roles = {"human": "user", "ai": "assistant", "system": "system"}
+    converted = []
+    for message in messages:
+        if isinstance(message, dict):
+            converted.append({"role": message["role"], "content": message["content"]})
+            continue
+
+        role = roles.get(getattr(message, "type", ""))
+        if role is None:
+            continue
+        content = message.content
+        if isinstance(content, list):
+            content = "".join(
+                block.get("text", "") if isinstance(block, dict) else str(block) for block in content
+            )
+        if content:
+            converted.append({"role": role, "content": content})
+    return converted
+
+
+def _format_conversation(messages: List[Dict[str, str]]) -> str:
+    """Format conversation messages as ROLE: content lines."""
+    return "\n".join([
         f"{msg['role'].upper()}: {msg['content']}" for msg in messages
     ])
 
-    # Format existing memories if provided
-    existing_memories_text = ""
-    if existing_memories and len(existing_memories) > 0:
-        existing_memories_text = "EXISTING MEMORIES:\n"
-        for i, memory in enumerate(existing_memories):
-            existing_memories_text += f"{i+1}. {json.dumps(memory, indent=2)}\n"
 
-    # Create the prompt
-    prompt = f"""
+def _format_existing_memories(existing_memories: Optional[List[Dict[str, Any]]]) -> str:
+    """Format existing memories as a numbered list for the extraction prompt."""
+    if not existing_memories:
+        return ""
+    lines = [f"{i+1}. {_compact_json(memory)}" for i, memory in enumerate(existing_memories)]
+    return "EXISTING MEMORIES:\n" + "\n".join(lines) + "\n"
+
+
+def _validate_memories(schema_class: Type[BaseModel], extracted_data: List[Any]) -> List[Dict[str, Any]]:
+    """Validate raw memory objects against a schema and give each valid one an ID."""
+    validated_memories = []
+    for memory_data in extracted_data:
+        try:
+            # Create an instance of the schema class to validate
+            memory_instance = schema_class(**memory_data)
+            # Convert to dict and add an ID
+            memory_dict = memory_instance.model_dump()
+            memory_dict["id"] = str(uuid.uuid4())
+            validated_memories.append(memory_dict)
+        except (ValidationError, TypeError) as e:
+            print(f"Validation error for memory: {memory_data}")
+            print(f"Error: {e}")
+    return validated_memories
+
+
+@lru_cache(maxsize=256)
+def _compiled_extraction_prompt(schema_class: Type[BaseModel], instructions: str) -> str:
+    """Render the static head of the single-type extraction prompt once per schema and instructions."""
+    return f"""
 You are a memory extraction system. Your task is to extract structured memories from the conversation below.
 
 INSTRUCTIONS:
@@ -70,36 +128,21 @@ INSTRUCTIONS:
 
 MEMORY SCHEMA:
 The memory should be structured as follows:
-{json.dumps(schema_fields, indent=2)}
+{_schema_text(schema_class)}
 
 IMPORTANT: You must create actual memory objects with real values, not just return the schema fields.
 Each memory object must include all required fields with appropriate values based on the conversation.
 
 Example of a CORRECT memory object:
-```
-{{
-  "task": "Explaining gradient descent",
-  "procedure": "Use a hiking analogy where the hiker is trying to find the lowest point in a valley",
-  "context": "When teaching machine learning concepts to non-technical people",
-  "effectiveness": 5
-}}
-```
+{{"task":"Explaining gradient descent","procedure":"Use a hiking analogy where the hiker is trying to find the lowest point in a valley","context":"When teaching machine learning concepts to non-technical people","effectiveness":5}}
 
 Example of an INCORRECT memory object (just returning schema fields):
-```
-{{
-  "name": "task",
-  "type": "string",
-  "description": "The task or situation this procedure applies to",
-  "required": true
-}}
-```
+{{"name":"task","type":"string","description":"The task or situation this procedure applies to","required":true}}
 
-{existing_memories_text}
+"""
 
-CONVERSATION:
-{conversation_text}
 
+_EXTRACTION_PROMPT_TAIL = """
 Based on this conversation, extract memories that match the schema. Return ONLY a JSON array of memory objects.
 Each memory object should follow the schema exactly. Do not include any explanations or text outside the JSON array.
 If no memories can be extracted, return an empty array [].
@@ -107,46 +150,191 @@ If no memories can be extracted, return an empty array [].
 EXTRACTED MEMORIES (JSON ARRAY):
 """
 
+
+def _build_extraction_prompt(
+    messages: List[Dict[str, str]],
+    schema_class: Type[BaseModel],
+    instructions: str,
+    existing_memories: Optional[List[Dict[str, Any]]] = None
+) -> str:
+    """Build the prompt asking the LLM for a JSON array of memories of one type."""
+    # Only the existing memories and the conversation are formatted per call
+    return (
+        _compiled_extraction_prompt(schema_class, instructions)
+        + _format_existing_memories(existing_memories)
+        + "\nCONVERSATION:\n"
+        + _format_conversation(messages)
+        + "\n"
+        + _EXTRACTION_PROMPT_TAIL
+    )
+
+
+@lru_cache(maxsize=64)
+def _compiled_combined_prompt(schema_classes: Tuple[Type[BaseModel], ...], instructions: str) -> Tuple[str, str]:
+    """Render the static head and tail of the combined extraction prompt once per schema set and instructions."""
+    schema_sections = []
+    for schema_class in schema_classes:
+        schema_name = schema_class.__name__
+        description = " ".join((schema_class.__doc__ or "").split())
+        schema_sections.append(f"""### {schema_name}
+{description}
+Each {schema_name} object should be structured as follows:
+{_schema_text(schema_class)}
+""")
+    schema_text = "\n".join(schema_sections)
+    keys_text = ", ".join(f'"{schema_class.__name__}"' for schema_class in schema_classes)
+
+    head = f"""
+You are a memory extraction system. Your task is to extract structured memories of several types from the conversation below.
+
+INSTRUCTIONS:
+{instructions}
+
+MEMORY TYPES:
+{schema_text}
+
+IMPORTANT: You must create actual memory objects with real values, not just return the schema fields.
+Each memory object must include all required fields of its type with appropriate values based on the conversation.
+
+"""
+    tail = f"""
+Based on this conversation, extract memories of every type above. Return ONLY a JSON object with exactly these keys: {keys_text}.
+The value of each key must be a JSON array of memory objects of that type, following that type's schema exactly.
+Use an empty array for a type when no memories of that type can be extracted.
+Do not include any explanations or text outside the JSON object.
+
+EXTRACTED MEMORIES (JSON OBJECT):
+"""
+    return head, tail
+
+
+def _build_combined_prompt(
+    messages: List[Dict[str, str]],
+    schema_classes: List[Type[BaseModel]],
+    instructions: str,
+    existing_memories: Optional[Dict[str, List[Dict[str, Any]]]] = None
+) -> str:
+    """Build the prompt asking the LLM for a JSON object of memories keyed by type."""
+    head, tail = _compiled_combined_prompt(tuple(schema_classes), instructions)
+
+    # Existing memories of each type, after the static schema descriptions
+    existing_sections = []
+    for schema_class in schema_classes:
+        existing = existing_memories.get(schema_class.__name__, []) if existing_memories else []
+        existing_text = _format_existing_memories(existing)
+        if existing_text:
+            existing_sections.append(f"{schema_class.__name__} {existing_text}")
+    existing_text = "\n".join(existing_sections)
+
+    return (
+        head
+        + (existing_text + "\n" if existing_text else "")
+        + "CONVERSATION:\n"
+        + _format_conversation(messages)
+        + "\n"
+        + tail
+    )
+
+
+def _chunk_text(content: Any) -> str:
+    """Get the text of a streamed message chunk, which may be a string or content blocks."""
+    if isinstance(content, str):
+        return content
+    return "".join(
+        block.get("text", "") if isinstance(block, dict) else str(block) for block in content
+    )
+
+
+def extract_memories(
+    llm: ChatBedrockConverse,
+    messages: List[Dict[str, str]],
+    schema_class: Type[BaseModel],
+    instructions: str,
+    existing_memories: Optional[List[Dict[str, Any]]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Extract structured memories from a conversation using a structured prompt.
+
+    Args:
+        llm: The language model to use for extraction
+        messages: The conversation messages
+        schema_class: The Pydantic model class defining the memory structure
+        instructions: Instructions for memory extraction
+        existing_memories: Optional list of existing memories to consider
+
+    Returns:
+        A list of extracted memories as dictionaries
+    """
+    prompt = _build_extraction_prompt(messages, schema_class, instructions, existing_memories)
+
     # Get the response from the LLM
-    response = llm.invoke(prompt)
-
-    # Extract the JSON array from the response
-    response_text = response.content
-
-    # Try to find and parse the JSON array
-    try:
-        # Look for array start and end
-        start_idx = response_text.find('[')
-        end_idx = response_text.rfind(']') + 1
-
-        if start_idx >= 0 and end_idx > start_idx:
-            json_str = response_text[start_idx:end_idx]
-            extracted_data = json.loads(json_str)
-
-            # Validate each memory against the schema
-            validated_memories = []
-            for memory_data in extracted_data:
-                try:
-                    # Create an instance of the schema class to validate
-                    memory_instance = schema_class(**memory_data)
-                    # Convert to dict and add an ID
-                    memory_dict = memory_instance.model_dump()
-                    memory_dict["id"] = str(uuid.uuid4())
-                    validated_memories.append(memory_dict)
-                except ValidationError as e:
-                    print(f"Validation error for memory: {memory_data}")
-                    print(f"Error: {e}")
-
-            return validated_memories
-        else:
-            print("Could not find JSON array in response")
-            return []
-    except json.JSONDecodeError as e:
-        print(f"Error parsing JSON from response: {e}")
-        print(f"Response text: {response_text}")
+    response_text = _chunk_text(llm.invoke(prompt).content)
+
+    # Parse the JSON array element by element, so one malformed memory does
+    # not discard the others
+    parser = JsonArrayStreamParser()
+    extracted_data = parser.feed(response_text)
+    if not parser.started:
+        print("Could not find JSON array in response")
         return []
+    for error in parser.errors:
+        print(f"Error parsing JSON from response: {error}")
 
-def extract_multiple_memory_types(
+    # Validate each memory against the schema
+    return _validate_memories(schema_class, extracted_data)
+
+
+def extract_memories_stream(
+    llm: ChatBedrockConverse,
+    messages: List[Dict[str, str]],
+    schema_class: Type[BaseModel],
+    instructions: str,
+    existing_memories: Optional[List[Dict[str, Any]]] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Extract structured memories from a conversation, yielding each one as soon as it is generated.
+
+    The response is streamed and its JSON array parsed incrementally, so
+    callers can store memories while the model is still generating, and a
+    truncated response still yields every memory that was completed.
+
+    Args:
+        llm: The language model to use for extraction
+        messages: The conversation messages
+        schema_class: The Pydantic model class defining the memory structure
+        instructions: Instructions for memory extraction
+        existing_memories: Optional list of existing memories to consider
+
+    Yields:
+        Extracted memories as dictionaries, in the order they were generated
+    """
+    prompt = _build_extraction_prompt(messages, schema_class, instructions, existing_memories)
+
+    parser = JsonArrayStreamParser()
+    for chunk in llm.stream(prompt):
+        for memory_data in parser.feed(_chunk_text(chunk.content)):
+            yield from _validate_memories(schema_class, [memory_data])
+        if parser.done:
+            # The array is closed; anything after it is commentary
+            break
+
+    for error in parser.errors:
+        print(f"Error parsing JSON from response: {error}")
+    if not parser.started:
+        print("Could not find JSON array in response")
+    elif parser.pending:
+        print("Response ended inside a memory object; kept the memories completed before it")
+
+
+def _section_array(response_text: str, schema_name: str) -> Optional[str]:
+    """Get the text from the start of a memory type's array in a combined response, or None."""
+    match = re.search(rf'"{re.escape(schema_name)}"\s*:\s*\[', response_text)
+    if match is None:
+        return None
+    return response_text[match.end() - 1:]
+
+
+def extract_combined_memory_types(
     llm: ChatBedrockConverse,
     messages: List[Dict[str, str]],
     schema_classes: List[Type[BaseModel]],
@@ -154,7 +342,12 @@ def extract_multiple_memory_types(
     existing_memories: Optional[Dict[str, List[Dict[str, Any]]]] = None
 ) -> Dict[str, List[Dict[str, Any]]]:
     """
-    Extract multiple types of structured memories from a conversation.
+    Extract several memory types from a conversation with a single LLM call.
+
+    The conversation and instructions are sent once, and the model returns one
+    JSON object keyed by memory type. Each section's array is parsed element by
+    element and validated against its own schema class, so a missing or
+    malformed section, or a malformed memory, only loses itself.
 
     Args:
         llm: The language model to use for extraction
@@ -166,15 +359,73 @@ def extract_multiple_memory_types(
     Returns:
         A dictionary mapping memory types to lists of extracted memories
     """
-    results = {}
+    schema_names = [schema_class.__name__ for schema_class in schema_classes]
+    prompt = _build_combined_prompt(messages, schema_classes, instructions, existing_memories)
+
+    response_text = _chunk_text(llm.invoke(prompt).content)
+    results = {schema_name: [] for schema_name in schema_names}
 
     for schema_class in schema_classes:
+        section = _section_array(response_text, schema_class.__name__)
+        if section is None:
+            print(f"Could not find a JSON array for {schema_class.__name__} in response")
+            continue
+
+        # Parse the section element by element, as in extract_memories
+        parser = JsonArrayStreamParser()
+        extracted_data = parser.feed(section)
+        for error in parser.errors:
+            print(f"Error parsing {schema_class.__name__} JSON from response: {error}")
+        results[schema_class.__name__] = _validate_memories(schema_class, extracted_data)
+
+    return results
+
+
+def extract_multiple_memory_types(
+    llm: ChatBedrockConverse,
+    messages: List[Dict[str, str]],
+    schema_classes: List[Type[BaseModel]],
+    instructions: str,
+    existing_memories: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+    mode: str = "sequential",
+    max_concurrency: int = 4
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Extract multiple types of structured memories from a conversation.
+
+    Args:
+        llm: The language model to use for extraction
+        messages: The conversation messages
+        schema_classes: List of Pydantic model classes defining the memory structures
+        instructions: Instructions for memory extraction
+        existing_memories: Optional dictionary of existing memories by type
+        mode: How to call the LLM. "sequential" makes one call per type in turn,
+            "concurrent" makes one call per type in parallel, and "combined" makes a
+            single call that returns every type at once.
+        max_concurrency: The maximum number of parallel calls in "concurrent" mode
+
+    Returns:
+        A dictionary mapping memory types to lists of extracted memories
+    """
+    if mode not in EXTRACTION_MODES:
+        raise ValueError(f"Unknown extraction mode: {mode}. Expected one of {EXTRACTION_MODES}")
+
+    if mode == "combined":
+        return extract_combined_memory_types(
+            llm=llm,
+            messages=messages,
+            schema_classes=schema_classes,
+            instructions=instructions,
+            existing_memories=existing_memories
+        )
+
+    def extract_one(schema_class: Type[BaseModel]) -> List[Dict[str, Any]]:
         schema_name = schema_class.__name__
         existing = existing_memories.get(schema_name, []) if existing_memories else []
 
         schema_instructions = f"{instructions}\nExtract memories of type: {schema_name}"
 
-        extracted = extract_memories(
+        return extract_memories(
             llm=llm,
             messages=messages,
             schema_class=schema_class,
@@ -182,6 +433,13 @@ def extract_multiple_memory_types(
             existing_memories=existing
         )
 
-        results[schema_name] = extracted
+    if mode == "concurrent":
+        with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(schema_classes)))) as executor:
+            extracted = list(executor.map(extract_one, schema_classes))
+    else:
+        extracted = [extract_one(schema_class) for schema_class in schema_classes]
 
-    return results
+    return {
+        schema_class.__name__: memories
+        for schema_class, memories in zip(schema_classes, extracted)
+    }
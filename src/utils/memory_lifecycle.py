@@ -0,0 +1,407 @@
+"""
+Retention policies and incremental compaction for memory namespaces.
+
+Nothing used to delete memories, so namespaces grew without bound and search
+latency grew with them. A RetentionPolicy gives a namespace a TTL, a maximum
+item count, or both. When a namespace is over its cap, the MemoryCompactor
+evicts the lowest-scoring memories, where the score combines the memory's own
+importance/effectiveness, its recency and how often it has been retrieved.
+Compaction pages through a namespace and deletes in small batches, so each
+store call is short and readers are never locked out for long.
+
+A store search matches a namespace prefix, so it also returns every namespace
+below it, and it pages by offset over items ordered by update time, which
+skips or repeats items that are written while the scan runs. On a
+PostgresStore the compactor instead reads exactly one namespace, paging on
+the item key; other stores fall back to search, skipping child namespaces and
+keys already seen.
+"""
+
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from langgraph.store.base import BaseStore, Item, PutOp
+
+try:
+    from langgraph.store.postgres import PostgresStore
+except ImportError:
+    PostgresStore = None
+
+
+Namespace = Tuple[str, ...]
+
+# One page of a namespace's items, after the last key of the previous page
+NAMESPACE_PAGE_SQL = """
+SELECT key, value, created_at, updated_at
+FROM store
+WHERE prefix = %s AND key > %s
+ORDER BY key
+LIMIT %s
+"""
+
+
+@dataclass
+class RetentionPolicy:
+    """How long, and how many, memories a namespace keeps."""
+
+    ttl_seconds: Optional[float] = None
+    max_items: Optional[int] = None
+    importance_weight: float = 0.5
+    recency_weight: float = 0.3
+    frequency_weight: float = 0.2
+    recency_half_life_seconds: float = 7 * 24 * 3600
+    importance_fields: Sequence[str] = ("importance", "effectiveness")
+    importance_scale: float = 5.0
+
+
+@dataclass
+class CompactionReport:
+    """What one compaction pass did to a namespace."""
+
+    namespace: Namespace
+    scanned: int = 0
+    expired: int = 0
+    evicted: int = 0
+    bytes_reclaimed: int = 0
+    seconds: float = 0.0
+    dry_run: bool = False
+    evicted_keys: List[str] = field(default_factory=list)
+
+
+class AccessTracker:
+    """
+    Counts how often each memory is retrieved.
+
+    Pass it to the retrieval helpers so eviction can favour memories that are
+    actually used. Counts are kept in process memory.
+    """
+
+    def __init__(self):
+        """Initialize an empty tracker."""
+        self._counts: Dict[Tuple[Namespace, str], Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, items: Iterable[Item]) -> None:
+        """
+        Record that memories were retrieved.
+
+        Args:
+            items: The retrieved store items
+        """
+        now = time.time()
+        with self._lock:
+            for item in items:
+                key = (tuple(item.namespace), item.key)
+                count, _ = self._counts.get(key, (0, now))
+                self._counts[key] = (count + 1, now)
+
+    def get(self, namespace: Namespace, key: str) -> Tuple[int, Optional[float]]:
+        """
+        Get the retrieval count and last retrieval time of a memory.
+
+        Args:
+            namespace: The memory's namespace
+            key: The memory's key
+
+        Returns:
+            A tuple of (count, last access as a UNIX timestamp or None)
+        """
+        with self._lock:
+            return self._counts.get((tuple(namespace), key), (0, None))
+
+    def forget(self, namespace: Namespace, keys: Iterable[str]) -> None:
+        """
+        Drop the counts of deleted memories.
+
+        Args:
+            namespace: The memories' namespace
+            keys: The deleted keys
+        """
+        with self._lock:
+            for key in keys:
+                self._counts.pop((tuple(namespace), key), None)
+
+
+def _timestamp(value) -> float:
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    return float(value or 0.0)
+
+
+def _item_bytes(item: Item) -> int:
+    return len(json.dumps(item.value, default=str).encode("utf-8"))
+
+
+class MemoryCompactor:
+    """
+    Applies retention policies to memory namespaces in small batches.
+    """
+
+    def __init__(
+        self,
+        store: BaseStore,
+        policies: Dict[Namespace, RetentionPolicy],
+        access_tracker: Optional[AccessTracker] = None,
+        batch_size: int = 100,
+        pause_seconds: float = 0.0,
+    ):
+        """
+        Initialize the compactor.
+
+        Args:
+            store: The store holding the memories
+            policies: The retention policy for each namespace. A policy also applies,
+                separately, to every namespace below it, e.g. ("memories",) covers
+                each user's ("memories", user_id).
+            access_tracker: Optional retrieval counts used in the eviction score
+            batch_size: The number of items read or deleted per store call
+            pause_seconds: Sleep between delete batches to leave room for other traffic
+        """
+        self.store = store
+        self.policies = {tuple(namespace): policy for namespace, policy in policies.items()}
+        self.access_tracker = access_tracker
+        self.batch_size = batch_size
+        self.pause_seconds = pause_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def score(self, item: Item, policy: RetentionPolicy, now: Optional[float] = None) -> float:
+        """
+        Score a memory for retention; lower scores are evicted first.
+
+        Args:
+            item: The stored memory
+            policy: The namespace's retention policy
+            now: The current UNIX time
+
+        Returns:
+            A score between 0 and 1
+        """
+        now = time.time() if now is None else now
+        value = item.value
+        content = value.get("content") if isinstance(value.get("content"), dict) else {}
+
+        importance = 0.5
+        for name in policy.importance_fields:
+            raw = content.get(name, value.get(name))
+            if isinstance(raw, (int, float)):
+                importance = min(max(raw / policy.importance_scale, 0.0), 1.0)
+                break
+
+        count, last_access = (0, None)
+        if self.access_tracker is not None:
+            count, last_access = self.access_tracker.get(item.namespace, item.key)
+        last_touched = max(_timestamp(item.updated_at), last_access or 0.0)
+        recency = 0.5 ** (max(now - last_touched, 0.0) / policy.recency_half_life_seconds)
+        frequency = 1.0 - 1.0 / (1.0 + count)
+
+        return (
+            policy.importance_weight * importance
+            + policy.recency_weight * recency
+            + policy.frequency_weight * frequency
+        )
+
+    def policy_for(self, namespace: Namespace) -> Optional[RetentionPolicy]:
+        """
+        Find the policy of the nearest configured ancestor of a namespace.
+
+        Args:
+            namespace: The namespace
+
+        Returns:
+            The retention policy, or None if no policy covers the namespace
+        """
+        namespace = tuple(namespace)
+        for depth in range(len(namespace), 0, -1):
+            policy = self.policies.get(namespace[:depth])
+            if policy is not None:
+                return policy
+        return None
+
+    def namespaces(self) -> List[Namespace]:
+        """
+        List the namespaces holding memories that a policy covers.
+
+        Returns:
+            The namespaces, each listed once
+        """
+        found: Dict[Namespace, None] = {}
+        for prefix in self.policies:
+            offset = 0
+            while True:
+                page = self.store.list_namespaces(prefix=prefix, limit=self.batch_size, offset=offset)
+                for namespace in page:
+                    found[tuple(namespace)] = None
+                if len(page) < self.batch_size:
+                    break
+                offset += len(page)
+        return list(found)
+
+    def compact_namespace(self, namespace: Namespace, dry_run: bool = False) -> CompactionReport:
+        """
+        Apply a namespace's retention policy.
+
+        Expired memories are deleted page by page while scanning; once the scan
+        is done, the lowest-scoring memories over max_items are evicted.
+
+        Args:
+            namespace: The namespace to compact
+            dry_run: Report what would be deleted without deleting anything
+
+        Returns:
+            A report of the items scanned, expired and evicted and the bytes reclaimed
+        """
+        namespace = tuple(namespace)
+        policy = self.policy_for(namespace)
+        if policy is None:
+            raise KeyError(f"No retention policy covers namespace {namespace}")
+        report = CompactionReport(namespace=namespace, dry_run=dry_run)
+        start = time.perf_counter()
+        now = time.time()
+
+        survivors: List[Tuple[float, str, int]] = []
+        for page in self._pages(namespace):
+            report.scanned += len(page)
+
+            expired = []
+            for item in page:
+                size = _item_bytes(item)
+                age = now - _timestamp(item.updated_at)
+                if policy.ttl_seconds is not None and age > policy.ttl_seconds:
+                    expired.append(item.key)
+                    report.bytes_reclaimed += size
+                else:
+                    survivors.append((self.score(item, policy, now), item.key, size))
+
+            report.expired += len(expired)
+            if expired and not dry_run:
+                self._delete(namespace, expired)
+
+        if policy.max_items is not None and len(survivors) > policy.max_items:
+            survivors.sort()
+            victims = survivors[: len(survivors) - policy.max_items]
+            report.evicted = len(victims)
+            report.bytes_reclaimed += sum(size for _, _, size in victims)
+            report.evicted_keys = [key for _, key, _ in victims]
+            if not dry_run:
+                self._delete(namespace, report.evicted_keys)
+
+        report.seconds = time.perf_counter() - start
+        return report
+
+    def run(self, dry_run: bool = False) -> List[CompactionReport]:
+        """
+        Compact every namespace that has a policy or sits below one.
+
+        Args:
+            dry_run: Report what would be deleted without deleting anything
+
+        Returns:
+            One report per namespace holding memories
+        """
+        return [self.compact_namespace(namespace, dry_run=dry_run) for namespace in self.namespaces()]
+
+    def start_background(self, interval_seconds: float = 3600.0) -> None:
+        """
+        Run compaction periodically on a daemon thread.
+
+        Args:
+            interval_seconds: The time between compaction runs
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(interval_seconds):
+                try:
+                    for report in self.run():
+                        if report.expired or report.evicted:
+                            print(
+                                f"Compacted {report.namespace}: {report.expired} expired, "
+                                f"{report.evicted} evicted, {report.bytes_reclaimed} bytes reclaimed"
+                            )
+                except Exception as e:
+                    print(f"Error compacting memories: {str(e)}")
+
+        self._thread = threading.Thread(target=loop, name="memory-compactor", daemon=True)
+        self._thread.start()
+
+    def stop_background(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop the background compaction thread.
+
+        Args:
+            timeout: How long to wait for a running pass to finish
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def _pages(self, namespace: Namespace) -> Iterator[List[Item]]:
+        """
+        Read the items stored exactly under a namespace, one batch at a time.
+
+        Args:
+            namespace: The namespace to read
+
+        Returns:
+            An iterator over pages of at most batch_size items
+        """
+        if PostgresStore is not None and isinstance(self.store, PostgresStore):
+            yield from self._postgres_pages(namespace)
+            return
+
+        # Read the whole listing before anything is deleted, so deletes do not shift the offsets
+        items: Dict[str, Item] = {}
+        offset = 0
+        while True:
+            page = self.store.search(namespace, limit=self.batch_size, offset=offset)
+            if not page:
+                break
+            offset += len(page)
+            for item in page:
+                # Search also returns child namespaces, and may repeat an item updated mid-scan
+                if tuple(item.namespace) == namespace:
+                    items.setdefault(item.key, item)
+        listing = list(items.values())
+        for start in range(0, len(listing), self.batch_size):
+            yield listing[start:start + self.batch_size]
+
+    def _postgres_pages(self, namespace: Namespace) -> Iterator[List[Item]]:
+        prefix = ".".join(namespace)
+        after = ""
+        while True:
+            with self.store._cursor() as cur:
+                cur.execute(NAMESPACE_PAGE_SQL, (prefix, after, self.batch_size))
+                rows = cur.fetchall()
+            if not rows:
+                return
+            after = rows[-1]["key"]
+            yield [
+                Item(
+                    value=row["value"] if isinstance(row["value"], dict) else json.loads(row["value"]),
+                    key=row["key"],
+                    namespace=namespace,
+                    created_at=row["created_at"],
+                    updated_at=row["updated_at"],
+                )
+                for row in rows
+            ]
+
+    def _delete(self, namespace: Namespace, keys: List[str]) -> None:
+        for start in range(0, len(keys), self.batch_size):
+            chunk = keys[start:start + self.batch_size]
+            # A PutOp with value=None deletes the item
+            self.store.batch([PutOp(namespace=namespace, key=key, value=None) for key in chunk])
+            if self.access_tracker is not None:
+                self.access_tracker.forget(namespace, chunk)
+            if self.pause_seconds:
+                time.sleep(self.pause_seconds)
@@ -0,0 +1,144 @@
+"""
+Per-user memory namespaces.
+
+The agents used to keep every user's memories in one global namespace such as
+("memories",), so each search ranked everyone's memories and could return
+another user's. Memories now live under (*namespace, user_id), with the user
+taken from the run config's "user_id". A store search is scoped to one
+namespace prefix. PostgresStore can answer it through the prefix index, so its
+cost follows the user's own memory count, or through the HNSW index with the
+prefix applied afterwards, which needs hnsw.iterative_scan (pgvector 0.8+) to
+return all of a small user's matches; see postgres_store.configure_vector_search.
+Memories written before the partitioning are moved with
+src/agents/memory_agent/migrate_user_namespaces.py.
+
+A namespace is stored as its labels joined with ".", and older PostgresStore
+releases match a search prefix with an unanchored, unescaped LIKE, so a search
+in ("memories", "bob") also returns ("memories", "bobby") and a "_" in a user
+ID matches any character. Every per-user search therefore keeps only the items
+of its exact namespace (in_namespace), and user IDs containing "." are
+rejected, since they would address another namespace.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, TypeVar
+
+Namespace = Tuple[str, ...]
+
+ItemT = TypeVar("ItemT")
+
+# The configurable key holding the user, and the user for runs without one
+USER_ID_KEY = "user_id"
+DEFAULT_USER_ID = "default"
+
+
+def validate_user_id(user_id: str) -> str:
+    """
+    Check that a user ID can be used as a namespace label.
+
+    Args:
+        user_id: The user's ID
+
+    Returns:
+        The user ID
+
+    Raises:
+        ValueError: If the ID is empty or contains ".", which the store uses as
+            its namespace separator
+    """
+    if not isinstance(user_id, str) or not user_id.strip():
+        raise ValueError(f"Invalid user ID {user_id!r}: user IDs must be non-empty strings")
+    if "." in user_id:
+        raise ValueError(
+            f"Invalid user ID {user_id!r}: user IDs cannot contain '.', the store's namespace separator"
+        )
+    return user_id
+
+
+def user_namespace(namespace: Sequence[str], user_id: Optional[str] = None) -> Namespace:
+    """
+    Get a user's partition of a memory namespace.
+
+    Args:
+        namespace: The memory namespace, e.g. ("memories",)
+        user_id: The user's ID. If None, DEFAULT_USER_ID is used.
+
+    Returns:
+        The namespace with the user's ID appended
+
+    Raises:
+        ValueError: If the user ID is empty or contains "."
+    """
+    return (*namespace, DEFAULT_USER_ID if user_id is None else validate_user_id(user_id))
+
+
+def in_namespace(items: Iterable[ItemT], namespace: Sequence[str]) -> List[ItemT]:
+    """
+    Keep only the items stored exactly in a namespace.
+
+    A store search matches a namespace prefix, so it also returns child
+    namespaces, and on older PostgresStore releases any namespace whose text
+    starts with the same characters.
+
+    Args:
+        items: The search results
+        namespace: The namespace that was searched
+
+    Returns:
+        The items whose namespace equals it
+    """
+    namespace = tuple(namespace)
+    return [item for item in items if tuple(item.namespace) == namespace]
+
+
+def namespace_template(namespace: Sequence[str]) -> Namespace:
+    """
+    Get a LangMem namespace template that resolves to the run's user partition.
+
+    Args:
+        namespace: The memory namespace, e.g. ("memories",)
+
+    Returns:
+        The namespace with a "{user_id}" placeholder appended
+    """
+    return (*namespace, "{" + USER_ID_KEY + "}")
+
+
+def config_user_id(config: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Get the user of a run.
+
+    Args:
+        config: The run config. If None, the config of the current graph run is used.
+
+    Returns:
+        The configured user ID, or DEFAULT_USER_ID if there is none
+    """
+    if config is None:
+        from langgraph.config import get_config
+        config = get_config()
+    return config.get("configurable", {}).get(USER_ID_KEY) or DEFAULT_USER_ID
+
+
+def run_config(thread_id: str, user_id: Optional[str] = None, **kwargs: Any) -> Dict[str, Any]:
+    """
+    Build the config of an agent run.
+
+    Args:
+        thread_id: The ID of the conversation thread
+        user_id: The user whose memories the run reads and writes. If None,
+            DEFAULT_USER_ID is used.
+        **kwargs: Other config entries, e.g. callbacks or recursion_limit
+
+    Returns:
+        The run config
+
+    Raises:
+        ValueError: If the user ID is empty or contains "."
+    """
+    return {
+        "configurable": {
+            "thread_id": thread_id,
+            USER_ID_KEY: DEFAULT_USER_ID if user_id is None else validate_user_id(user_id),
+        },
+        **kwargs,
+    }
@@ -0,0 +1,138 @@
+"""
+Utilities for retrieving memories from several namespaces in one store round trip.
+
+The prompt functions used to call store.search once per memory type, which
+embedded the same query once per call and ran the searches one after another.
+These helpers issue all of the searches as a single store batch instead, so the
+store embeds the query once and answers every namespace in one call.
+
+Results are limited to the exact namespace searched, so a user's search never
+returns another user's memories, whatever prefix semantics the store uses.
+create_user_search_memory_tool applies the same rule to LangMem's search tool.
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.tools import StructuredTool
+from langgraph.store.base import BaseStore, SearchItem, SearchOp
+from langmem import create_search_memory_tool
+
+from src.utils.memory_lifecycle import AccessTracker
+from src.utils.memory_namespaces import config_user_id, in_namespace, namespace_template, user_namespace
+
+
+Namespace = Tuple[str, ...]
+
+
+def _search_ops(
+    namespaces: Sequence[Namespace],
+    query: Optional[str],
+    limit: int,
+    filter: Optional[Dict[str, Any]],
+) -> List[SearchOp]:
+    return [
+        SearchOp(namespace_prefix=tuple(namespace), filter=filter, limit=limit, query=query)
+        for namespace in namespaces
+    ]
+
+
+def search_memory_namespaces(
+    store: BaseStore,
+    namespaces: Sequence[Namespace],
+    query: Optional[str],
+    limit: int = 10,
+    filter: Optional[Dict[str, Any]] = None,
+    access_tracker: Optional[AccessTracker] = None,
+) -> Dict[Namespace, List[SearchItem]]:
+    """
+    Search several memory namespaces for the same query in one batch.
+
+    Args:
+        store: The store to search
+        namespaces: The namespaces to search
+        query: The natural-language query, or None to list items without ranking
+        limit: The maximum number of results per namespace
+        filter: Optional key-value filter applied in every namespace
+        access_tracker: Optional tracker that records the returned memories as used
+
+    Returns:
+        A dictionary mapping each namespace to its search results
+    """
+    results = [
+        in_namespace(items, namespace)
+        for namespace, items in zip(namespaces, store.batch(_search_ops(namespaces, query, limit, filter)))
+    ]
+    if access_tracker is not None:
+        for items in results:
+            access_tracker.record(items)
+    return {tuple(namespace): items for namespace, items in zip(namespaces, results)}
+
+
+async def asearch_memory_namespaces(
+    store: BaseStore,
+    namespaces: Sequence[Namespace],
+    query: Optional[str],
+    limit: int = 10,
+    filter: Optional[Dict[str, Any]] = None,
+    access_tracker: Optional[AccessTracker] = None,
+) -> Dict[Namespace, List[SearchItem]]:
+    """
+    Asynchronously search several memory namespaces for the same query in one batch.
+
+    Args:
+        store: The store to search
+        namespaces: The namespaces to search
+        query: The natural-language query, or None to list items without ranking
+        limit: The maximum number of results per namespace
+        filter: Optional key-value filter applied in every namespace
+        access_tracker: Optional tracker that records the returned memories as used
+
+    Returns:
+        A dictionary mapping each namespace to its search results
+    """
+    results = [
+        in_namespace(items, namespace)
+        for namespace, items in zip(namespaces, await store.abatch(_search_ops(namespaces, query, limit, filter)))
+    ]
+    if access_tracker is not None:
+        for items in results:
+            access_tracker.record(items)
+    return {tuple(namespace): items for namespace, items in zip(namespaces, results)}
+
+
+def _dump_memories(memories: List[SearchItem]) -> str:
+    return json.dumps([memory.dict() for memory in memories], default=str)
+
+
+def create_user_search_memory_tool(namespace: Sequence[str], **kwargs: Any) -> StructuredTool:
+    """
+    Create LangMem's search_memory tool for the run's user partition of a namespace.
+
+    The tool searches (*namespace, user_id), with the user taken from the run
+    config, and only returns memories stored exactly in that namespace.
+
+    Args:
+        namespace: The memory namespace, e.g. ("memories",)
+        **kwargs: Passed to langmem.create_search_memory_tool, e.g. name, instructions or store
+
+    Returns:
+        The search tool
+    """
+    tool = create_search_memory_tool(
+        namespace=namespace_template(namespace), response_format="content_and_artifact", **kwargs
+    )
+
+    def search_memory(query: str, *, limit: int = 10, offset: int = 0, filter: Optional[dict] = None) -> str:
+        _, memories = tool.func(query, limit=limit, offset=offset, filter=filter)
+        return _dump_memories(in_namespace(memories, user_namespace(namespace, config_user_id())))
+
+    async def asearch_memory(
+        query: str, *, limit: int = 10, offset: int = 0, filter: Optional[dict] = None
+    ) -> str:
+        _, memories = await tool.coroutine(query, limit=limit, offset=offset, filter=filter)
+        return _dump_memories(in_namespace(memories, user_namespace(namespace, config_user_id())))
+
+    return StructuredTool.from_function(
+        search_memory, asearch_memory, name=tool.name, description=tool.description
+    )
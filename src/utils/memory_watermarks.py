@@ -0,0 +1,105 @@
+"""
+Per-thread watermarks for incremental memory extraction.
+
+Extracting memories after every turn used to re-send the whole conversation
+each time, so extraction cost grew quadratically with thread length. A
+watermark records how many of a thread's messages have already been
+extracted; only the messages after it (plus a small overlap for context) are
+sent on the next extraction.
+
+Watermarks are kept in the agent's store under their own namespace, so with
+the PostgreSQL store they live in the same database as the checkpoints and
+survive restarts. They are written with index=False and never embedded.
+"""
+
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langgraph.store.base import BaseStore
+
+
+WATERMARK_NAMESPACE = ("extraction_watermarks",)
+
+
+class ExtractionWatermarks:
+    """
+    Reads and advances the extraction watermark of each conversation thread.
+    """
+
+    def __init__(self, store: BaseStore, overlap: int = 2, namespace: Tuple[str, ...] = WATERMARK_NAMESPACE):
+        """
+        Initialize the watermark tracker.
+
+        Args:
+            store: The store the watermarks are kept in
+            overlap: How many already-extracted messages to resend before the new ones for context
+            namespace: The store namespace holding the watermarks
+        """
+        self.store = store
+        self.overlap = overlap
+        self.namespace = namespace
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def lock(self, thread_id: str) -> threading.Lock:
+        """
+        Get the lock serializing extractions of one thread.
+
+        Hold it from get() through advance() so two workers never extract the
+        same messages of a thread concurrently.
+
+        Args:
+            thread_id: The ID of the conversation thread
+
+        Returns:
+            The thread's lock
+        """
+        with self._locks_guard:
+            return self._locks.setdefault(thread_id, threading.Lock())
+
+    def get(self, thread_id: str) -> int:
+        """
+        Get the number of a thread's messages that have already been extracted.
+
+        Args:
+            thread_id: The ID of the conversation thread
+
+        Returns:
+            The watermark, or 0 if the thread has never been extracted
+        """
+        item = self.store.get(self.namespace, thread_id)
+        if item is None:
+            return 0
+        return int(item.value.get("message_count", 0))
+
+    def advance(self, thread_id: str, message_count: int, checkpoint_id: Optional[str] = None) -> None:
+        """
+        Record that a thread's messages have been extracted up to message_count.
+
+        Args:
+            thread_id: The ID of the conversation thread
+            message_count: The number of messages extracted so far
+            checkpoint_id: The checkpoint the messages were read from, if known
+        """
+        value: Dict[str, Any] = {"message_count": message_count}
+        if checkpoint_id is not None:
+            value["checkpoint_id"] = checkpoint_id
+        self.store.put(self.namespace, thread_id, value, index=False)
+
+    def delta(self, thread_id: str, messages: Sequence[Any]) -> Tuple[List[Any], int]:
+        """
+        Select the messages of a thread that still need extracting.
+
+        Args:
+            thread_id: The ID of the conversation thread
+            messages: The thread's full message history
+
+        Returns:
+            A tuple of (messages to extract, new watermark). The message list is
+            empty when nothing new has been added since the last extraction.
+        """
+        watermark = self.get(thread_id)
+        if watermark >= len(messages):
+            return [], watermark
+        start = max(0, watermark - self.overlap)
+        return list(messages[start:]), len(messages)
@@ -0,0 +1,367 @@
+"""
+Background memory extraction off the request path.
+
+Callers hand finished conversation turns to a MemoryExtractionWorker and return
+immediately. A pool of extractor threads runs the (slow) LLM extraction, and a
+single writer thread collects the resulting memories and writes them to the
+store in batches, retrying failed batches with exponential backoff.
+
+An extraction can return an ExtractionResult whose on_done callback is told
+once all of its memories have been stored, or have failed to store, e.g. to
+advance an extraction watermark only after the memories are safely written.
+"""
+
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from langgraph.store.base import BaseStore
+
+from src.utils.memory_writes import MemoryWrite, put_memories
+
+_STOP = object()
+
+
+@dataclass
+class ExtractionResult:
+    """The memory writes of one extraction and what to do once they are stored."""
+
+    writes: List[MemoryWrite]
+    # Called once with True when every write is stored, or False if any failed or was dropped
+    on_done: Optional[Callable[[bool], None]] = None
+
+    def done(self, stored: bool) -> None:
+        """
+        Report the outcome of the writes to on_done.
+
+        Args:
+            stored: Whether every write was stored
+        """
+        if self.on_done is not None:
+            self.on_done(stored)
+
+
+class _PendingTurn:
+    """Counts the writes of one extraction that are not stored yet."""
+
+    def __init__(self, result: ExtractionResult):
+        self.result = result
+        self.remaining = len(result.writes)
+        self.failed = False
+
+
+class MemoryExtractionWorker:
+    """
+    Runs memory extraction and store writes on background threads.
+
+    The job queue is bounded: when it is full, submit() blocks (or fails fast
+    with block=False), which pushes back on producers instead of letting the
+    backlog grow without limit.
+    """
+
+    def __init__(
+        self,
+        store: BaseStore,
+        extract_fn: Callable[..., Union[Sequence[MemoryWrite], ExtractionResult]],
+        num_workers: int = 2,
+        max_queue_size: int = 100,
+        write_batch_size: int = 50,
+        write_interval: float = 0.5,
+        max_retries: int = 3,
+        retry_backoff: float = 0.5,
+    ):
+        """
+        Initialize the worker and start its threads.
+
+        Args:
+            store: The store memories are written to
+            extract_fn: Called with a conversation's messages (and thread_id= / user_id= for turns
+                submitted with them); returns the memory writes for it, or an ExtractionResult
+                to be told when they are stored
+            num_workers: The number of extractor threads
+            max_queue_size: The maximum number of turns waiting for extraction
+            write_batch_size: The number of memories that triggers a store write
+            write_interval: The maximum number of seconds a memory waits to be written
+            max_retries: How many times a failed write batch is retried
+            retry_backoff: The delay before the first retry, doubled on each attempt
+        """
+        self.store = store
+        self.extract_fn = extract_fn
+        self.write_batch_size = write_batch_size
+        self.write_interval = write_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+        self._jobs: "queue.Queue" = queue.Queue(maxsize=max_queue_size)
+        self._pending: List[Tuple[MemoryWrite, _PendingTurn]] = []
+        self._writing = 0
+        self._oldest_pending = 0.0
+        self._flush_waiters = 0
+        self._write_cond = threading.Condition()
+        self._metrics_lock = threading.Lock()
+        self._closed = False
+        self._stop_writer = False
+
+        self._submitted = 0
+        self._extracted_turns = 0
+        self._failed_turns = 0
+        self._written = 0
+        self._write_batches = 0
+        self._failed_writes = 0
+        self._total_lag = 0.0
+        self._max_lag = 0.0
+        self._last_lag = 0.0
+
+        self._extractors = [
+            threading.Thread(target=self._extract_loop, name=f"memory-extractor-{i}", daemon=True)
+            for i in range(num_workers)
+        ]
+        self._writer = threading.Thread(target=self._write_loop, name="memory-writer", daemon=True)
+        for thread in self._extractors:
+            thread.start()
+        self._writer.start()
+
+    def submit(
+        self,
+        messages: Optional[List[Dict[str, str]]],
+        block: bool = True,
+        timeout: Optional[float] = None,
+        thread_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+    ) -> None:
+        """
+        Queue a finished conversation turn for extraction.
+
+        Args:
+            messages: The conversation messages to extract memories from. May be None
+                when thread_id is given and extract_fn loads the thread itself.
+            block: Whether to wait for room when the queue is full
+            timeout: How long to wait for room when blocking
+            thread_id: The ID of the conversation thread, passed through to extract_fn
+            user_id: The user whose memories the turn updates, passed through to extract_fn
+
+        Raises:
+            queue.Full: If the queue is full and block is False or the timeout expires
+            RuntimeError: If the worker has been closed
+        """
+        if self._closed:
+            raise RuntimeError("MemoryExtractionWorker is closed")
+        if messages is not None:
+            messages = list(messages)
+        self._jobs.put((messages, time.monotonic(), thread_id, user_id), block=block, timeout=timeout)
+        with self._metrics_lock:
+            self._submitted += 1
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every submitted turn has been extracted and written.
+
+        Args:
+            timeout: The maximum number of seconds to wait
+
+        Returns:
+            True if everything was flushed, False if the timeout expired first
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        # queue.join() has no timeout, so poll the unfinished task count instead
+        with self._jobs.all_tasks_done:
+            while self._jobs.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._jobs.all_tasks_done.wait(remaining)
+
+        with self._write_cond:
+            # Tells the writer not to hold back a partial batch
+            self._flush_waiters += 1
+            self._write_cond.notify_all()
+            try:
+                while self._pending or self._writing:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._write_cond.wait(remaining)
+            finally:
+                self._flush_waiters -= 1
+        return True
+
+    def close(self, drain: bool = True, timeout: Optional[float] = None) -> None:
+        """
+        Stop the worker.
+
+        Args:
+            drain: Whether to finish queued turns and pending writes first
+            timeout: The maximum number of seconds to wait for draining
+        """
+        if self._closed:
+            return
+        self._closed = True
+
+        if not drain:
+            # Drop queued turns that have not started yet
+            try:
+                while True:
+                    self._jobs.get_nowait()
+                    self._jobs.task_done()
+            except queue.Empty:
+                pass
+
+        for _ in self._extractors:
+            self._jobs.put((_STOP, None, None, None))
+        for thread in self._extractors:
+            thread.join(timeout=timeout)
+
+        with self._write_cond:
+            dropped = [] if drain else list(self._pending)
+            if not drain:
+                self._pending.clear()
+            self._stop_writer = True
+            self._write_cond.notify_all()
+        self._settle(dropped, stored=False)
+        self._writer.join(timeout=timeout)
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        Get queue and throughput metrics.
+
+        Returns:
+            A dictionary with the queue depth, pending writes, turn and write
+            counters, and the average, maximum and most recent queue lag in
+            seconds (time from submit() until extraction started)
+        """
+        with self._metrics_lock:
+            started = self._extracted_turns + self._failed_turns
+            metrics = {
+                "queue_depth": self._jobs.qsize(),
+                "submitted": self._submitted,
+                "extracted_turns": self._extracted_turns,
+                "failed_turns": self._failed_turns,
+                "written": self._written,
+                "write_batches": self._write_batches,
+                "failed_writes": self._failed_writes,
+                "avg_queue_lag": self._total_lag / started if started else 0.0,
+                "max_queue_lag": self._max_lag,
+                "last_queue_lag": self._last_lag,
+            }
+        with self._write_cond:
+            metrics["pending_writes"] = len(self._pending)
+        return metrics
+
+    def __enter__(self) -> "MemoryExtractionWorker":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _extract_loop(self) -> None:
+        while True:
+            messages, enqueued_at, thread_id, user_id = self._jobs.get()
+            try:
+                if messages is _STOP:
+                    return
+
+                lag = time.monotonic() - enqueued_at
+                try:
+                    kwargs = {}
+                    if thread_id is not None:
+                        kwargs["thread_id"] = thread_id
+                    if user_id is not None:
+                        kwargs["user_id"] = user_id
+                    result = self.extract_fn(messages, **kwargs)
+                    if not isinstance(result, ExtractionResult):
+                        result = ExtractionResult(list(result))
+                except Exception as e:
+                    print(f"Error extracting memories: {str(e)}")
+                    with self._metrics_lock:
+                        self._failed_turns += 1
+                        self._record_lag(lag)
+                    continue
+
+                with self._metrics_lock:
+                    self._extracted_turns += 1
+                    self._record_lag(lag)
+
+                if not result.writes:
+                    self._finish(result, stored=True)
+                    continue
+                turn = _PendingTurn(result)
+                with self._write_cond:
+                    if not self._pending:
+                        self._oldest_pending = time.monotonic()
+                    self._pending.extend((write, turn) for write in result.writes)
+                    self._write_cond.notify_all()
+            finally:
+                self._jobs.task_done()
+
+    def _record_lag(self, lag: float) -> None:
+        self._total_lag += lag
+        self._max_lag = max(self._max_lag, lag)
+        self._last_lag = lag
+
+    def _write_loop(self) -> None:
+        while True:
+            with self._write_cond:
+                while True:
+                    if len(self._pending) >= self.write_batch_size:
+                        break
+                    if self._pending:
+                        waited = time.monotonic() - self._oldest_pending
+                        if self._stop_writer or self._flush_waiters or waited >= self.write_interval:
+                            break
+                        # Give a partial batch up to write_interval to fill up
+                        self._write_cond.wait(self.write_interval - waited)
+                    elif self._stop_writer:
+                        return
+                    else:
+                        self._write_cond.wait()
+                batch = self._pending[:self.write_batch_size]
+                del self._pending[:self.write_batch_size]
+                self._oldest_pending = time.monotonic()
+                self._writing += 1
+
+            try:
+                stored = self._write_batch([write for write, _ in batch])
+                self._settle(batch, stored)
+            finally:
+                with self._write_cond:
+                    self._writing -= 1
+                    self._write_cond.notify_all()
+
+    def _write_batch(self, batch: List[MemoryWrite]) -> bool:
+        delay = self.retry_backoff
+        for attempt in range(self.max_retries + 1):
+            try:
+                put_memories(self.store, batch, batch_size=len(batch))
+                with self._metrics_lock:
+                    self._written += len(batch)
+                    self._write_batches += 1
+                return True
+            except Exception as e:
+                if attempt == self.max_retries:
+                    print(f"Error writing {len(batch)} memories after {attempt + 1} attempts: {str(e)}")
+                    with self._metrics_lock:
+                        self._failed_writes += len(batch)
+                    return False
+                time.sleep(delay)
+                delay *= 2
+
+    def _settle(self, batch: List[Tuple[MemoryWrite, _PendingTurn]], stored: bool) -> None:
+        """Count a batch's writes off their turns and finish the turns with nothing left."""
+        finished = []
+        with self._write_cond:
+            for _, turn in batch:
+                turn.remaining -= 1
+                turn.failed = turn.failed or not stored
+                if turn.remaining == 0:
+                    finished.append(turn)
+        for turn in finished:
+            self._finish(turn.result, stored=not turn.failed)
+
+    def _finish(self, result: ExtractionResult, stored: bool) -> None:
+        try:
+            result.done(stored)
+        except Exception as e:
+            print(f"Error completing memory extraction: {str(e)}")
@@ -0,0 +1,84 @@
+"""
+Bulk writes of extracted memories.
+
+Writing memories with one store.put per item embeds and inserts each memory
+on its own. These helpers send a whole extraction (or a chunk of a bulk
+import) as one store.batch call instead; the stores embed every item of a
+batch in a single model call, and PostgresStore writes them with a multi-row
+insert, so cost grows with the number of batches rather than items.
+
+store.batch does not check namespace labels the way store.put does, so the
+writes are checked here: a label containing "." would be stored as, and read
+back as, several labels.
+"""
+
+from typing import Any, Dict, Iterable, List, Tuple
+
+from langgraph.store.base import BaseStore, InvalidNamespaceError, PutOp
+
+
+# A memory write: (namespace, key, value)
+MemoryWrite = Tuple[Tuple[str, ...], str, Dict[str, Any]]
+
+
+def _check_namespace(namespace: Tuple[str, ...]) -> Tuple[str, ...]:
+    for label in namespace:
+        if not isinstance(label, str) or not label or "." in label:
+            raise InvalidNamespaceError(
+                f"Invalid namespace label {label!r} in {namespace}; labels must be non-empty strings without '.'"
+            )
+    return namespace
+
+
+def _put_ops(writes: Iterable[MemoryWrite]) -> List[PutOp]:
+    return [
+        PutOp(namespace=_check_namespace(tuple(namespace)), key=key, value=value)
+        for namespace, key, value in writes
+    ]
+
+
+def _chunks(ops: List[PutOp], batch_size: int):
+    for start in range(0, len(ops), batch_size):
+        yield ops[start:start + batch_size]
+
+
+def put_memories(store: BaseStore, writes: Iterable[MemoryWrite], batch_size: int = 500) -> int:
+    """
+    Write memories to the store in batches.
+
+    Args:
+        store: The store to write to
+        writes: The (namespace, key, value) writes to apply
+        batch_size: The maximum number of memories per store call
+
+    Returns:
+        The number of memories written
+
+    Raises:
+        InvalidNamespaceError: If a namespace label is empty or contains "."
+    """
+    ops = _put_ops(writes)
+    for chunk in _chunks(ops, batch_size):
+        store.batch(chunk)
+    return len(ops)
+
+
+async def aput_memories(store: BaseStore, writes: Iterable[MemoryWrite], batch_size: int = 500) -> int:
+    """
+    Asynchronously write memories to the store in batches.
+
+    Args:
+        store: The store to write to
+        writes: The (namespace, key, value) writes to apply
+        batch_size: The maximum number of memories per store call
+
+    Returns:
+        The number of memories written
+
+    Raises:
+        InvalidNamespaceError: If a namespace label is empty or contains "."
+    """
+    ops = _put_ops(writes)
+    for chunk in _chunks(ops, batch_size):
+        await store.abatch(chunk)
+    return len(ops)
@@ -0,0 +1,284 @@
+"""
+Prompt-prefix caching for the Bedrock memory agents.
+
+Bedrock can reuse the processed prefix of a prompt between calls, but only up
+to a cache point and only while the prefix is byte-for-byte identical. The
+memory agents used to put the retrieved memories in the middle of the system
+prompt, so the prefix changed on every call. These helpers lay a prompt out as
+static instructions, then the volatile memories, and add a cache point after
+the newest user message so the conversation history is reused across the
+ReAct steps of a turn. The instructions get a cache point of their own only
+when they are long enough for Bedrock to cache. PromptCacheUsage reports the
+cached and uncached input tokens of every call.
+"""
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional, Sequence
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langchain_core.outputs import LLMResult
+
+from src.utils.memory_context import estimate_tokens
+
+
+# Bedrock Converse content block marking the end of a cacheable prefix
+CACHE_POINT = {"cachePoint": {"type": "default"}}
+
+# Bedrock model ID prefixes that support prompt caching
+PROMPT_CACHING_MODELS = (
+    "anthropic.claude-3-5-haiku",
+    "anthropic.claude-3-7-sonnet",
+    "anthropic.claude-sonnet-4",
+    "anthropic.claude-opus-4",
+    "amazon.nova-micro",
+    "amazon.nova-lite",
+    "amazon.nova-pro",
+    "amazon.nova-premier",
+)
+
+# Bedrock does not cache a prefix shorter than this; some models need 2048 tokens
+MIN_CACHEABLE_TOKENS = 1024
+
+# Prefixes of Bedrock cross-region inference profile IDs
+INFERENCE_PROFILE_REGIONS = ("us", "eu", "apac", "us-gov", "global")
+
+
+def supports_prompt_caching(model_id: str) -> bool:
+    """
+    Check whether a Bedrock model supports cache points.
+
+    Args:
+        model_id: The Bedrock model or cross-region inference profile ID
+
+    Returns:
+        True if cache points can be sent to the model
+    """
+    # Strip a cross-region inference profile prefix such as "us." or "eu."
+    region, _, provider_model = model_id.partition(".")
+    if region not in INFERENCE_PROFILE_REGIONS:
+        provider_model = model_id
+    return provider_model.startswith(PROMPT_CACHING_MODELS)
+
+
+def latest_user_text(messages: Sequence[BaseMessage]) -> str:
+    """
+    Get the text of the newest user message.
+
+    Searching memories with it, rather than with the newest message of any
+    kind, keeps the retrieved memories and therefore the prompt stable across
+    the tool-calling steps of a turn.
+
+    Args:
+        messages: The conversation messages
+
+    Returns:
+        The newest user message's text, or the newest message's text if there is no user message
+    """
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            return _text(message)
+    return _text(messages[-1]) if messages else ""
+
+
+def _text(message: BaseMessage) -> str:
+    if isinstance(message.content, str):
+        return message.content
+    return "".join(
+        block if isinstance(block, str) else block.get("text", "")
+        for block in message.content
+    )
+
+
+def _with_cache_point(message: BaseMessage) -> BaseMessage:
+    content = message.content
+    if isinstance(content, str):
+        content = [{"type": "text", "text": content}] if content else []
+    return message.model_copy(update={"content": [*content, CACHE_POINT]})
+
+
+def build_cached_prompt(
+    static_prompt: str,
+    volatile_prompt: str,
+    messages: Sequence[BaseMessage],
+    enable_cache: bool = True,
+    min_cache_tokens: int = MIN_CACHEABLE_TOKENS,
+) -> List[Any]:
+    """
+    Lay out a prompt as a stable, cacheable prefix followed by volatile content.
+
+    Args:
+        static_prompt: Instructions that are the same on every call
+        volatile_prompt: Per-call content such as the retrieved memories
+        messages: The conversation messages
+        enable_cache: Add Bedrock cache points; only enable for models that support them
+        min_cache_tokens: The shortest static prompt worth a cache point of its own;
+            shorter ones are still cached as part of the history prefix
+
+    Returns:
+        The messages to send to the model, system message first
+    """
+    if not enable_cache:
+        return [{"role": "system", "content": f"{static_prompt}\n\n{volatile_prompt}"}, *messages]
+
+    # A cache point below the model's minimum prefix length never produces a hit
+    static_cache_point = [CACHE_POINT] if estimate_tokens(static_prompt) >= min_cache_tokens else []
+    system = SystemMessage(content=[
+        {"type": "text", "text": static_prompt},
+        *static_cache_point,
+        {"type": "text", "text": volatile_prompt},
+    ])
+
+    # Cache the history up to the newest user message; tool results after it
+    # cannot carry a cache point
+    messages = list(messages)
+    for index in range(len(messages) - 1, -1, -1):
+        if isinstance(messages[index], HumanMessage):
+            messages[index] = _with_cache_point(messages[index])
+            break
+    return [system, *messages]
+
+
+@dataclass
+class CacheUsage:
+    """Input token usage of one model call."""
+
+    input_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+    output_tokens: int = 0
+    seconds: float = 0.0
+    first_token_seconds: Optional[float] = None
+
+    @property
+    def uncached_tokens(self) -> int:
+        """The input tokens neither read from nor written to the cache."""
+        return max(0, self.input_tokens - self.cache_read_tokens - self.cache_write_tokens)
+
+
+class PromptCacheUsage(BaseCallbackHandler):
+    """
+    Callback that records cached vs uncached input tokens per model call.
+
+    Pass it in the run config's callbacks. Following LangChain's UsageMetadata
+    convention, input_tokens includes the tokens read from and written to the
+    cache; the uncached tokens are what remains. The callback lives as long as
+    the agent, so it keeps running totals and only the most recent calls.
+    """
+
+    def __init__(self, verbose: bool = False, recent_calls: int = 100):
+        """
+        Initialize the callback.
+
+        Args:
+            verbose: Print the usage of every call
+            recent_calls: How many of the latest calls to keep in calls
+        """
+        self.verbose = verbose
+        self.calls: Deque[CacheUsage] = deque(maxlen=recent_calls)
+        self._totals = CacheUsage()
+        self._count = 0
+        self._first_token_count = 0
+        self._first_token_seconds = 0.0
+        self._starts: Dict[UUID, float] = {}
+        self._first_tokens: Dict[UUID, float] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(
+        self,
+        serialized: Dict[str, Any],
+        messages: List[List[BaseMessage]],
+        *,
+        run_id: UUID,
+        **kwargs: Any,
+    ) -> None:
+        """Record the start of a model call."""
+        with self._lock:
+            self._starts[run_id] = time.perf_counter()
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        """Record the first streamed token of a model call."""
+        with self._lock:
+            self._first_tokens.setdefault(run_id, time.perf_counter())
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        """Record the token usage of a finished model call."""
+        end = time.perf_counter()
+        with self._lock:
+            start = self._starts.pop(run_id, end)
+            first_token = self._first_tokens.pop(run_id, None)
+
+        usage = CacheUsage(
+            seconds=end - start,
+            first_token_seconds=first_token - start if first_token is not None else None,
+        )
+        for generations in response.generations:
+            for generation in generations:
+                metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                details = metadata.get("input_token_details") or {}
+                usage.input_tokens += metadata.get("input_tokens", 0)
+                usage.output_tokens += metadata.get("output_tokens", 0)
+                usage.cache_read_tokens += details.get("cache_read", 0)
+                usage.cache_write_tokens += details.get("cache_creation", 0)
+
+        with self._lock:
+            self.calls.append(usage)
+            self._count += 1
+            self._totals.input_tokens += usage.input_tokens
+            self._totals.cache_read_tokens += usage.cache_read_tokens
+            self._totals.cache_write_tokens += usage.cache_write_tokens
+            self._totals.output_tokens += usage.output_tokens
+            self._totals.seconds += usage.seconds
+            if usage.first_token_seconds is not None:
+                self._first_token_count += 1
+                self._first_token_seconds += usage.first_token_seconds
+        if self.verbose:
+            print(
+                f"LLM call: {usage.input_tokens} input tokens, {usage.cache_read_tokens} read from cache, "
+                f"{usage.cache_write_tokens} written to cache, {usage.uncached_tokens} uncached "
+                f"in {usage.seconds:.2f}s"
+            )
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        """Forget a failed model call."""
+        with self._lock:
+            self._starts.pop(run_id, None)
+            self._first_tokens.pop(run_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Summarize every call recorded since the last reset.
+
+        Returns:
+            A dictionary of call count, token totals, the share of input tokens
+            read from the cache and the mean call and first-token latencies
+        """
+        with self._lock:
+            totals = CacheUsage(**vars(self._totals))
+            count = self._count
+            first_token_count = self._first_token_count
+            first_token_seconds = self._first_token_seconds
+        return {
+            "calls": count,
+            "input_tokens": totals.input_tokens,
+            "cache_read_tokens": totals.cache_read_tokens,
+            "cache_write_tokens": totals.cache_write_tokens,
+            "uncached_input_tokens": totals.uncached_tokens,
+            "output_tokens": totals.output_tokens,
+            "cache_hit_ratio": totals.cache_read_tokens / totals.input_tokens if totals.input_tokens else 0.0,
+            "mean_seconds": totals.seconds / count if count else 0.0,
+            "mean_first_token_seconds": first_token_seconds / first_token_count if first_token_count else None,
+        }
+
+    def reset(self) -> None:
+        """Forget all recorded calls."""
+        with self._lock:
+            self.calls.clear()
+            self._totals = CacheUsage()
+            self._count = 0
+            self._first_token_count = 0
+            self._first_token_seconds = 0.0
@@ -0,0 +1,125 @@
+"""
+Tests for per-user memory isolation, against a store that matches namespace
+prefixes the way older PostgresStore releases do.
+"""
+
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import pytest
+from langgraph.store.base import BaseStore, InvalidNamespaceError, PutOp, SearchItem, SearchOp
+from langgraph.store.memory import InMemoryStore
+
+from src.server.auth import parse_api_keys
+from src.utils.memory_dedup import MemoryDeduplicator
+from src.utils.memory_namespaces import run_config, user_namespace
+from src.utils.memory_retrieval import (
+    asearch_memory_namespaces,
+    create_user_search_memory_tool,
+    search_memory_namespaces,
+)
+from src.utils.memory_writes import put_memories
+
+MEMORIES = ("memories",)
+
+
+class LikePrefixStore(BaseStore):
+    """Matches a search prefix with prefix LIKE '<labels joined by .>%', unanchored."""
+
+    def __init__(self):
+        self.items = {}
+
+    def batch(self, ops):
+        results = []
+        for op in ops:
+            if isinstance(op, PutOp):
+                self.items[(op.namespace, op.key)] = op.value
+                results.append(None)
+            elif isinstance(op, SearchOp):
+                prefix = ".".join(op.namespace_prefix)
+                now = datetime.now(timezone.utc)
+                hits = [
+                    # Only a memory whose content is in the query counts as similar
+                    SearchItem(
+                        namespace, key, value, now, now, score=1.0 if value["content"] in (op.query or "") else 0.1
+                    )
+                    for (namespace, key), value in self.items.items()
+                    if ".".join(namespace).startswith(prefix)
+                ]
+                results.append(hits[: op.limit])
+            else:
+                raise NotImplementedError(type(op))
+        return results
+
+    async def abatch(self, ops):
+        return self.batch(ops)
+
+
+@pytest.fixture
+def store():
+    store = LikePrefixStore()
+    store.batch([
+        PutOp(user_namespace(MEMORIES, "bob"), "b1", {"content": "bob likes tea"}),
+        PutOp(user_namespace(MEMORIES, "bobby"), "y1", {"content": "bobby likes coffee"}),
+    ])
+    return store
+
+
+def test_store_leaks_prefix_matches(store):
+    # The premise: without filtering, bob's search returns bobby's memory
+    [hits] = store.batch([SearchOp(user_namespace(MEMORIES, "bob"), query="likes")])
+    assert {hit.key for hit in hits} == {"b1", "y1"}
+
+
+def test_search_memory_namespaces_returns_only_the_exact_namespace(store):
+    bob = user_namespace(MEMORIES, "bob")
+    results = search_memory_namespaces(store, [bob], query="likes")
+    assert [item.key for item in results[bob]] == ["b1"]
+
+    results = asyncio.run(asearch_memory_namespaces(store, [bob], query="likes"))
+    assert [item.key for item in results[bob]] == ["b1"]
+
+
+def test_search_tool_returns_only_the_users_memories(store):
+    tool = create_user_search_memory_tool(MEMORIES, store=store)
+
+    for user_id, expected in (("bob", ["b1"]), ("bobby", ["y1"])):
+        config = run_config("thread-1", user_id)
+        found = json.loads(tool.invoke({"query": "likes"}, config=config))
+        assert [memory["key"] for memory in found] == expected
+
+        found = json.loads(asyncio.run(tool.ainvoke({"query": "likes"}, config=config)))
+        assert [memory["key"] for memory in found] == expected
+
+
+def test_dedup_does_not_merge_into_another_users_memory(store):
+    dedup = MemoryDeduplicator(store, threshold=0.5, embed_fn=lambda texts: [[1.0, 0.0] for _ in texts])
+    writes, stats = dedup.deduplicate([(user_namespace(MEMORIES, "bob"), "new", {"content": "bobby likes coffee"})])
+    assert writes == [(("memories", "bob"), "new", {"content": "bobby likes coffee"})]
+    assert stats.merged == 0
+
+
+@pytest.mark.parametrize("user_id", ["alice@example.com", "a.b", "", " "])
+def test_invalid_user_ids_are_rejected(user_id):
+    with pytest.raises(ValueError):
+        user_namespace(MEMORIES, user_id)
+    with pytest.raises(ValueError):
+        run_config("thread-1", user_id)
+    with pytest.raises(ValueError):
+        parse_api_keys(f"token:{user_id}")
+
+
+def test_none_user_id_uses_the_default_user():
+    assert user_namespace(MEMORIES) == ("memories", "default")
+    assert run_config("thread-1")["configurable"]["user_id"] == "default"
+
+
+def test_parse_api_keys():
+    assert parse_api_keys("k1:alice, k2:bob,") == {"k1": "alice", "k2": "bob"}
+    assert parse_api_keys(None) == {}
+
+
+def test_put_memories_rejects_dotted_labels():
+    with pytest.raises(InvalidNamespaceError):
+        put_memories(InMemoryStore(), [(("memories", "alice@example.com"), "k", {"content": "x"})])
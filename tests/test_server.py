@@ -0,0 +1,177 @@
+"""
+Tests for the agent server, run against an in-memory agent with FakeChatModel.
+"""
+
+import threading
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.prebuilt import create_react_agent
+from langgraph.store.memory import InMemoryStore
+from starlette.testclient import TestClient
+
+from src.models.fake_chat_model import FakeChatModel
+from src.server import ServerSettings, create_app
+from src.server.auth import ApiKeyAuth
+from src.utils.memory_namespaces import run_config
+
+TOKENS = {"alice-token": "alice", "bob-token": "bob"}
+ALICE = {"Authorization": "Bearer alice-token"}
+BOB = {"Authorization": "Bearer bob-token"}
+
+
+class NoPool:
+    def close(self):
+        pass
+
+
+class InMemoryAgent:
+    """Implements the part of PostgresMemoryAgent the server uses, without PostgreSQL."""
+
+    def __init__(self, latency: float):
+        self.llm = FakeChatModel(responses=["Hello from the agent"], latency=latency)
+        self.summarizer = FakeChatModel(responses=["SUMMARY TOKENS"])
+        self.async_store = InMemoryStore()
+        self.async_pool = None
+        self.pool = NoPool()
+        self.user_ids = []
+
+        async def summarize(state):
+            # Stands in for the history manager, which calls a model inside the pre-model hook
+            await self.summarizer.ainvoke("summarize")
+            return {"llm_input_messages": state["messages"]}
+
+        self.agent = create_react_agent(
+            self.llm,
+            tools=[],
+            checkpointer=InMemorySaver(),
+            store=self.async_store,
+            pre_model_hook=RunnableLambda(lambda state: state, afunc=summarize),
+        )
+
+    async def aopen(self):
+        pass
+
+    async def aclose(self):
+        pass
+
+    async def ainvoke(self, messages, thread_id="default", user_id=None):
+        self.user_ids.append(user_id)
+        return await self.agent.ainvoke({"messages": messages}, config=run_config(thread_id, user_id))
+
+    async def astream(self, messages, thread_id="default", user_id=None, stream_mode=None):
+        self.user_ids.append(user_id)
+        async for chunk in self.agent.astream(
+            {"messages": messages}, config=run_config(thread_id, user_id), stream_mode=stream_mode
+        ):
+            yield chunk
+
+    def pool_stats(self):
+        return {"sync": None, "async": None}
+
+
+def make_client(**settings):
+    settings = ServerSettings(**{"fake_llm_latency": 0.0, **settings})
+    app = create_app(
+        settings,
+        agent_factory=lambda settings: InMemoryAgent(settings.fake_llm_latency),
+        authenticate=ApiKeyAuth(TOKENS),
+    )
+    return TestClient(app)
+
+
+def test_invoke_returns_turn_messages_for_authenticated_user():
+    with make_client() as client:
+        response = client.post("/v1/threads/t1/invoke", json={"message": "hi"}, headers=ALICE)
+        assert response.status_code == 200
+        body = response.json()
+        assert body["output"] == "Hello from the agent"
+        assert [message["type"] for message in body["messages"]] == ["ai"]
+        assert client.app.state.server.agent.user_ids == ["alice"]
+
+
+def test_user_comes_from_credentials_not_body():
+    with make_client() as client:
+        response = client.post("/v1/threads/t1/invoke", json={"message": "hi", "user_id": "bob"}, headers=ALICE)
+        assert response.status_code == 200
+        assert client.app.state.server.agent.user_ids == ["alice"]
+
+
+@pytest.mark.parametrize("headers", [{}, {"Authorization": "Bearer wrong"}, {"Authorization": "alice-token"}])
+def test_rejects_unauthenticated_requests(headers):
+    with make_client() as client:
+        response = client.post("/v1/threads/t1/invoke", json={"message": "hi"}, headers=headers)
+        assert response.status_code == 401
+        assert client.app.state.server.agent.user_ids == []
+
+
+def test_thread_belongs_to_the_user_who_started_it():
+    with make_client() as client:
+        assert client.post("/v1/threads/t1/invoke", json={"message": "hi"}, headers=ALICE).status_code == 200
+        assert client.post("/v1/threads/t1/invoke", json={"message": "hi"}, headers=BOB).status_code == 404
+        assert client.post("/v1/threads/t1/stream", json={"message": "hi"}, headers=BOB).status_code == 404
+        assert client.post("/v1/threads/t1/invoke", json={"message": "again"}, headers=ALICE).status_code == 200
+        assert client.post("/v1/threads/t2/invoke", json={"message": "hi"}, headers=BOB).status_code == 200
+
+
+def test_invalid_body():
+    with make_client() as client:
+        assert client.post("/v1/threads/t1/invoke", json={}, headers=ALICE).status_code == 422
+        assert client.post("/v1/threads/t1/invoke", content=b"nope", headers=ALICE).status_code == 400
+
+
+def test_stream_sends_agent_messages_but_not_summarizer_tokens():
+    with make_client() as client:
+        with client.stream("POST", "/v1/threads/t1/stream", json={"message": "hi"}, headers=ALICE) as response:
+            assert response.status_code == 200
+            text = "".join(response.iter_text())
+    assert "Hello from the agent" in text
+    assert "SUMMARY TOKENS" not in text
+    assert text.rstrip().endswith('data: {"thread_id": "t1"}')
+    assert "event: done" in text
+
+
+def test_same_thread_requests_are_serialized():
+    with make_client(fake_llm_latency=0.3, thread_lock_timeout=0.1) as client:
+        statuses = []
+
+        def send():
+            response = client.post("/v1/threads/shared/invoke", json={"message": "hi"}, headers=ALICE)
+            statuses.append(response.status_code)
+
+        threads = [threading.Thread(target=send) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sorted(statuses) == [200, 409]
+        assert len(client.app.state.server.thread_locks) == 0
+
+
+def test_overload_is_rejected_with_retry_after():
+    with make_client(fake_llm_latency=0.3, max_concurrency=1, max_queue=1, queue_timeout=0.1) as client:
+        responses = []
+
+        def send(i):
+            responses.append(client.post(f"/v1/threads/t{i}/invoke", json={"message": "hi"}, headers=ALICE))
+
+        threads = [threading.Thread(target=send, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        statuses = sorted(response.status_code for response in responses)
+        assert statuses[0] == 200 and statuses[-1] == 503
+        assert all(response.headers.get("retry-after") for response in responses if response.status_code == 503)
+        stats = client.app.state.server.admission.stats()
+        assert stats["running"] == 0 and stats["rejected"] >= 1
+
+
+def test_probes():
+    with make_client() as client:
+        assert client.get("/healthz").json() == {"status": "ok"}
+        # No database pool in the in-memory agent, so the server is not ready
+        response = client.get("/readyz")
+        assert response.status_code == 503
+        assert response.json()["checks"]["agent_warm"] is True